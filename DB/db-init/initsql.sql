@@ -33,6 +33,13 @@ CREATE TABLE IF NOT EXISTS users (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Profile fields used by the app (see pg_store.py)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS name TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS website TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS github TEXT;
+-- Parse-once structured profile, reused for every job (see candidate_profile.py)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS profile JSONB;
+
 -- Create jobs table if not exists
 -- add a job_title with return from OLLAMA LATER! (job_title TEXT,)
 CREATE TABLE IF NOT EXISTS jobs (
@@ -45,6 +52,18 @@ CREATE TABLE IF NOT EXISTS jobs (
     chat_history JSONB
 );
 
+-- Jobs are always looked up per user
+CREATE INDEX IF NOT EXISTS jobs_user_id_idx ON jobs (user_id);
+
+-- Generated/edited CV versions per job (full snapshots or JSON patches, see cv_versions.py)
+CREATE TABLE IF NOT EXISTS cv_versions (
+    version_id BIGSERIAL PRIMARY KEY,
+    job_id INTEGER REFERENCES jobs(job_id),
+    user_id TEXT REFERENCES users(user_id),
+    record JSONB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cv_versions_job_idx ON cv_versions (job_id, version_id);
+
 -- Trigger to update last_modified automatically
 CREATE OR REPLACE FUNCTION update_last_modified()
 RETURNS TRIGGER AS $$
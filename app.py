@@ -1,11 +1,8 @@
 import os
 import pathlib
 import json
-import re
 import streamlit as st
 import pandas as pd
-from jinja2 import Environment, FileSystemLoader
-import weasyprint
 import streamlit_ace
 import importlib
 import sys
@@ -21,16 +18,24 @@ from file_management import (
     get_user_jobs,
     save_dict_in_db,
     get_chat_history,
-    save_chat_history,
+    append_chat_messages,
+    save_cv_version,
+    get_latest_cv,
 )
 
-from llm_agent import LLMAgent  # LLM wrapper
-from llm_agent import LLM_Chat  # Optional chat wrapper
+from llm_agent import get_agent  # Shared LLMAgent per model/key
+from llm_agent import get_chat  # Shared chat wrapper
+from llm_agent import rate_limit_stats
+from conversation_memory import ConversationMemory
+from candidate_profile import ensure_user_profile  # Parse-once profile, tailored per job
+from cv_rendering import clean_text_fields, render_and_write_pdf  # Post-processing + HTML/PDF output
+from cv_sections import section_label, section_targets
 
 # Force reload of resume_optimizer to pick up changes
 if 'resume_optimizer' in sys.modules:
     importlib.reload(sys.modules['resume_optimizer'])
-from resume_optimizer import ResumeOptimizer
+from resume_optimizer import ACHIEVEMENT_INDICATORS, ResumeOptimizer
+from source_index import ensure_user_source_index  # Sentence index of the source docs, stored per user
 
 # -----------------------
 # Paths
@@ -42,323 +47,6 @@ API_KEY_FILE = BASE_DIR / "API_KEY.txt"
 OUTPUT_DIR.mkdir(exist_ok=True)
 (TEMPLATES_DIR / ".keep").touch(exist_ok=True)
 
-# -----------------------
-# Jinja environment
-# -----------------------
-env = Environment(
-    loader=FileSystemLoader(str(TEMPLATES_DIR)),
-    extensions=['jinja2.ext.do']   # <-- enable 'do' tag
-)
-template = env.get_template("cv_template.html")
-
-# -----------------------
-# Helpers
-# -----------------------
-URL_RE = re.compile(r'https?://[^\s)]+', re.IGNORECASE)
-
-def find_links(text: str):
-    return list(set(URL_RE.findall(text or "")))
-
-def pick_profile_links(resume_text: str, linkedin_text: str):
-    all_text = " ".join([resume_text or "", linkedin_text or ""])
-    urls = find_links(all_text)
-    linkedin_url = next((u for u in urls if "linkedin.com" in u.lower()), None)
-    github_url = next((u for u in urls if "github.com" in u.lower()), None)
-    
-    # Look for website URLs - prioritize personal domains
-    website_url = None
-    candidates = [u for u in urls if u not in [linkedin_url, github_url]]
-    
-    # Check for common personal website patterns
-    for url in candidates:
-        lower_url = url.lower()
-        if any(domain in lower_url for domain in ['.page', '.dev', '.io', '.com', '.net', '.org']):
-            # Skip common platforms that aren't personal websites
-            if not any(platform in lower_url for platform in ['facebook', 'twitter', 'instagram', 'youtube']):
-                website_url = url
-                break
-    
-    # If no good candidate found, use first non-social URL
-    if not website_url and candidates:
-        website_url = candidates[0]
-    
-    return {"linkedin": linkedin_url, "github": github_url, "website": website_url}
-
-def slim_skills(structured_result):
-    skills = structured_result.get("skills") or []
-    out = []
-    for s in skills:
-        if isinstance(s, dict) and "skill" in s:
-            out.append(s["skill"])
-        elif isinstance(s, str):
-            out.append(s)
-    seen = set()
-    deduped = []
-    for s in out:
-        if s and s not in seen:
-            seen.add(s)
-            deduped.append(s)
-    return deduped
-
-def ensure_summary_text(structured_result):
-    summary = structured_result.get("summary")
-    if isinstance(summary, dict) and "description" in summary:
-        return summary["description"]
-    if isinstance(summary, str):
-        return summary
-    return ""
-
-def filter_sections(structured_result, include_flags):
-    data = dict(structured_result)
-    if not include_flags.get("volunteer", True):
-        data["volunteering"] = []
-    if not include_flags.get("projects", True):
-        data["projects"] = []
-    return data
-
-def clean_text_fields(cv_dict):
-    """
-    Clean up project and volunteering entries:
-    - Collapse accidental internal spaces in titles and roles
-    - Remove redundant 'Independent Project'
-    - Normalize hyphens, dates, and locations
-    """
-    for proj in cv_dict.get("projects", []):
-        if "project_title" in proj and proj["project_title"]:
-            title = proj["project_title"]
-            # Normalize hyphens and dashes
-            title = re.sub(r'\s*[-–—]\s*', '-', title)
-            # Collapse multiple spaces
-            title = re.sub(r'\s+', ' ', title).strip()
-            # Remove spaces inside words but preserve spaces before numbers or capital letters starting a new word
-            title = re.sub(r'(?<=[a-z]) (?=[a-z])', '', title)
-            proj["project_title"] = title
-
-        # Clean role
-        if "role" in proj and proj["role"]:
-            proj["role"] = re.sub(r'\s+', ' ', proj["role"]).strip()
-        else:
-            proj["role"] = ""
-
-        # Clean organization
-        if "organization" not in proj or not proj["organization"]:
-            # Only fill if role is empty, avoid redundancy
-            proj["organization"] = "Independent Project" if not proj["role"] else ""
-        else:
-            proj["organization"] = re.sub(r'\s+', ' ', proj["organization"]).strip()
-
-        # Clean dates and location
-        for key in ["start_date", "end_date", "location"]:
-            if key in proj and proj[key]:
-                proj[key] = re.sub(r'\s+', ' ', proj[key]).strip()
-
-    for vol in cv_dict.get("volunteering", []):
-        if "role" in vol and vol["role"]:
-            vol["role"] = re.sub(r'\s+', ' ', vol["role"]).strip()
-        if "organization" not in vol or not vol["organization"]:
-            vol["organization"] = "Independent Project"
-        else:
-            vol["organization"] = re.sub(r'\s+', ' ', vol["organization"]).strip()
-
-        # Clean dates and location
-        for key in ["start_date", "end_date", "location"]:
-            if key in vol and vol[key]:
-                vol[key] = re.sub(r'\s+', ' ', vol[key]).strip()
-
-    return cv_dict
-
-def extract_titular_certifications(structured_dict):
-    """Extract certifications that should appear after the name"""
-    titular_certs = {
-        "PMP": ["pmp", "project management professional"],
-        "CSM": ["csm", "certified scrum master"],
-        "CPA": ["cpa", "certified public accountant"],
-        "MBA": ["mba", "master of business administration"],
-        "PHR": ["phr", "professional in human resources"],
-        "CFA": ["cfa", "chartered financial analyst"],
-        "PE": ["pe", "professional engineer"],
-        "PMI-ACP": ["pmi-acp", "agile certified practitioner"],
-        "CISSP": ["cissp", "certified information systems security professional"],
-        "Six Sigma": ["six sigma black belt", "six sigma green belt"]
-    }
-    
-    found_titular = []
-    certifications = structured_dict.get("certifications", [])
-    
-    for cert in certifications:
-        cert_text = ""
-        if isinstance(cert, dict):
-            cert_text = (cert.get("title", "") + " " + cert.get("issuer", "")).lower()
-        else:
-            cert_text = str(cert).lower()
-        
-        for abbrev, keywords in titular_certs.items():
-            if any(keyword in cert_text for keyword in keywords):
-                found_titular.append(abbrev)
-                break
-    
-    return list(set(found_titular))  # Remove duplicates
-
-def format_name_with_certifications(name, certifications):
-    """Add certifications after the name"""
-    if not certifications:
-        return name
-    cert_string = ", ".join(certifications)
-    return f"{name}, {cert_string}"
-
-def has_relevant_certifications(structured_dict):
-    """Check if there are any certifications to display"""
-    certifications = structured_dict.get("certifications", [])
-    if not certifications:
-        return False
-    
-    # Filter out empty certifications and avoid duplicates
-    valid_certs = []
-    seen_titles = set()
-    
-    for cert in certifications:
-        title = ""
-        if isinstance(cert, dict):
-            title = cert.get("title", "").strip()
-        elif isinstance(cert, str):
-            title = cert.strip()
-        
-        # Skip empty, summary text, or already seen certifications
-        if title and len(title) > 3 and title not in seen_titles:
-            # Skip if it looks like summary text (contains common summary words)
-            summary_indicators = ['with experience', 'certified project management professional with', 'experienced in']
-            if not any(indicator in title.lower() for indicator in summary_indicators):
-                valid_certs.append(cert)
-                seen_titles.add(title)
-    
-    return len(valid_certs) > 0
-
-def render_and_write_pdf(
-    structured_result,
-    header_location,
-    out_dir: pathlib.Path,
-    filename_base: str,
-    include_projects: bool = True,
-    include_volunteer: bool = True,
-    resume_text: str = "",
-    linkedin_text: str = ""
-):
-    data = dict(structured_result)
-    
-    # Extract titular certifications before processing
-    titular_certs = extract_titular_certifications(data)
-    
-    # Update name with certifications
-    original_name = data.get("name", "Unknown Name")
-    data["name"] = format_name_with_certifications(original_name, titular_certs)
-    
-    if not include_volunteer:
-        data["volunteering"] = []
-    if not include_projects:
-        data["projects"] = []
-    
-    data["linkedin"] = data.get("linkedin") or None
-    data["github"] = data.get("github") or None
-    data["website"] = data.get("website") or None
-    data["location"] = header_location or data.get("location")
-    
-    # Extract profile links from resume and linkedin text
-    profile_links = pick_profile_links(resume_text, linkedin_text)
-    if not data["linkedin"] and profile_links["linkedin"]:
-        data["linkedin"] = profile_links["linkedin"]
-    if not data["github"] and profile_links["github"]:
-        data["github"] = profile_links["github"]
-    if not data["website"] and profile_links["website"]:
-        data["website"] = profile_links["website"]
-    
-    # Ensure website has proper protocol for hyperlinks
-    if data.get("website") and not data["website"].startswith(("http://", "https://")):
-        data["website"] = f"https://{data['website']}"
-    
-    if "certifications" not in data or data["certifications"] is None:
-        data["certifications"] = []
-
-    # Existing certification extraction logic...
-    def extract_certifications(text):
-        found = []
-        if not text:
-            return found
-        txt = text.lower()
-        known = [
-            ("Project Management Professional (PMP)", "Project Management Institute", ["pmp", "project management professional"]),
-            ("Export Compliance Certification", "CITI Program", ["export compliance", "citi program", "citi"]),
-            ("Certified Scrum Master (CSM)", "Scrum Alliance", ["scrum master", "csm"]),
-            ("Lean Six Sigma", "Various", ["six sigma", "lean six sigma"]),
-            ("Certified Information Systems Security Professional (CISSP)", "(ISC)²", ["cissp"]),
-            ("Professional in Human Resources (PHR)", "HR Certification Institute", ["phr"]),
-            ("Chartered Financial Analyst (CFA)", "CFA Institute", ["cfa"])
-        ]
-        for title, issuer, keys in known:
-            for k in keys:
-                if k in txt and title not in [c.get("title") if isinstance(c,dict) else str(c) for c in found]:
-                    found.append({"title": title, "issuer": issuer})
-                    break
-        
-        # Look for certification patterns in text
-        lines = [l.strip(" -•*") for l in re.split(r'[\r\n]+', text) if l.strip()]
-        for line in lines:
-            low = line.lower()
-            if ("cert" in low or "certificate" in low or "certification" in low) and len(line) < 120:
-                if not any((isinstance(c,str) and c==line) or (isinstance(c,dict) and c.get("title")==line) for c in found):
-                    found.append({"title": line.strip(), "issuer": ""})
-        return found
-
-    auto = extract_certifications(resume_text) + extract_certifications(linkedin_text)
-    existing_titles = set()
-    cleaned = []
-    
-    # Process ALL certifications - both existing and auto-detected
-    all_certs = list(data.get("certifications", []) or []) + auto
-    
-    for cert in all_certs:
-        title = ""
-        issuer = ""
-        
-        if isinstance(cert, dict):
-            title = cert.get("title", "").strip()
-            issuer = cert.get("issuer", "").strip()
-        elif isinstance(cert, str):
-            title = cert.strip()
-            issuer = ""
-        
-        # Skip empty, very short, or problematic entries
-        if not title or len(title) < 4:
-            continue
-            
-        # Skip entries that look like summary text
-        skip_phrases = [
-            'with experience', 'certified project management professional with', 
-            'experienced in', 'certifications', 'summary', 'professional with'
-        ]
-        
-        if any(phrase in title.lower() for phrase in skip_phrases):
-            continue
-            
-        # Skip duplicates
-        if title in existing_titles:
-            continue
-            
-        # Add valid certification
-        existing_titles.add(title)
-        cleaned.append({"title": title, "issuer": issuer})
-    
-    data["certifications"] = cleaned
-    
-    # Add flag for template to know if certifications exist
-    data["has_certifications"] = has_relevant_certifications(data)
-
-    rendered_html = template.render(structured_result=data)
-    out_html = out_dir / f"{filename_base}.html"
-    out_pdf = out_dir / f"{filename_base}.pdf"
-    out_html.write_text(rendered_html, encoding="utf-8")
-    weasyprint.HTML(string=rendered_html).write_pdf(str(out_pdf))
-    return out_html, out_pdf
-
 # -----------------------
 # Streamlit App
 # -----------------------
@@ -381,15 +69,41 @@ if location_mode == "Specific location":
 api_key_path_input = st.sidebar.text_input("Path to API key file", value=str(API_KEY_FILE))
 
 # Session state initialization
-for key in ["user_id","user_name","resume_text","linkedin_text","job_id","selected_job_text","generated_cv","rendered_html","chat_history","website","github","optimize_resume"]:
+for key in ["user_id","user_name","resume_text","linkedin_text","job_id","selected_job_text","generated_cv","cv_version","rendered_html","chat_history","website","github","optimize_resume"]:
     if key not in st.session_state:
         if key == "optimize_resume":
             st.session_state[key] = True  # Default to True
-        elif key in ["user_id","job_id","generated_cv","chat_history"]:
+        elif key in ["user_id","job_id","generated_cv","cv_version","chat_history"]:
             st.session_state[key] = None
         else:
             st.session_state[key] = ""
 
+
+def section_preview():
+    """A placeholder showing CV sections as they stream in, and the on_section callback filling it."""
+    placeholder = st.empty()
+    received = []
+
+    def on_section(key, value):
+        received.append(key)
+        text = "Received so far: " + ", ".join(received)
+        if key == "experience" and value:
+            text += "\n\n" + "\n".join(f"- {e.get('role')}, {e.get('company')}" for e in value)
+        placeholder.info(text)
+
+    return placeholder, on_section
+
+
+def show_parse_report(agent):
+    """Caption for answers that needed local JSON repair or a follow-up request."""
+    report = agent.last_parse_report
+    if report and (report["repaired"] or report["re_requested"]):
+        st.caption(
+            f"Model output fixed: {len(report['repaired'])} sections repaired locally, "
+            f"{len(report['re_requested'])} requested again"
+            + (f", {len(report['unresolved'])} left empty" if report["unresolved"] else "")
+        )
+
 # -----------------------
 # Step 1: User selection/creation
 # -----------------------
@@ -453,6 +167,18 @@ with col_b:
                     st.session_state.website = website_input
                     st.session_state.github = github_input
                     st.success(f"User {uid} created.")
+                    # Parse the documents once now; every job then only tailors the stored profile
+                    try:
+                        with st.spinner("Building candidate profile..."):
+                            preview, on_section = section_preview()
+                            ensure_user_profile(
+                                get_agent(api_key_path=str(API_KEY_FILE)), uid,
+                                st.session_state.resume_text, st.session_state.linkedin_text,
+                                on_section=on_section
+                            )
+                            preview.empty()
+                    except Exception as e:
+                        st.warning(f"Candidate profile not built yet, it will be built on first generation: {e}")
         except Exception as e:
             st.error(f"Error creating user: {e}")
 
@@ -474,7 +200,18 @@ if jobs:
         st.session_state.job_id = chosen
         row = next(j for j in jobs if j[0]==chosen)
         st.session_state.selected_job_text = row[1] or ""
-        st.success(f"Loaded job {chosen}.")
+        # Continue this job's stored chat; each new turn is appended to it
+        st.session_state.chat_history = get_chat_history(st.session_state.user_id, chosen)
+        st.session_state.chat_stored = len(st.session_state.chat_history)
+        # Restore the newest saved resume for this job instead of paying for a new generation
+        cv_version, latest_cv = get_latest_cv(st.session_state.user_id, chosen)
+        st.session_state.cv_version = cv_version
+        if latest_cv:
+            st.session_state.generated_cv = latest_cv
+            st.session_state.pop("edited_resume", None)
+            st.success(f"Loaded job {chosen} with its latest saved resume.")
+        else:
+            st.success(f"Loaded job {chosen}.")
 
 st.subheader("Or create a new job")
 new_jd = st.text_area("Paste job description", height=180, key="jd_text")
@@ -486,6 +223,8 @@ if st.button("Save New Job"):
             jid = create_new_job(st.session_state.user_id,new_jd.strip())
             st.session_state.job_id = jid
             st.session_state.selected_job_text = new_jd.strip()
+            st.session_state.chat_history = []
+            st.session_state.chat_stored = 0
             st.success(f"Created job {jid}.")
         except Exception as e:
             st.error(f"Error saving job: {e}")
@@ -503,6 +242,12 @@ st.session_state.optimize_resume = st.checkbox(
     help="Automatically optimize resume for the job description and one-page format"
 )
 
+st.session_state.bypass_llm_cache = st.checkbox(
+    "🔄 Force regeneration (skip cached AI response)",
+    value=st.session_state.get("bypass_llm_cache", False),
+    help="Identical resume, LinkedIn and job inputs are normally answered from the local response cache"
+)
+
 if st.button("Generate with AI"):
     if not st.session_state.selected_job_text.strip():
         st.warning("Select or create a job first.")
@@ -520,7 +265,7 @@ if st.button("Generate with AI"):
 
     # Initialize agent
     try:
-        agent = LLMAgent(api_key_path=str(API_KEY_FILE))
+        agent = get_agent(api_key_path=str(API_KEY_FILE))
     except Exception as e:
         st.error(f"Failed to initialize AI agent: {e}")
         st.stop()
@@ -528,26 +273,60 @@ if st.button("Generate with AI"):
     # Generate structured resume
     with st.spinner("Generating tailored resume..."):
         try:
-            # Enhanced prompt for better job matching
-            enhanced_prompt = f"""
-            Parse the user's resume and LinkedIn content into structured JSON.
-            FOCUS ON: Skills, experiences, and projects most relevant to this job description.
-            
-            Job Requirements Analysis:
-            {st.session_state.selected_job_text}
-            
-            Instructions:
-            - Prioritize experience and skills that match the job requirements
-            - Include 'projects' and 'volunteering' sections, even if empty
-            - Extract ALL certifications mentioned in the source documents
-            - Focus on quantifiable achievements and relevant technical skills
-            """
+            # The stored profile is built once per user; later jobs only pay for tailoring
+            # Sections show up here as they stream in, instead of after the whole answer
+            preview, on_section = section_preview()
+            try:
+                profile = ensure_user_profile(
+                    agent, st.session_state.user_id,
+                    st.session_state.resume_text, st.session_state.linkedin_text,
+                    on_section=on_section
+                )
+            except Exception as e:
+                st.warning(f"Could not build the candidate profile, generating from the documents: {e}")
+                profile = None
 
-            structured = agent.generate_cv(
-                resume_text=st.session_state.resume_text,
-                linkedin_text=st.session_state.linkedin_text,
-                job_description=enhanced_prompt
+            if profile:
+                structured = agent.tailor_cv(
+                    profile,
+                    st.session_state.selected_job_text,
+                    bypass_cache=st.session_state.bypass_llm_cache
+                )
+                tailoring = agent.last_tailoring_report
+                if tailoring:
+                    st.caption(
+                        f"Tailored from the stored profile: {tailoring['input_tokens']} prompt and "
+                        f"{tailoring['output_tokens']} answer tokens (estimated)"
+                    )
+            else:
+                # The agent's prompts already carry the tailoring instructions; send the posting as-is
+                structured = agent.generate_cv(
+                    resume_text=st.session_state.resume_text,
+                    linkedin_text=st.session_state.linkedin_text,
+                    job_description=st.session_state.selected_job_text,
+                    bypass_cache=st.session_state.bypass_llm_cache,
+                    on_section=on_section
+                )
+                compaction = agent.last_compaction
+                if compaction:
+                    st.caption(
+                        f"Prompt sources: {compaction['tokens_before']} → {compaction['tokens_after']} "
+                        f"estimated tokens ({compaction['saved_pct']}% saved)"
+                    )
+            preview.empty()
+            show_parse_report(agent)
+            cache_stats = agent.cache_stats()
+            st.caption(
+                f"LLM cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                f"{cache_stats['saved_seconds']}s of generation time saved this session"
             )
+            limits = rate_limit_stats()
+            if limits["throttled"] or limits["retries"]:
+                st.caption(
+                    f"Rate limiter: {limits['queue_depth']} calls waiting, "
+                    f"avg wait {limits['avg_wait_s']}s, {limits['retries']} retries "
+                    f"({limits['rate_limited']} after HTTP 429)"
+                )
 
             if not structured:
                 st.error("AI generation returned no result. Please try again.")
@@ -590,11 +369,18 @@ if st.button("Generate with AI"):
                 # Apply optimization with debugging
                 st.write("**Debug - Applying optimization...**")
                 structured_dict_before = structured_dict.copy()
+                source_index = ensure_user_source_index(
+                    st.session_state.user_id,
+                    st.session_state.resume_text,
+                    st.session_state.linkedin_text,
+                    ACHIEVEMENT_INDICATORS,
+                )
                 structured_dict = optimizer.optimize_resume(
                     structured_dict, 
                     st.session_state.selected_job_text,
                     st.session_state.resume_text,
-                    st.session_state.linkedin_text
+                    st.session_state.linkedin_text,
+                    source_index=source_index,
                 )
                 
                 # Debug: Verify optimization was applied
@@ -641,6 +427,15 @@ if st.button("Generate with AI"):
     if not structured_dict.get("github") and st.session_state.get("github"):
         structured_dict["github"] = st.session_state.github
 
+    # Persist this generation as the job's newest resume version
+    try:
+        st.session_state.cv_version = save_cv_version(
+            st.session_state.user_id, st.session_state.job_id, structured_dict, kind="generated"
+        )
+        st.session_state.pop("edited_resume", None)
+    except Exception as e:
+        st.warning(f"Resume generated but could not be saved: {e}")
+
     # PDF generation with improved certification handling
     try:
         out_html, out_pdf = render_and_write_pdf(
@@ -704,6 +499,61 @@ if st.session_state.generated_cv:
     if 'edited_resume' not in st.session_state:
         st.session_state.edited_resume = structured_dict.copy()
     
+    # Rewrite one part with the AI instead of regenerating the whole resume
+    with st.expander("🎯 Regenerate One Section with AI", expanded=False):
+        targets = section_targets(st.session_state.edited_resume)
+        target = st.selectbox(
+            "Section to regenerate",
+            targets,
+            format_func=lambda t: section_label(st.session_state.edited_resume, *t).capitalize()
+        )
+        section_instructions = st.text_input(
+            "Instructions (optional)",
+            placeholder="e.g. Make it sharper and mention stakeholder management",
+            key="section_instructions"
+        )
+        if st.button("✨ Regenerate Section"):
+            try:
+                agent = get_agent(api_key_path=str(API_KEY_FILE))
+                with st.spinner(f"Regenerating {section_label(st.session_state.edited_resume, *target)}..."):
+                    st.session_state.edited_resume = agent.regenerate_section(
+                        st.session_state.edited_resume,
+                        target[0],
+                        st.session_state.resume_text,
+                        st.session_state.linkedin_text,
+                        st.session_state.selected_job_text,
+                        index=target[1],
+                        instructions=section_instructions,
+                        bypass_cache=st.session_state.bypass_llm_cache
+                    )
+                st.session_state.section_report = agent.last_section_report
+                # Keyed edit widgets keep their own state; drop it so they show the new text
+                widget_prefixes = {
+                    "experience": ("exp_role_", "exp_company_", "exp_start_", "exp_end_", "exp_location_", "exp_achievement_"),
+                    "projects": ("proj_title_", "proj_role_", "proj_org_", "proj_start_", "proj_end_", "proj_achievement_"),
+                }.get(target[0], ())
+                for widget_key in list(st.session_state.keys()):
+                    for prefix in widget_prefixes:
+                        if widget_key.startswith(prefix) and widget_key[len(prefix):].split("_")[0] == str(target[1]):
+                            del st.session_state[widget_key]
+                st.session_state.cv_version = save_cv_version(
+                    st.session_state.user_id,
+                    st.session_state.job_id,
+                    st.session_state.edited_resume,
+                    parent=st.session_state.cv_version,
+                    kind="section",
+                )
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error regenerating section: {e}")
+        report = st.session_state.get("section_report")
+        if report:
+            st.caption(
+                f"Last rewrite ({report['target']}): {report['input_tokens']} prompt and "
+                f"{report['output_tokens']} answer tokens (estimated), "
+                + ("from cache" if report["cached"] else f"{report['latency_s']}s")
+            )
+
     # Create expandable sections for better organization
     with st.expander("👤 Personal Information & Summary", expanded=False):
         col1, col2 = st.columns(2)
@@ -988,7 +838,18 @@ if st.session_state.generated_cv:
         if st.button("💾 Save Changes", type="primary"):
             # Update the main generated_cv with edited version
             st.session_state.generated_cv = st.session_state.edited_resume
-            st.success("✅ Changes saved!")
+            try:
+                # Stored as a JSON patch against the version being edited
+                st.session_state.cv_version = save_cv_version(
+                    st.session_state.user_id,
+                    st.session_state.job_id,
+                    st.session_state.edited_resume,
+                    parent=st.session_state.cv_version,
+                    kind="edited",
+                )
+                st.success("✅ Changes saved!")
+            except Exception as e:
+                st.warning(f"Changes applied but could not be saved: {e}")
     
     with col2:
         if st.button("🔄 Reset to Original"):
@@ -1055,22 +916,36 @@ if st.session_state.job_id:
         st.session_state.chat_history.append({"role": "user", "content": user_msg})
         with st.chat_message("user"):
             st.markdown(user_msg)
-        try:
-            agent_chat = LLM_Chat(api_key_path=str(API_KEY_FILE))
-            prompt_messages = [
-                {"role": "system", "content": "You are a professional career assistant. Provide suggestions based on the user's CV."},
-                {"role": "user", "content": f"{user_msg}\n\nHere is the current CV:\n{st.session_state.generated_cv}"}
-            ]
-            assistant_reply = agent_chat.get_chat_answer(prompt_messages)[0].get("content","")
-        except Exception:
-            assistant_reply = "Got it! (LLMAgent chat is not available.)"
+        with st.chat_message("assistant"):
+            try:
+                agent_chat = get_chat(api_key_path=str(API_KEY_FILE))
+                # One memory per job: recent turns verbatim, older ones summarized, CV sent once
+                memories = st.session_state.setdefault("chat_memories", {})
+                memory = memories.get(st.session_state.job_id)
+                if memory is None:
+                    memory = memories[st.session_state.job_id] = ConversationMemory(summarize=agent_chat.summarize_turns)
+                prompt_messages = memory.build_messages(st.session_state.generated_cv, st.session_state.chat_history)
+                # Render tokens as they arrive instead of waiting for the whole answer
+                assistant_reply = st.write_stream(agent_chat.stream_chat_answer(prompt_messages))
+                timing = agent_chat.last_timing
+                if timing and timing["ttft"] is not None:
+                    st.caption(
+                        f"First token after {timing['ttft']:.2f}s, full answer after {timing['total']:.2f}s, "
+                        f"~{memory.last_prompt_tokens} prompt tokens"
+                    )
+            except Exception:
+                assistant_reply = "Got it! (LLMAgent chat is not available.)"
+                st.markdown(assistant_reply)
 
         st.session_state.chat_history.append({"role": "assistant", "content": assistant_reply})
-        with st.chat_message("assistant"):
-            st.markdown(assistant_reply)
 
         try:
-            save_chat_history(st.session_state.user_id, st.session_state.job_id, st.session_state.chat_history)
+            # Only this turn's messages (and the greeting, the first time) are written
+            stored = st.session_state.get("chat_stored", 0)
+            append_chat_messages(
+                st.session_state.user_id, st.session_state.job_id, st.session_state.chat_history[stored:]
+            )
+            st.session_state.chat_stored = len(st.session_state.chat_history)
         except Exception:
             pass
 else:
@@ -0,0 +1,1185 @@
+"""
+Stress tests and benchmarks for the ATS optimizer building blocks.
+
+    python benchmarks.py stress-jobs --procs 8 --jobs-per-proc 50
+    python benchmarks.py pdf-engines --docs 20 --pages 10
+    python benchmarks.py llm-batch --jobs 30 --concurrency 8 --latency 0.5
+    python benchmarks.py chat-stream --latency 0.4 --chunk-delay 0.03
+    python benchmarks.py llm-setup --requests 50
+    python benchmarks.py rate-limit --jobs 30 --server-rpm 10 --window 2
+    python benchmarks.py prompt-compaction --roles 6 --bullets 5
+    python benchmarks.py chat-memory --turns 40
+    python benchmarks.py pipeline --jobs 20 --latency 1.0
+    python benchmarks.py section-regen --latency 0.3 --chunk-delay 0.01
+    python benchmarks.py profile-tailor --jobs 10 --latency 0.3 --chunk-delay 0.01
+    python benchmarks.py json-repair --latency 0.3 --chunk-delay 0.01
+    python benchmarks.py keyword-match --keywords 50 200 800 --bullets 5000
+    python benchmarks.py bullet-scoring --roles 40 --bullets 12 --postings 50
+    python benchmarks.py job-keywords --postings 20000 --adds 200
+    python benchmarks.py source-index --roles 30 --bullets 40
+    python benchmarks.py skill-taxonomy --skills 40 --resumes 2000
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import pathlib
+import random
+import tempfile
+import time
+from collections import Counter
+
+
+# -----------------------
+# JSON store concurrency
+# -----------------------
+def _create_jobs_worker(worker_id, count, user_id):
+    import file_management
+    return [
+        file_management.create_new_job(user_id, f"worker {worker_id} job {i}")
+        for i in range(count)
+    ]
+
+
+def stress_jobs(procs: int = 8, jobs_per_proc: int = 50, backend: str = "json") -> dict:
+    """Create jobs from `procs` processes at once against a fresh store and check none are lost."""
+    with tempfile.TemporaryDirectory(prefix="ats_stress_") as db_dir:
+        os.environ["ATS_DB_DIR"] = db_dir
+        os.environ["ATS_STORAGE_BACKEND"] = backend
+        ctx = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+        with ctx.Pool(procs) as pool:
+            results = pool.starmap(
+                _create_jobs_worker, [(w, jobs_per_proc, 1) for w in range(procs)]
+            )
+        elapsed = time.perf_counter() - start
+
+        ids = [jid for worker_ids in results for jid in worker_ids]
+        expected = procs * jobs_per_proc
+        with ctx.Pool(1) as pool:
+            stored = pool.apply(_stored_job_ids, (1,))
+            indexed = pool.apply(_indexed_job_ids)
+
+    report = {
+        "backend": backend,
+        "expected": expected,
+        "returned_unique_ids": len(set(ids)),
+        "stored": len(stored),
+        "lost": expected - len(set(ids) & set(stored)),
+        "indexed": len(indexed),
+        "jobs_per_sec": round(expected / elapsed, 1),
+    }
+    if report["lost"] or report["returned_unique_ids"] != expected:
+        raise AssertionError(f"Lost or duplicated jobs: {report}")
+    if indexed != {str(jid) for jid in stored}:
+        raise AssertionError(f"Keyword index out of step with the stored jobs: {report}")
+    return report
+
+
+def _stored_job_ids(user_id):
+    import file_management
+    return [job[0] for job in file_management.get_user_jobs(user_id)]
+
+
+def _indexed_job_ids():
+    from job_keywords import JobKeywordIndex
+    index = JobKeywordIndex()
+    index.keywords("")  # loads the snapshot and log
+    return index.job_ids
+
+
+# -----------------------
+# PDF extraction engines
+# -----------------------
+_WORDS = (
+    "led managed delivered launched roadmap stakeholders python agile scrum budget vendors "
+    "reduced cost increased revenue migration platform analytics dashboard team cross-functional "
+    "jira confluence smartsheet customers quarterly release process automation reporting"
+).split()
+
+
+def make_pdf_corpus(docs: int = 10, pages: int = 8, seed: int = 7) -> list:
+    """Multi-page resume-like PDFs (bytes), ~45 lines of text per page."""
+    import pymupdf
+
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(docs):
+        doc = pymupdf.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            lines = [" ".join(rng.choice(_WORDS) for _ in range(11)) for _ in range(45)]
+            page.insert_textbox(page.rect + (50, 50, -50, -50), "\n".join(lines), fontsize=9)
+        corpus.append(doc.tobytes())
+        doc.close()
+    return corpus
+
+
+def bench_pdf_engines(docs: int = 10, pages: int = 8, repeat: int = 3) -> list:
+    """Time each engine configuration over the same generated corpus (no caching involved)."""
+    from pdf_extraction import get_engine
+
+    corpus = make_pdf_corpus(docs, pages)
+    configs = [
+        ("pypdf2", "pypdf2", {}, False),
+        ("pymupdf", "pymupdf", {"max_workers": 1}, False),
+        ("pymupdf-parallel", "pymupdf", {"parallel_min_pages": 2}, False),
+        ("pymupdf-layout", "pymupdf", {"max_workers": 1}, True),
+    ]
+    rows = []
+    for label, name, kwargs, layout in configs:
+        engine = get_engine(name, **kwargs)
+        engine.extract(corpus[0], layout=layout)  # warm-up (imports, worker start-up)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chars = sum(len(engine.extract(data, layout=layout)) for data in corpus)
+            best = min(best, time.perf_counter() - start)
+        rows.append({
+            "engine": label,
+            "ms_per_doc": round(1000 * best / docs, 2),
+            "pages_per_sec": round(docs * pages / best, 1),
+            "chars": chars,
+        })
+    return rows
+
+
+# -----------------------
+# Batched CV generation
+# -----------------------
+@contextlib.contextmanager
+def _fake_llm(prefix: str, **server_options):
+    """
+    (tmp, key_file, server): a temporary directory holding key.txt with a fake API key, and a
+    fake_llm_server.FakeChatServer started with `server_options`, stopped on exit.
+    """
+    from fake_llm_server import FakeChatServer
+
+    with tempfile.TemporaryDirectory(prefix=prefix) as tmp, FakeChatServer(**server_options) as server:
+        key_file = os.path.join(tmp, "key.txt")
+        with open(key_file, "w") as f:
+            f.write("fake-key")
+        yield tmp, key_file, server
+
+
+def bench_llm_batch(jobs: int = 30, concurrency: int = 8, latency: float = 0.5, failures: int = 1) -> dict:
+    """Sequential generate_cv vs generate_cv_batch against fake_llm_server.py (cache disabled)."""
+    from caching import DiskCache, TieredCache
+    from fake_llm_server import FAIL_MARKER
+    from llm_agent import LLMAgent
+    from rate_limiting import RetryPolicy
+
+    resume = "Jane Doe\nLed platform migration\nReduced cost by 20%\nShipped analytics dashboard"
+    postings = [f"Posting {i}: senior platform engineer, python, analytics" for i in range(jobs)]
+    for i in range(min(failures, jobs)):
+        postings[i * jobs // max(failures, 1)] += f" {FAIL_MARKER}"
+
+    with _fake_llm("ats_llm_", latency=latency) as (tmp, key_file, server):
+        # No client-side rate limit: this measures concurrency, not the Groq budget
+        agent = LLMAgent(key_file, cache=TieredCache(DiskCache(os.path.join(tmp, "cache.sqlite3"))),
+                         base_url=server.base_url, retry=RetryPolicy(None))
+
+        start = time.perf_counter()
+        sequential = [agent.generate_cv(resume, "", jd, bypass_cache=True) for jd in postings]
+        sequential_s = time.perf_counter() - start
+
+        server.max_in_flight = 0
+        start = time.perf_counter()
+        batched = agent.generate_cv_batch(resume, "", postings, max_concurrency=concurrency, bypass_cache=True)
+        batched_s = time.perf_counter() - start
+
+    def summaries(results):
+        return [r["summary"] if isinstance(r, dict) else "ERROR" for r in results]
+
+    if summaries(batched) != summaries(sequential):
+        raise AssertionError("Batched results differ from sequential results or are out of order")
+    return {
+        "jobs": jobs,
+        "failed": summaries(batched).count("ERROR"),
+        "sequential_s": round(sequential_s, 2),
+        "batched_s": round(batched_s, 2),
+        "speedup": round(sequential_s / batched_s, 1),
+        "max_in_flight": server.max_in_flight,
+    }
+
+
+def bench_chat_stream(latency: float = 0.4, chunk_delay: float = 0.03, repeat: int = 3) -> dict:
+    """Time until something is shown: blocking get_chat_answer vs first streamed chunk."""
+    from llm_agent import LLM_Chat
+
+    messages = [
+        {"role": "system", "content": "You are a professional career assistant."},
+        {"role": "user", "content": "Rewrite my summary to emphasise platform migrations and cost reduction " * 3},
+    ]
+    with _fake_llm("ats_chat_", latency=latency, chunk_delay=chunk_delay) as (tmp, key_file, server):
+        chat = LLM_Chat(key_file, base_url=server.base_url)
+
+        blocking, ttft, total = [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chat.get_chat_answer(messages)
+            blocking.append(time.perf_counter() - start)
+            for _ in chat.stream_chat_answer(messages):
+                pass
+            ttft.append(chat.last_timing["ttft"])
+            total.append(chat.last_timing["total"])
+
+    return {
+        "blocking_s": round(min(blocking), 3),
+        "stream_ttft_s": round(min(ttft), 3),
+        "stream_total_s": round(min(total), 3),
+        "chunks": chat.last_timing["chunks"],
+    }
+
+
+def bench_llm_setup(requests: int = 50) -> dict:
+    """
+    Per-click cost of building LLMAgent + LLM_Chat with a fresh HTTP client (the old app
+    behaviour) vs fetching them from the registry, alone and with one uncached request each.
+    """
+    import httpx
+
+    with _fake_llm("ats_setup_", latency=0.0, chunk_delay=0.0) as (tmp, key_file, server):
+        os.environ["ATS_DB_DIR"] = tmp
+        os.environ["ATS_GROQ_RPM"] = os.environ["ATS_GROQ_TPM"] = "0"  # measure setup, not throttling
+        from llm_agent import LLM_Chat, LLMAgent, get_agent, get_chat
+
+        resume = "Jane Doe\nLed platform migration"
+
+        def fresh(call):
+            client = httpx.Client()
+            agent = LLMAgent(key_file, base_url=server.base_url, http_client=client)
+            LLM_Chat(key_file, base_url=server.base_url, http_client=client)
+            if call:
+                agent.generate_cv(resume, "", "platform engineer", bypass_cache=True)
+            client.close()
+
+        def registry(call):
+            agent = get_agent(key_file, base_url=server.base_url)
+            get_chat(key_file, base_url=server.base_url)
+            if call:
+                agent.generate_cv(resume, "", "platform engineer", bypass_cache=True)
+
+        report = {"requests": requests}
+        for label, fn in (("fresh", fresh), ("registry", registry)):
+            fn(True)  # warm-up: imports, first connection
+            for call in (False, True):
+                start = time.perf_counter()
+                for _ in range(requests):
+                    fn(call)
+                key = f"{label}_{'request' if call else 'setup'}_ms"
+                report[key] = round(1000 * (time.perf_counter() - start) / requests, 3)
+    return report
+
+
+def bench_rate_limit(jobs: int = 30, server_rpm: int = 10, window: float = 2.0, concurrency: int = 8) -> list:
+    """
+    One batch against a fake server that answers 429 beyond `server_rpm` requests per `window`,
+    first with retries only, then with the client-side limiter set to the same budget.
+    """
+    from caching import DiskCache, TieredCache
+    from llm_agent import LLMAgent
+    from rate_limiting import RateLimiter, RetryPolicy
+
+    resume = "Jane Doe\nLed platform migration\nReduced cost by 20%"
+    postings = [f"Posting {i}: platform engineer, python" for i in range(jobs)]
+    rows = []
+    for label, limiter in (
+        ("retry-only", None),
+        ("limiter", RateLimiter(server_rpm, 0, window=window)),
+        ("limiter-paced", RateLimiter(server_rpm, 0, window=window, burst=1 / server_rpm)),
+    ):
+        retry = RetryPolicy(limiter, max_attempts=8, base_delay=0.1)
+        with _fake_llm("ats_rate_", latency=0.05, chunk_delay=0.0, rpm_limit=server_rpm, window=window) \
+                as (tmp, key_file, server):
+            agent = LLMAgent(key_file, cache=TieredCache(DiskCache(os.path.join(tmp, "cache.sqlite3"))),
+                             base_url=server.base_url, retry=retry)
+            start = time.perf_counter()
+            results = agent.generate_cv_batch(resume, "", postings, max_concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+        row = {
+            "mode": label,
+            "ok": sum(isinstance(r, dict) for r in results),
+            "server_429s": server.throttled,
+            "seconds": round(elapsed, 2),
+            **retry.stats(),
+        }
+        if limiter:
+            row.update({k: v for k, v in limiter.stats().items() if k in ("max_queue_depth", "avg_wait_s")})
+        rows.append(row)
+    return rows
+
+
+# -----------------------
+# Prompt compaction
+# -----------------------
+def make_profile_texts(roles: int = 6, bullets: int = 5, seed: int = 11) -> tuple:
+    """
+    A resume and a LinkedIn export describing the same career: LinkedIn re-wraps the same
+    summary and bullets at a different width, and adds page footers and a few extra lines.
+    """
+    import textwrap
+
+    rng = random.Random(seed)
+
+    def sentence(n):
+        return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize()
+
+    summary = " ".join(sentence(12) + "." for _ in range(4))
+    jobs = [
+        (f"Senior Manager {i}", f"Company {i}", f"Jan {2010 + 2 * i} - Dec {2011 + 2 * i}",
+         [sentence(rng.randint(10, 16)) for _ in range(bullets)])
+        for i in range(roles)
+    ]
+
+    resume = ["Jane Doe", "jane@example.com | www.linkedin.com/in/janedoe", "", "SUMMARY"]
+    resume += textwrap.wrap(summary, 90) + ["", "EXPERIENCE"]
+    for title, company, dates, items in jobs:
+        resume += [f"{title}, {company}", dates] + [f"• {b}" for b in items] + [""]
+
+    linkedin = ["Jane Doe", "Senior Manager", "Summary"] + textwrap.wrap(summary, 60) + ["", "Experience"]
+    for page, (title, company, dates, items) in enumerate(jobs, 1):
+        linkedin += [company, title, f"{dates}  ({rng.randint(1, 3)} years)"]
+        for b in items:
+            linkedin += textwrap.wrap(b, 55)
+        linkedin += ["", f"Page {page} of {len(jobs)}", ""]
+    linkedin += ["Top Skills", "Jira", "Confluence", "Smartsheet"]
+    return "\n".join(resume), "\n".join(linkedin)
+
+
+def bench_prompt_compaction(roles: int = 6, bullets: int = 5, budget: int = 6000, repeat: int = 20) -> dict:
+    from prompt_compaction import compact_sources
+
+    resume, linkedin = make_profile_texts(roles, bullets)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _, linkedin_out, report = compact_sources(resume, linkedin, budget)
+    report["ms"] = round(1000 * (time.perf_counter() - start) / repeat, 2)
+    report["linkedin_lines_kept"] = f"{len(linkedin_out.splitlines())}/{len(linkedin.splitlines())}"
+    return report
+
+
+# -----------------------
+# Chat memory
+# -----------------------
+def bench_chat_memory(turns: int = 40, budget: int = 3000) -> list:
+    """
+    Estimated prompt tokens per chat turn: the old prompt (latest message + dict repr of the CV)
+    vs ConversationMemory (compact CV once + summary + recent turns), with the extractive summarizer.
+    """
+    from conversation_memory import ConversationMemory
+    from rate_limiting import estimate_tokens
+
+    rng = random.Random(5)
+    cv = {
+        "name": "Jane Doe", "email": "jane@example.com", "summary": " ".join(rng.choices(_WORDS, k=40)),
+        "experience": [
+            {"role": f"Manager {i}", "company": f"Company {i}", "start_date": f"{2012 + 2 * i}",
+             "end_date": f"{2014 + 2 * i}", "location": "Remote",
+             "achievements": [" ".join(rng.choices(_WORDS, k=14)) for _ in range(4)]}
+            for i in range(5)
+        ],
+        "skills": rng.sample(_WORDS, 12), "projects": [], "volunteering": [], "education": [
+            {"degree": "BSc", "major": "Computer Science", "institution": "State University"}
+        ], "courses": [], "certifications": ["PMP", "CSM"],
+    }
+    memory = ConversationMemory(token_budget=budget)
+    history = [{"role": "assistant", "content": "Hello! Ask me about tailoring your resume or interview prep."}]
+    rows = []
+    for turn in range(1, turns + 1):
+        question = f"Turn {turn}: " + " ".join(rng.choices(_WORDS, k=30))
+        history.append({"role": "user", "content": question})
+        old = estimate_tokens("You are a professional career assistant.") + \
+            estimate_tokens(f"{question}\n\nHere is the current CV:\n{cv}")
+        memory.build_messages(cv, history)
+        history.append({"role": "assistant", "content": " ".join(rng.choices(_WORDS, k=120))})
+        if turn in (1, 2, 5) or turn % 10 == 0:
+            rows.append({"turn": turn, "old_prompt_tokens": old, "memory_prompt_tokens": memory.last_prompt_tokens,
+                         "messages_in_context": "all" if memory.summarized == 0 else f"summary + {len(history) - 1 - memory.summarized}"})
+    return rows
+
+
+# -----------------------
+# End-to-end pipeline on a cassette
+# -----------------------
+def _percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {"p50_ms": round(1000 * pick(0.5), 1), "p95_ms": round(1000 * pick(0.95), 1)}
+
+
+def bench_pipeline(jobs: int = 20, latency: float = 1.0, pdf: bool = True) -> dict:
+    """
+    generate_cv -> clean_text_fields -> optimize_resume -> render (-> PDF) per posting.
+    Answers are recorded once from fake_llm_server.py, then replayed from the cassette with
+    `latency` seconds of synthetic model time and no server at all. Replay runs twice and
+    must produce identical CVs.
+    """
+    with _fake_llm("ats_pipeline_", latency=0.0, chunk_delay=0.0) as (tmp, key_file, server):
+        os.environ["ATS_DB_DIR"] = tmp
+        os.environ["ATS_CASSETTE_LATENCY"] = str(latency)
+        from caching import DiskCache, TieredCache
+        from cv_rendering import clean_text_fields, render_and_write_pdf, render_html
+        from llm_agent import LLMAgent
+        from rate_limiting import RetryPolicy
+        from resume_optimizer import ResumeOptimizer
+
+        resume, linkedin = make_profile_texts()
+        rng = random.Random(3)
+        postings = [f"Posting {i}: " + " ".join(rng.choices(_WORDS, k=60)) for i in range(jobs)]
+
+        def agent(backend, base_url=None):
+            # No cache and no limiter: every call reaches the model, and nothing else adds waiting
+            return LLMAgent(key_file, base_url=base_url, backend=backend, retry=RetryPolicy(None),
+                            cache=TieredCache(DiskCache(os.path.join(tmp, f"{backend}.sqlite3"))))
+
+        start = time.perf_counter()
+        recorder = agent("record", server.base_url)
+        for jd in postings:
+            recorder.generate_cv(resume, linkedin, jd, bypass_cache=True)
+        record_s = time.perf_counter() - start
+
+        def run(player):
+            timings = {stage: [] for stage in ("llm", "clean", "optimize", "render", "pdf", "total")}
+            outputs = []
+            for i, jd in enumerate(postings):
+                marks = [time.perf_counter()]
+                cv = player.generate_cv(resume, linkedin, jd, bypass_cache=True)
+                if "error" in cv:
+                    raise AssertionError(f"Replay failed for posting {i}: {cv['error']}")
+                marks.append(time.perf_counter())
+                cv = clean_text_fields(cv)
+                marks.append(time.perf_counter())
+                cv = ResumeOptimizer().optimize_resume(cv, jd, resume, linkedin)
+                marks.append(time.perf_counter())
+                html = render_html(cv, "Remote", resume_text=resume, linkedin_text=linkedin)
+                marks.append(time.perf_counter())
+                if pdf:
+                    render_and_write_pdf(cv, "Remote", pathlib.Path(tmp), f"cv_{i}",
+                                         resume_text=resume, linkedin_text=linkedin)
+                marks.append(time.perf_counter())
+                for stage, begin, end in zip(timings, marks, marks[1:]):
+                    timings[stage].append(end - begin)
+                timings["total"].append(marks[-1] - marks[0])
+                outputs.append(json.dumps(cv, sort_keys=True) + html)
+            return timings, outputs
+
+        player = agent("replay")
+        timings, first = run(player)
+        _, second = run(player)
+
+    if first != second:
+        raise AssertionError("Replayed pipeline output is not deterministic")
+    report = {"jobs": jobs, "record_s": round(record_s, 2),
+              "jobs_per_s": round(jobs / sum(timings["total"]), 2)}
+    for stage, samples in timings.items():
+        if stage != "pdf" or pdf:
+            report[stage] = _percentiles(samples)
+    return report
+
+
+# -----------------------
+# Section regeneration
+# -----------------------
+def bench_section_regen(latency: float = 0.3, chunk_delay: float = 0.01, repeat: int = 3) -> list:
+    """
+    Prompt size, answer size and latency of a full generate_cv vs regenerate_section for the
+    summary and for one experience entry. The fake server spends `chunk_delay` per answer word,
+    so latency follows output length the way a real model's does.
+    """
+    from caching import DiskCache, TieredCache
+    from llm_agent import CV_COMPLETION_TOKENS, LLMAgent
+    from rate_limiting import RetryPolicy, estimate_tokens
+
+    resume, linkedin = make_profile_texts()
+    posting = "Senior platform manager: " + " ".join(random.Random(2).choices(_WORDS, k=80))
+    with _fake_llm("ats_section_", latency=latency, chunk_delay=chunk_delay) as (tmp, key_file, server):
+        agent = LLMAgent(key_file, base_url=server.base_url, retry=RetryPolicy(None),
+                         cache=TieredCache(DiskCache(os.path.join(tmp, "cache.sqlite3"))))
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cv = agent.generate_cv(resume, linkedin, posting, bypass_cache=True)
+            timings.append(time.perf_counter() - start)
+        if "error" in cv:
+            raise AssertionError(f"Full generation failed: {cv['summary']}")
+        llm_input = agent._build_input(resume, linkedin, posting)
+        rows = [{
+            "target": "whole CV",
+            "input_tokens": agent._input_tokens(llm_input) - CV_COMPLETION_TOKENS,
+            "output_tokens": estimate_tokens(json.dumps(cv)),
+            "latency_ms": round(1000 * min(timings), 1),
+        }]
+
+        for section, index in (("summary", None), ("experience", 2)):
+            timings = []
+            for _ in range(repeat):
+                merged = agent.regenerate_section(cv, section, resume, linkedin, posting, index=index,
+                                                  bypass_cache=True)
+                timings.append(agent.last_section_report["latency_s"])
+            untouched = {k: v for k, v in merged.items() if k != section}
+            if untouched != {k: v for k, v in cv.items() if k != section}:
+                raise AssertionError(f"Regenerating {section} changed other sections")
+            report = agent.last_section_report
+            rows.append({
+                "target": report["target"],
+                "input_tokens": report["input_tokens"],
+                "output_tokens": report["output_tokens"],
+                "latency_ms": round(1000 * min(timings), 1),
+            })
+    return rows
+
+
+# -----------------------
+# Parse-once profile
+# -----------------------
+def bench_profile_tailor(jobs: int = 10, latency: float = 0.3, chunk_delay: float = 0.01) -> dict:
+    """
+    One candidate applying to `jobs` postings: generate_cv per posting vs build_profile once
+    plus tailor_cv per posting. Tokens are estimates; the fake server spends `chunk_delay` per
+    answer word, so latency follows answer length.
+    """
+    from caching import DiskCache, TieredCache
+    from llm_agent import CV_COMPLETION_TOKENS, LLMAgent
+    from rate_limiting import RetryPolicy, estimate_tokens
+
+    resume, linkedin = make_profile_texts()
+    rng = random.Random(4)
+    postings = [f"Posting {i}: " + " ".join(rng.choices(_WORDS, k=80)) for i in range(jobs)]
+    with _fake_llm("ats_profile_", latency=latency, chunk_delay=chunk_delay) as (tmp, key_file, server):
+        agent = LLMAgent(key_file, base_url=server.base_url, retry=RetryPolicy(None),
+                         cache=TieredCache(DiskCache(os.path.join(tmp, "cache.sqlite3"))))
+
+        full_tokens, full_s = [], []
+        for jd in postings:
+            start = time.perf_counter()
+            cv = agent.generate_cv(resume, linkedin, jd, bypass_cache=True)
+            full_s.append(time.perf_counter() - start)
+            prompt_tokens = agent._input_tokens(agent._build_input(resume, linkedin, jd)) - CV_COMPLETION_TOKENS
+            full_tokens.append(prompt_tokens + estimate_tokens(json.dumps(cv)))
+
+        start = time.perf_counter()
+        profile = agent.build_profile(resume, linkedin, bypass_cache=True)
+        profile_s = time.perf_counter() - start
+        report = agent.last_profile_report
+        profile_tokens = report["input_tokens"] + report["output_tokens"]
+        tailor_tokens, tailor_s = [], []
+        for jd in postings:
+            start = time.perf_counter()
+            cv = agent.tailor_cv(profile, jd, bypass_cache=True)
+            tailor_s.append(time.perf_counter() - start)
+            if "error" in cv.get("name", "").lower():
+                raise AssertionError(f"Tailoring failed: {cv['summary']}")
+            report = agent.last_tailoring_report
+            tailor_tokens.append(report["input_tokens"] + report["output_tokens"])
+
+    return {
+        "jobs": jobs,
+        "generate_tokens_per_job": round(sum(full_tokens) / jobs),
+        "generate_s_per_job": round(sum(full_s) / jobs, 2),
+        "first_job_tokens": profile_tokens + tailor_tokens[0],
+        "first_job_s": round(profile_s + tailor_s[0], 2),
+        "nth_job_tokens": round(sum(tailor_tokens[1:]) / max(jobs - 1, 1)),
+        "nth_job_s": round(sum(tailor_s[1:]) / max(jobs - 1, 1), 2),
+        "total_tokens_saved_pct": round(100 * (1 - (profile_tokens + sum(tailor_tokens)) / sum(full_tokens)), 1),
+    }
+
+
+# -----------------------
+# Structured output repair
+# -----------------------
+def _legacy_parse(raw: str, clean: dict) -> str:
+    """What a plain JsonOutputParser + model_validate makes of `raw`."""
+    from langchain_core.exceptions import OutputParserException
+    from langchain_core.output_parsers import JsonOutputParser
+    from pydantic import ValidationError
+    from structured_output import StructuredOutput
+
+    try:
+        parsed = StructuredOutput.model_validate(JsonOutputParser().parse(raw)).model_dump()
+    except (OutputParserException, ValidationError, ValueError) as e:
+        return f"failed ({type(e).__name__}), full retry"
+    lost = [k for k, v in clean.items() if v and not parsed.get(k)]
+    return f"silently lost {', '.join(lost)}" if lost else "ok"
+
+
+def bench_json_repair(latency: float = 0.3, chunk_delay: float = 0.01) -> list:
+    """
+    generate_cv against a fake server damaging its answers in each of the ways in
+    fake_llm_server.MALFORMATIONS. For each: what the old JsonOutputParser chain would have
+    done with the same text, and the sections the streaming parser repaired or re-requested.
+    The clean row also shows how soon the first section reaches on_section.
+    """
+    from caching import DiskCache, TieredCache
+    from fake_llm_server import MALFORMATIONS, malform
+    from llm_agent import LLMAgent
+    from rate_limiting import RetryPolicy
+
+    resume, linkedin = make_profile_texts()
+    posting = "Senior platform manager: " + " ".join(random.Random(2).choices(_WORDS, k=80))
+    rows = []
+    # malformed_every=1 damages the answers in MALFORMATIONS order; follow-ups stay clean
+    for malformed_every, kinds in ((0, ["clean"]), (1, MALFORMATIONS)):
+        with _fake_llm("ats_repair_", latency=latency, chunk_delay=chunk_delay,
+                       malformed_every=malformed_every) as (tmp, key_file, server):
+            agent = LLMAgent(key_file, base_url=server.base_url, retry=RetryPolicy(None),
+                             cache=TieredCache(DiskCache(os.path.join(tmp, "cache.sqlite3"))))
+            for kind in kinds:
+                arrivals = []
+                start = time.perf_counter()
+                cv = agent.generate_cv(resume, linkedin, posting, bypass_cache=True,
+                                       on_section=lambda key, value: arrivals.append(time.perf_counter()))
+                elapsed = time.perf_counter() - start
+                if "error" in cv["name"].lower():
+                    raise AssertionError(f"{kind}: generation failed: {cv['summary']}")
+                if kind == "clean":
+                    clean, clean_s = cv, elapsed
+                report = agent.last_parse_report
+                legacy = "ok" if kind == "clean" else _legacy_parse(malform(json.dumps(clean), kind), clean)
+                rows.append({
+                    "answer": kind,
+                    "legacy": legacy,
+                    "latency_ms": round(1000 * elapsed, 1),
+                    # A failed legacy parse costs one more full generation on top of the first
+                    "legacy_ms": round(1000 * (elapsed + clean_s if legacy.startswith("failed") else elapsed), 1),
+                    "first_section_ms": round(1000 * (arrivals[0] - start), 1) if arrivals else None,
+                    "repaired": report["repaired"],
+                    "re_requested": report["re_requested"],
+                    "unresolved": report["unresolved"],
+                    "experience_entries": len(cv["experience"]),
+                })
+    return rows
+
+
+# -----------------------
+# Keyword matching
+# -----------------------
+def make_keywords(count: int, seed: int = 5) -> list:
+    """
+    `count` distinct keywords: short ones like "c" and "go" that substrings false-match, a few
+    of the filler words, then tool-like words and two-word phrases.
+    """
+    rng = random.Random(seed)
+    keywords = ["c", "r", "go", "pe", "ai", "c++", "c#", "python", "agile", "jira", "scrum"]
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    while len(set(keywords)) < count:
+        word = "".join(rng.choices(letters, k=rng.randint(3, 9)))
+        keywords.append(word if rng.random() < 0.7 else f"{word} {rng.choice(_WORDS)}")
+    return list(dict.fromkeys(keywords))[:count]
+
+
+def bench_keyword_match(keyword_counts=(50, 200, 800), bullets: int = 5000) -> list:
+    """
+    ResumeOptimizer.score_relevance over `bullets` achievement lines: the old substring loop
+    over every keyword vs one KeywordMatcher scan. Hits are (bullet, keyword) pairs; the
+    difference is substring false positives such as "c" inside "scrum".
+    """
+    from keyword_matching import KeywordMatcher
+
+    rng = random.Random(6)
+    rows = []
+    for count in keyword_counts:
+        keywords = make_keywords(count)
+        texts = []
+        for _ in range(bullets):
+            words = rng.choices(_WORDS, k=rng.randint(10, 18)) + rng.choices(keywords, k=2)
+            rng.shuffle(words)
+            texts.append(" ".join(words).capitalize() + f", {rng.randint(5, 40)}% faster.")
+
+        start = time.perf_counter()
+        legacy_hits = 0
+        for text in texts:
+            text_lower = text.lower()
+            legacy_hits += sum(1 for keyword in keywords if keyword.lower() in text_lower)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        compile_s = time.perf_counter() - start
+        matcher_hits = sum(len(matcher.find(text)) for text in texts)
+        matcher_s = time.perf_counter() - start
+
+        rows.append({
+            "keywords": count,
+            "bullets": bullets,
+            "legacy_ms": round(1000 * legacy_s, 1),
+            "matcher_ms": round(1000 * matcher_s, 1),
+            "compile_ms": round(1000 * compile_s, 2),
+            "speedup": round(legacy_s / matcher_s, 1),
+            "legacy_hits": legacy_hits,
+            "matcher_hits": matcher_hits,
+        })
+    return rows
+
+
+# -----------------------
+# Bullet scoring
+# -----------------------
+def _per_bullet_experience(optimizer, experience: list, keywords) -> list:
+    """optimize_experience's ranking as it was: score_relevance and bonuses per bullet, then sort."""
+    from resume_optimizer import IMPACT_WORDS
+
+    ranked = []
+    for i, exp in enumerate(experience):
+        role_text = f"{exp.get('role', '')} {exp.get('company', '')} {' '.join(exp.get('achievements', []))}"
+        relevance = optimizer.score_relevance(role_text, keywords)
+        scored = []
+        for achievement in exp.get("achievements", []):
+            score = optimizer.score_relevance(achievement, keywords)
+            if any(ch.isdigit() for ch in achievement):
+                score += 0.3
+            if IMPACT_WORDS.contains_any(achievement):
+                score += 0.2
+            scored.append((achievement, score))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        keep = 5 if i < 2 else 4 if relevance > 0.3 else 3
+        ranked.append(dict(exp, achievements=[a for a, _ in scored[:min(keep, len(scored))]]))
+    return ranked
+
+
+def bench_bullet_scoring(roles: int = 40, bullets: int = 12, postings: int = 50) -> dict:
+    """
+    optimize_experience for one large resume against `postings` job descriptions: the old
+    per-bullet loop vs the BulletMatrix scores (built on the first posting, reused after) with
+    argpartition top-k. Fails if any ranking differs.
+    """
+    from job_keywords import JobKeywordIndex
+    from keyword_matching import keyword_matcher
+    from resume_optimizer import ResumeOptimizer
+
+    rng = random.Random(8)
+    vocabulary = _WORDS + ["python", "jira", "smartsheet", "c++", "ms project", "git", "team", "kanban"]
+
+    def sentence(n):
+        return " ".join(rng.choices(vocabulary, k=n)).capitalize()
+
+    experience = [
+        {"role": f"Manager {i}", "company": f"Company {i}",
+         "achievements": [sentence(rng.randint(8, 16)) + (f", {rng.randint(5, 90)}%" if rng.random() < 0.4 else "")
+                          for _ in range(bullets)]}
+        for i in range(roles)
+    ]
+    descriptions = [sentence(60) for _ in range(postings)]
+    with tempfile.TemporaryDirectory(prefix="ats_index_") as tmp:
+        index = JobKeywordIndex(pathlib.Path(tmp))
+        index.add_many(enumerate(descriptions))
+        optimizer = ResumeOptimizer(job_index=index)
+        jobs = [keyword_matcher(optimizer.extract_job_keywords(d)) for d in descriptions]
+
+    start = time.perf_counter()
+    legacy = [_per_bullet_experience(optimizer, experience, keywords) for keywords in jobs]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = optimizer.optimize_experience(experience, jobs[0])
+    first_s = time.perf_counter() - start
+    vectorized = [first] + [optimizer.optimize_experience(experience, keywords) for keywords in jobs[1:]]
+    vectorized_s = time.perf_counter() - start
+    if vectorized != legacy:
+        raise AssertionError("Vectorized ranking differs from the per-bullet loop")
+
+    return {
+        "bullets": roles * bullets,
+        "postings": postings,
+        "legacy_ms_per_posting": round(1000 * legacy_s / postings, 2),
+        "vectorized_first_ms": round(1000 * first_s, 2),
+        "vectorized_ms_per_posting": round(1000 * (vectorized_s - first_s) / max(postings - 1, 1), 2),
+        "speedup": round(legacy_s / vectorized_s, 1),
+        "identical": True,
+    }
+
+
+# -----------------------
+# Job keyword index
+# -----------------------
+def make_job_postings(count: int, seed: int = 9) -> list:
+    """
+    `count` synthetic job descriptions over a few thousand invented terms drawn with Zipf-like
+    frequencies, so a handful of words are in every posting and most are rare.
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = list(dict.fromkeys(_WORDS + ["".join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(5000)]))
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    postings = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, weights, k=rng.randint(120, 260))
+        sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+        postings.append(" ".join(sentences))
+    return postings
+
+
+def bench_job_keywords(postings: int = 20000, adds: int = 200, batch: int = 500) -> dict:
+    """
+    BM25 keyword extraction against an index of `postings` stored descriptions: seeding it in
+    batches, then `adds` single create_new_job-style appends (vs recounting every posting once,
+    what a rebuild per new job would cost), extraction latency, compaction, and a reload from
+    disk by a fresh process' index, which must agree exactly.
+    """
+    from job_keywords import JobKeywordIndex, job_terms
+
+    texts = make_job_postings(postings + adds)
+    with tempfile.TemporaryDirectory(prefix="ats_index_") as tmp:
+        index = JobKeywordIndex(pathlib.Path(tmp))
+        start = time.perf_counter()
+        for first in range(0, postings, batch):
+            index.add_many((i, texts[i]) for i in range(first, min(first + batch, postings)))
+        seed_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = Counter()
+        for terms, _ in map(job_terms, texts[:postings]):
+            df.update(terms.keys())
+        rebuild_s = time.perf_counter() - start
+
+        add_samples = []
+        for i in range(postings, postings + adds):
+            start = time.perf_counter()
+            index.add(i, texts[i])
+            add_samples.append(time.perf_counter() - start)
+
+        extract_samples = []
+        for text in texts[-adds:]:
+            start = time.perf_counter()
+            index.keywords(text)
+            extract_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reloaded = JobKeywordIndex(pathlib.Path(tmp))
+        reloaded.keywords("")
+        load_s = time.perf_counter() - start
+        consistent = reloaded.df == index.df and reloaded.docs == index.docs == postings + adds
+
+        start = time.perf_counter()
+        index.compact()
+        compact_s = time.perf_counter() - start
+        compacted = JobKeywordIndex(pathlib.Path(tmp))
+        consistent = consistent and all(
+            compacted.keywords(text) == index.keywords(text) for text in texts[-20:]
+        )
+        log_bytes = sum(p.stat().st_size for p in pathlib.Path(tmp).glob("updates.*.jsonl"))
+        snapshot_bytes = index.snapshot_path.stat().st_size
+
+    if not consistent:
+        raise AssertionError("Reloaded keyword index differs from the one that was built")
+    return {
+        "postings": postings + adds,
+        "terms": len(index.df),
+        "seed_postings_per_sec": round(postings / seed_s),
+        "add": _percentiles(add_samples),
+        "rebuild_ms": round(1000 * rebuild_s, 1),
+        "extract": _percentiles(extract_samples),
+        "load_ms": round(1000 * load_s, 1),
+        "compact_ms": round(1000 * compact_s, 1),
+        "snapshot_kb": round(snapshot_bytes / 1024),
+        "log_kb_after_compact": round(log_bytes / 1024),
+        "consistent": True,
+    }
+
+
+# -----------------------
+# Source sentence index
+# -----------------------
+def _legacy_enhance(experience: list, resume_text: str, linkedin_text: str) -> list:
+    """enhance_achievements_from_source as it was: every role re-splits and scans the whole source."""
+    import re
+    from resume_optimizer import ACHIEVEMENT_INDICATORS
+
+    enhanced = []
+    source_text = f"{resume_text} {linkedin_text}".lower()
+    for exp in experience:
+        exp = dict(exp)
+        achievements = exp.get("achievements", [])
+        if len(achievements) < 3:
+            role, company = exp.get("role", "").lower(), exp.get("company", "").lower()
+            additional = []
+            for sentence in re.split(r"[.!?]", source_text):
+                sentence = sentence.strip()
+                if 20 < len(sentence) < 150 and ((role and role in sentence) or (company and company in sentence)):
+                    if ACHIEVEMENT_INDICATORS.contains_any(sentence):
+                        clean = sentence.strip(" -•*")
+                        if clean and clean not in achievements:
+                            additional.append(clean.capitalize())
+            for bullet in additional[:2]:
+                if len(achievements) < 5:
+                    achievements.append(bullet)
+            exp["achievements"] = achievements
+        enhanced.append(exp)
+    return enhanced
+
+
+def bench_source_index(roles: int = 30, bullets: int = 40, repeat: int = 20) -> dict:
+    """
+    enhance_achievements_from_source for a long career (`roles` roles, `bullets` sentences each
+    in the source documents, one bullet per role in the CV): the old whole-text scan per role vs
+    the sentence index, built once and reloaded from its stored form. Fails if any bullet differs.
+    """
+    import copy
+    from resume_optimizer import ACHIEVEMENT_INDICATORS, ResumeOptimizer
+    from source_index import SourceSentenceIndex
+
+    rng = random.Random(12)
+    verbs = ["led", "managed", "delivered", "increased", "reduced", "built", "supported", "attended"]
+
+    def sentence(n):
+        return " ".join(rng.choices(_WORDS, k=n))
+
+    lines, experience = [], []
+    for i in range(roles):
+        role, company = f"Program Manager {i}", f"Northwind {i} Ltd"
+        lines += [f"{role}, {company}"]
+        for _ in range(bullets):
+            mention = rng.choice(["", f" at {company}", f" as {role.lower()}"])
+            lines.append(f"• {rng.choice(verbs).capitalize()} {sentence(rng.randint(3, 14))}{mention}.")
+        experience.append({"role": role, "company": company, "achievements": [sentence(8)]})
+    resume, linkedin = "\n".join(lines[: len(lines) // 2]), "\n".join(lines[len(lines) // 2:])
+    optimizer = ResumeOptimizer()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy = _legacy_enhance(copy.deepcopy(experience), resume, linkedin)
+    legacy_s = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    built = SourceSentenceIndex.build(resume, linkedin, ACHIEVEMENT_INDICATORS)
+    build_s = time.perf_counter() - start
+    stored = json.dumps(built.to_dict())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        index = SourceSentenceIndex.from_dict(json.loads(stored))
+        indexed = optimizer.enhance_achievements_from_source(copy.deepcopy(experience), resume, linkedin, index)
+    indexed_s = (time.perf_counter() - start) / repeat
+    if indexed != legacy:
+        raise AssertionError("Indexed enrichment differs from the whole-text scan")
+
+    return {
+        "roles": roles,
+        "source_kb": round(len(resume + linkedin) / 1024),
+        "sentences": len(built.sentences),
+        "legacy_ms": round(1000 * legacy_s, 2),
+        "build_ms": round(1000 * build_s, 2),
+        "stored_kb": round(len(stored) / 1024),
+        "indexed_ms": round(1000 * indexed_s, 2),
+        "speedup": round(legacy_s / indexed_s, 1),
+        "bullets_added": sum(len(e["achievements"]) for e in indexed) - roles,
+        "identical": True,
+    }
+
+
+# -----------------------
+# Skill taxonomy
+# -----------------------
+_LEGACY_SKILL_LISTS = {
+    "always": ['agile project management', 'jira', 'airtable', 'google workspace', 'microsoft office'],
+    "removed": ['adobe creative cloud', 'unity', 'unreal engine', 'miro', 'photoshop', 'illustrator', 'after effects'],
+    "priority": ['smartsheet', 'ms project', 'microsoft project', 'atlassian', 'jira', 'confluence',
+                 'python', 'c++', 'javascript', 'git', 'github', 'agile', 'scrum',
+                 'project management', 'google workspace', 'microsoft office', 'excel', 'airtable'],
+    "office": ['slack', 'teams', 'office', 'workspace', 'excel'],
+}
+
+
+def _legacy_optimize_skills(skills: list, job_keywords) -> list:
+    """optimize_skills as it was: hard-coded lists, dedupe by lowercase text only."""
+    from keyword_matching import keyword_matcher
+
+    lists = {name: keyword_matcher(words) for name, words in _LEGACY_SKILL_LISTS.items()}
+    job_matcher = keyword_matcher(job_keywords)
+    kept = []
+    for skill in skills:
+        if not skill or lists["removed"].contains_any(skill):
+            continue
+        if (lists["always"].contains_any(skill) or lists["priority"].contains_any(skill)
+                or job_matcher.contains_any(skill) or lists["office"].contains_any(skill)):
+            kept.append(skill)
+    seen = set()
+    return [s for s in kept if not (s.lower() in seen or seen.add(s.lower()))][:12]
+
+
+def bench_skill_taxonomy(skills: int = 40, resumes: int = 2000) -> dict:
+    """
+    Loading skill_taxonomy.yaml cold (parse + compile) vs from its compiled cache, then
+    optimize_skills over `resumes` skill lists of `skills` entries written with random synonyms
+    and spellings: the old hard-coded lists vs the taxonomy. Counts the entries left that name
+    the same canonical skill twice ("MS Project" and "MSProject").
+    """
+    from skill_taxonomy import TAXONOMY_FILE, compile_taxonomy, load_taxonomy
+    from resume_optimizer import ResumeOptimizer
+
+    with tempfile.TemporaryDirectory(prefix="ats_taxonomy_") as tmp:
+        start = time.perf_counter()
+        compile_taxonomy(TAXONOMY_FILE.read_text(encoding="utf-8"))
+        compile_s = time.perf_counter() - start
+        load_taxonomy(cache_dir=tmp)
+        start = time.perf_counter()
+        taxonomy = load_taxonomy(cache_dir=tmp)
+        load_s = time.perf_counter() - start
+
+    rng = random.Random(13)
+    spellings = []
+    for skill_id in taxonomy.ids:
+        names = [taxonomy.display_name(skill_id)] + [k for k, i in taxonomy._phrases.items() if i == skill_id]
+        spellings.append([rng.choice([n, n.upper(), n.replace(" ", "-"), n.replace(" ", "")]) for n in names])
+    other = [f"{w.capitalize()} {rng.choice(['Analysis', 'Planning', 'Reporting'])}" for w in _WORDS]
+    lists = [
+        [rng.choice(rng.choice(spellings)) if rng.random() < 0.7 else rng.choice(other) for _ in range(skills)]
+        for _ in range(resumes)
+    ]
+    keywords = ["sql", "tableau", "budget", "reporting", "figma"]
+    optimizer = ResumeOptimizer(taxonomy=taxonomy)
+
+    def duplicates(kept):
+        ids = [taxonomy.resolve(s) for s in kept]
+        return sum(1 for i in ids if i) - len({i for i in ids if i})
+
+    start = time.perf_counter()
+    legacy = [_legacy_optimize_skills(s, keywords) for s in lists]
+    legacy_s = time.perf_counter() - start
+    start = time.perf_counter()
+    family = taxonomy.families[taxonomy.default_family]
+    new = [optimizer.optimize_skills(s, keywords, family) for s in lists]
+    new_s = time.perf_counter() - start
+
+    return {
+        "skills": len(taxonomy.ids),
+        "names": len(taxonomy.lookup),
+        "compile_ms": round(1000 * compile_s, 2),
+        "cached_load_ms": round(1000 * load_s, 2),
+        "legacy_us_per_resume": round(1e6 * legacy_s / resumes, 1),
+        "taxonomy_us_per_resume": round(1e6 * new_s / resumes, 1),
+        "legacy_duplicate_skills": sum(map(duplicates, legacy)),
+        "taxonomy_duplicate_skills": sum(map(duplicates, new)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("stress-jobs", help="Parallel create_new_job calls; fails if any job is lost")
+    p.add_argument("--procs", type=int, default=8)
+    p.add_argument("--jobs-per-proc", type=int, default=50)
+    p.add_argument("--backend", default="json", choices=["json", "sqlite"])
+
+    p = sub.add_parser("pdf-engines", help="Compare PDF text extraction engines on a generated corpus")
+    p.add_argument("--docs", type=int, default=10)
+    p.add_argument("--pages", type=int, default=8)
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("llm-batch", help="Sequential vs concurrent CV generation against a fake LLM server")
+    p.add_argument("--jobs", type=int, default=30)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--latency", type=float, default=0.5, help="Fake server response time in seconds")
+    p.add_argument("--failures", type=int, default=1, help="Postings answered with HTTP 500")
+
+    p = sub.add_parser("chat-stream", help="Time to first visible text: blocking vs streamed chat answers")
+    p.add_argument("--latency", type=float, default=0.4, help="Fake server delay before the first chunk")
+    p.add_argument("--chunk-delay", type=float, default=0.03)
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("llm-setup", help="Per-request agent setup cost: fresh clients vs the shared registry")
+    p.add_argument("--requests", type=int, default=50)
+
+    p = sub.add_parser("rate-limit", help="Batch generation against a 429-injecting server, with/without the limiter")
+    p.add_argument("--jobs", type=int, default=30)
+    p.add_argument("--server-rpm", type=int, default=10, help="Requests the fake server admits per window")
+    p.add_argument("--window", type=float, default=2.0, help="Rate limit window in seconds")
+    p.add_argument("--concurrency", type=int, default=8)
+
+    p = sub.add_parser("prompt-compaction", help="Token savings of compacting overlapping resume + LinkedIn text")
+    p.add_argument("--roles", type=int, default=6)
+    p.add_argument("--bullets", type=int, default=5)
+    p.add_argument("--budget", type=int, default=6000, help="Token budget for both sources")
+
+    p = sub.add_parser("chat-memory", help="Prompt tokens per chat turn: CV repr per message vs ConversationMemory")
+    p.add_argument("--turns", type=int, default=40)
+    p.add_argument("--budget", type=int, default=3000)
+
+    p = sub.add_parser("pipeline", help="End-to-end latency per stage, replaying recorded LLM answers offline")
+    p.add_argument("--jobs", type=int, default=20)
+    p.add_argument("--latency", type=float, default=1.0, help="Synthetic model time per replayed call")
+    p.add_argument("--no-pdf", action="store_true", help="Skip WeasyPrint (needs Pango/Cairo)")
+
+    p = sub.add_parser("section-regen", help="Tokens and latency: whole-CV generation vs one section or entry")
+    p.add_argument("--latency", type=float, default=0.3, help="Fake server delay before answering")
+    p.add_argument("--chunk-delay", type=float, default=0.01, help="Fake server seconds per answer word")
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("profile-tailor", help="Per-job cost: full generation vs parse-once profile + tailoring")
+    p.add_argument("--jobs", type=int, default=10)
+    p.add_argument("--latency", type=float, default=0.3, help="Fake server delay before answering")
+    p.add_argument("--chunk-delay", type=float, default=0.01, help="Fake server seconds per answer word")
+
+    p = sub.add_parser("json-repair", help="Malformed LLM JSON: legacy parser outcome vs local repair + re-request")
+    p.add_argument("--latency", type=float, default=0.3, help="Fake server delay before answering")
+    p.add_argument("--chunk-delay", type=float, default=0.01, help="Fake server seconds per answer word")
+
+    p = sub.add_parser("keyword-match", help="Keyword scoring: substring loop vs one compiled KeywordMatcher scan")
+    p.add_argument("--keywords", type=int, nargs="+", default=[50, 200, 800], help="Keyword list sizes to try")
+    p.add_argument("--bullets", type=int, default=5000)
+
+    p = sub.add_parser("bullet-scoring", help="Re-ranking one large resume for many postings: per-bullet loop vs arrays")
+    p.add_argument("--roles", type=int, default=40)
+    p.add_argument("--bullets", type=int, default=12, help="Achievements per role")
+    p.add_argument("--postings", type=int, default=50)
+
+    p = sub.add_parser("job-keywords", help="BM25 job keyword index: incremental adds, extraction latency, reload")
+    p.add_argument("--postings", type=int, default=20000, help="Stored descriptions to seed the index with")
+    p.add_argument("--adds", type=int, default=200, help="Single postings added and extracted afterwards")
+
+    p = sub.add_parser("source-index", help="Bullet enrichment from source docs: whole-text scan per role vs sentence index")
+    p.add_argument("--roles", type=int, default=30)
+    p.add_argument("--bullets", type=int, default=40, help="Source sentences per role")
+    p.add_argument("--repeat", type=int, default=20)
+
+    p = sub.add_parser("skill-taxonomy", help="Skill filtering: hard-coded lists vs the compiled, cached YAML taxonomy")
+    p.add_argument("--skills", type=int, default=40, help="Skills per resume")
+    p.add_argument("--resumes", type=int, default=2000)
+
+    args = parser.parse_args()
+    if args.cmd == "stress-jobs":
+        print(stress_jobs(args.procs, args.jobs_per_proc, args.backend))
+    elif args.cmd == "pdf-engines":
+        for row in bench_pdf_engines(args.docs, args.pages, args.repeat):
+            print(row)
+    elif args.cmd == "llm-batch":
+        print(bench_llm_batch(args.jobs, args.concurrency, args.latency, args.failures))
+    elif args.cmd == "chat-stream":
+        print(bench_chat_stream(args.latency, args.chunk_delay, args.repeat))
+    elif args.cmd == "llm-setup":
+        print(bench_llm_setup(args.requests))
+    elif args.cmd == "rate-limit":
+        for row in bench_rate_limit(args.jobs, args.server_rpm, args.window, args.concurrency):
+            print(row)
+    elif args.cmd == "prompt-compaction":
+        print(bench_prompt_compaction(args.roles, args.bullets, args.budget))
+    elif args.cmd == "chat-memory":
+        for row in bench_chat_memory(args.turns, args.budget):
+            print(row)
+    elif args.cmd == "pipeline":
+        print(bench_pipeline(args.jobs, args.latency, not args.no_pdf))
+    elif args.cmd == "section-regen":
+        for row in bench_section_regen(args.latency, args.chunk_delay, args.repeat):
+            print(row)
+    elif args.cmd == "profile-tailor":
+        print(bench_profile_tailor(args.jobs, args.latency, args.chunk_delay))
+    elif args.cmd == "json-repair":
+        for row in bench_json_repair(args.latency, args.chunk_delay):
+            print(row)
+    elif args.cmd == "keyword-match":
+        for row in bench_keyword_match(args.keywords, args.bullets):
+            print(row)
+    elif args.cmd == "bullet-scoring":
+        print(bench_bullet_scoring(args.roles, args.bullets, args.postings))
+    elif args.cmd == "job-keywords":
+        print(bench_job_keywords(args.postings, args.adds))
+    elif args.cmd == "source-index":
+        print(bench_source_index(args.roles, args.bullets, args.repeat))
+    elif args.cmd == "skill-taxonomy":
+        print(bench_skill_taxonomy(args.skills, args.resumes))
+
+
+if __name__ == "__main__":
+    main()
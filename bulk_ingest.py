@@ -0,0 +1,146 @@
+"""
+Headless bulk user creation.
+
+    python bulk_ingest.py cohort/                # <user_id>_resume.pdf + <user_id>_linkedin.pdf pairs
+    python bulk_ingest.py cohort/manifest.csv    # columns: user_id,name,resume,linkedin[,website,github]
+
+Text is extracted across a process pool and users are written to the configured
+file_management store in batches. Per-file failures are reported without stopping the run.
+"""
+import argparse
+import concurrent.futures
+import csv
+import json
+import multiprocessing
+import os
+import pathlib
+import re
+import time
+
+import file_management
+
+PAIR_RE = re.compile(r"^(?P<uid>\d+)_(?P<kind>resume|linkedin)\.pdf$", re.IGNORECASE)
+
+
+def load_entries(source) -> list:
+    """Entries from a manifest (.csv / .json / .jsonl) or from <user_id>_resume/_linkedin.pdf pairs in a directory."""
+    source = pathlib.Path(source)
+    if source.is_dir():
+        pairs = {}
+        for path in sorted(source.iterdir()):
+            match = PAIR_RE.match(path.name)
+            if match:
+                pairs.setdefault(match["uid"], {})[match["kind"].lower()] = str(path)
+        return [
+            {"user_id": uid, "name": f"User {uid}", "resume": files.get("resume"), "linkedin": files.get("linkedin")}
+            for uid, files in pairs.items()
+        ]
+
+    if source.suffix.lower() == ".csv":
+        with open(source, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    elif source.suffix.lower() == ".jsonl":
+        with open(source, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(source, encoding="utf-8") as f:
+            rows = json.load(f)
+
+    # Relative PDF paths are relative to the manifest
+    for row in rows:
+        for key in ("resume", "linkedin"):
+            if row.get(key) and not os.path.isabs(row[key]):
+                row[key] = str(source.parent / row[key])
+    return rows
+
+
+def _init_worker(pdf_workers):
+    """Pool initializer: limits page-level PDF parallelism inside this worker process only."""
+    import pdf_extraction
+    pdf_extraction.MAX_WORKERS = pdf_workers
+
+
+def _extract_entry(entry):
+    """Worker: returns (entry, record or None, error or None)."""
+    try:
+        uid = int(entry["user_id"])
+        if not entry.get("resume") or not entry.get("linkedin"):
+            raise ValueError("both resume and linkedin PDFs are required")
+        record = {
+            "user_id": uid,
+            "name": (entry.get("name") or f"User {uid}").strip(),
+            "resume_text": file_management.extract_text_from_pdf(entry["resume"]),
+            "linkedin_text": file_management.extract_text_from_pdf(entry["linkedin"]),
+            "website": entry.get("website") or "",
+            "github": entry.get("github") or "",
+        }
+        return entry, record, None
+    except Exception as e:
+        return entry, None, f"{type(e).__name__}: {e}"
+
+
+def ingest(entries, workers=None, batch_size=100) -> dict:
+    start = time.perf_counter()
+    existing = {uid for uid, _ in file_management.get_all_users()}
+    report = {"total": len(entries), "created": 0, "skipped": 0, "failed": []}
+
+    pending, seen = [], set()
+    for entry in entries:
+        try:
+            uid = int(entry.get("user_id"))
+        except (TypeError, ValueError):
+            report["failed"].append({"user_id": entry.get("user_id"), "error": "user_id must be numeric"})
+            continue
+        if uid in existing or uid in seen:
+            report["skipped"] += 1
+            continue
+        seen.add(uid)
+        pending.append(entry)
+
+    batch = []
+
+    def flush():
+        if batch:
+            created = file_management.create_users_batch(batch)
+            report["created"] += sum(created)
+            report["skipped"] += len(created) - sum(created)
+            batch.clear()
+
+    # Workers already run in parallel; keep each one from fanning out page-level processes too
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(1,)
+    ) as pool:
+        for entry, record, error in pool.map(_extract_entry, pending, chunksize=4):
+            if error:
+                report["failed"].append({"user_id": entry.get("user_id"), "error": error})
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+
+    elapsed = time.perf_counter() - start
+    report["seconds"] = round(elapsed, 2)
+    report["users_per_sec"] = round(report["created"] / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of PDF pairs or a .csv/.json/.jsonl manifest")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Users per store write")
+    args = parser.parse_args()
+
+    report = ingest(load_entries(args.source), workers=args.workers, batch_size=args.batch_size)
+    for failure in report["failed"]:
+        print(f"FAILED user {failure['user_id']}: {failure['error']}")
+    print(
+        f"{report['created']} created, {report['skipped']} skipped, {len(report['failed'])} failed "
+        f"of {report['total']} in {report['seconds']}s ({report['users_per_sec']} users/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
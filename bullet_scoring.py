@@ -0,0 +1,89 @@
+"""
+Array scoring of resume bullets for ResumeOptimizer.
+
+A BulletMatrix holds every achievement of a resume once, with the per-bullet features that do
+not depend on the job (numbers, impact words) computed up front. Keyword hits are kept as one
+boolean column per keyword; a column is computed the first time any posting asks for that
+keyword and reused by every later posting, so re-optimizing the same resume for many jobs
+mostly costs array arithmetic.
+"""
+import functools
+
+import numpy as np
+
+from keyword_matching import KeywordMatcher, keyword_matcher
+
+QUANTIFIED_BONUS = 0.3
+IMPACT_BONUS = 0.2
+
+
+class BulletMatrix:
+    def __init__(self, texts, impact_words: KeywordMatcher):
+        self.texts = list(dict.fromkeys(texts))
+        self.rows = {text: row for row, text in enumerate(self.texts)}
+        self.quantified = np.fromiter((any(ch.isdigit() for ch in t) for t in self.texts), bool, len(self.texts))
+        self.impact = np.fromiter((impact_words.contains_any(t) for t in self.texts), bool, len(self.texts))
+        self._columns = {}  # keyword -> bool array over self.texts
+
+    def __len__(self):
+        return len(self.texts)
+
+    def row_indexes(self, texts) -> np.ndarray:
+        return np.fromiter((self.rows[t] for t in texts), np.intp, len(texts))
+
+    def hits(self, keywords) -> np.ndarray:
+        """Bullets x keywords, True where the keyword occurs in the bullet as a whole word."""
+        matcher = keyword_matcher(keywords)
+        missing = [k for k in matcher.keywords if k not in self._columns]
+        if missing:
+            # One scan per bullet for all the new keywords together
+            found = [keyword_matcher(missing).find(t) for t in self.texts]
+            for keyword in missing:
+                self._columns[keyword] = np.fromiter((keyword in f for f in found), bool, len(self.texts))
+        if not matcher.keywords:
+            return np.zeros((len(self.texts), 0), bool)
+        return np.column_stack([self._columns[k] for k in matcher.keywords])
+
+    def relevance(self, keywords) -> np.ndarray:
+        """ResumeOptimizer.score_relevance of every bullet: share of the keywords it contains."""
+        count = len(keyword_matcher(keywords))
+        if not count or not self.texts:
+            return np.zeros(len(self.texts))
+        return np.count_nonzero(self.hits(keywords), axis=1) / count
+
+    def scores(self, keywords, bonuses: bool = True) -> np.ndarray:
+        """Relevance plus, with `bonuses`, the quantified and impact-word bonuses optimize_experience adds."""
+        scores = self.relevance(keywords)
+        if bonuses:
+            # Added in the same order as the per-bullet loop did, so the floats are identical
+            scores = scores + QUANTIFIED_BONUS * self.quantified
+            scores = scores + IMPACT_BONUS * self.impact
+        return scores
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_matrix(texts: tuple, impact_words: KeywordMatcher) -> BulletMatrix:
+    return BulletMatrix(texts, impact_words)
+
+
+def bullet_matrix(texts, impact_words: KeywordMatcher) -> BulletMatrix:
+    """The matrix for these bullets; the same resume optimized again reuses it and its columns."""
+    return _cached_matrix(tuple(dict.fromkeys(texts)), impact_words)
+
+
+def top_k(scores: np.ndarray, k: int, stable: bool = False) -> np.ndarray:
+    """
+    Positions of the `k` highest scores, best first, ties in input order: the same as Python's
+    sort(reverse=True)[:k]. `stable` sorts the whole array, the reference the argpartition
+    path is checked against; otherwise only the k-th score is found, in linear time.
+    """
+    if k <= 0 or not len(scores):
+        return np.zeros(0, np.intp)
+    if stable or k >= len(scores):
+        return np.argsort(-scores, kind="stable")[:k]
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    # Of the bullets tied at the cut-off, the earliest ones are kept, as a stable sort would
+    tied = np.flatnonzero(scores == kth)[:k - len(above)]
+    chosen = np.concatenate([above, tied])
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
@@ -0,0 +1,171 @@
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU map with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._data)}
+
+
+class DiskCache:
+    """
+    Persistent key -> JSON value store in SQLite with a time-to-live and a total size cap.
+    Expired entries are dropped on read; least-recently-used entries are evicted on write.
+    """
+
+    def __init__(self, path, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_idx ON entries (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None):
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        now = time.time()
+        with conn:
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return default
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        payload = json.dumps(value)
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                # Drop least-recently-used rows until the cache fits again
+                for old_key, size in conn.execute(
+                    "SELECT key, size FROM entries ORDER BY accessed"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    total -= size
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class TieredCache:
+    """
+    In-memory LRU in front of a DiskCache. Values are stored with the latency it took to
+    produce them, so hits can report how much waiting they saved.
+    """
+
+    def __init__(self, disk: DiskCache, memory_entries: int = 128):
+        self.memory = LRUCache(memory_entries)
+        self.disk = disk
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.disk.get(key)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            self.memory.put(key, entry)
+            with self._lock:
+                self.disk_hits += 1
+        with self._lock:
+            self.saved_seconds += entry.get("latency", 0.0)
+        # Callers get their own copy; cached values must not be mutated in place
+        return json.loads(json.dumps(entry["value"]))
+
+    def put(self, key, value, latency: float = 0.0):
+        entry = {"value": json.loads(json.dumps(value)), "latency": latency}
+        self.memory.put(key, entry)
+        self.disk.put(key, entry)
+
+    def stats(self) -> dict:
+        hits = self.memory.hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
@@ -0,0 +1,100 @@
+"""
+Parse once, tailor many: a candidate's resume and LinkedIn text are turned into one complete
+structured profile when the user is created (LLMAgent.build_profile), and every job after
+that only asks the model which roles, bullets, skills and projects to show, plus a new summary
+(LLMAgent.tailor_cv). The profile is stored with the user record by file_management.
+"""
+import copy
+import hashlib
+
+from structured_output import TailoringOutput
+
+MAX_TAILORED_BULLETS = 5
+MAX_TAILORED_SKILLS = 15
+
+
+def profile_source_hash(resume_text: str, linkedin_text: str) -> str:
+    """Identifies the documents a stored profile was built from."""
+    digest = hashlib.sha256()
+    for text in (resume_text or "", linkedin_text or ""):
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def profile_outline(profile: dict) -> str:
+    """
+    The parts of the profile that tailoring chooses from, numbered so the model can answer
+    with positions instead of repeating the text. Contacts, education and certifications
+    never change per job and are left out.
+    """
+    lines = []
+    if profile.get("summary"):
+        lines.append(f"SUMMARY: {profile['summary'].strip()}")
+    if profile.get("skills"):
+        lines.append("SKILLS: " + ", ".join(str(s) for s in profile["skills"]))
+    for section, title_key in (("experience", "role"), ("projects", "project_title")):
+        entries = profile.get(section) or []
+        if entries:
+            lines.append(section.upper())
+        for i, entry in enumerate(entries):
+            title = entry.get(title_key) or entry.get("role") or ""
+            org = entry.get("company") or entry.get("organization") or ""
+            span = "–".join(d for d in (entry.get("start_date"), entry.get("end_date")) if d)
+            lines.append(f"[{i}] " + ", ".join(p for p in (title, org) if p) + (f" ({span})" if span else ""))
+            lines += [f"  [{j}] {a.strip()}" for j, a in enumerate(entry.get("achievements") or [])]
+    return "\n".join(lines)
+
+
+def apply_tailoring(profile: dict, tailoring) -> dict:
+    """
+    The full CV for one job: the profile with the model's summary, skills, roles, bullets and
+    projects applied. Positions that do not exist are ignored and skills are limited to the
+    profile's own, so the answer can reorder and drop content but never add any.
+    """
+    if not isinstance(tailoring, TailoringOutput):
+        tailoring = TailoringOutput.model_validate(tailoring)
+    cv = copy.deepcopy(profile)
+
+    if tailoring.summary and tailoring.summary.strip():
+        cv["summary"] = tailoring.summary.strip()
+
+    known_skills = {str(s).strip().lower(): s for s in profile.get("skills") or []}
+    skills = []
+    for skill in tailoring.skills:
+        match = known_skills.get(skill.strip().lower())
+        if match is not None and match not in skills:
+            skills.append(match)
+    if skills:
+        cv["skills"] = skills[:MAX_TAILORED_SKILLS]
+
+    roles = profile.get("experience") or []
+    chosen = {}
+    for role in tailoring.experience:
+        if 0 <= role.index < len(roles) and role.index not in chosen:
+            bullets = roles[role.index].get("achievements") or []
+            picked = list(dict.fromkeys(b for b in role.bullets if 0 <= b < len(bullets)))
+            chosen[role.index] = [bullets[b] for b in picked][:MAX_TAILORED_BULLETS] or bullets[:MAX_TAILORED_BULLETS]
+    if chosen:
+        # Keep the profile's (chronological) order of roles, whatever order they were picked in
+        cv["experience"] = [dict(roles[i], achievements=chosen[i]) for i in sorted(chosen)]
+
+    projects = profile.get("projects") or []
+    cv["projects"] = [projects[i] for i in dict.fromkeys(tailoring.projects) if 0 <= i < len(projects)]
+    return cv
+
+
+def ensure_user_profile(agent, user_id, resume_text: str, linkedin_text: str, on_section=None) -> dict:
+    """
+    The user's stored profile, built with `agent` and saved first if it is missing or was
+    built from different documents. `on_section` is passed to LLMAgent.build_profile.
+    """
+    from file_management import get_user_profile, save_user_profile
+
+    source_hash = profile_source_hash(resume_text, linkedin_text)
+    record = get_user_profile(user_id)
+    if record and record.get("source_hash") == source_hash:
+        return record["profile"]
+    profile = agent.build_profile(resume_text, linkedin_text, on_section=on_section)
+    save_user_profile(user_id, {"source_hash": source_hash, "model": agent.model_name, "profile": profile})
+    return profile
@@ -0,0 +1,131 @@
+import logging
+
+from rate_limiting import estimate_tokens
+
+CHAT_SYSTEM_PROMPT = (
+    "You are a professional career assistant. Provide suggestions based on the user's CV. "
+    "The current CV is below; refer to it instead of asking the user to paste it."
+)
+
+
+def compact_cv(cv) -> str:
+    """
+    The CV as short labelled plain text: empty fields dropped, one line per bullet.
+    Far fewer tokens than the dict repr or JSON, and easier for the model to quote from.
+    """
+    if hasattr(cv, "model_dump"):
+        cv = cv.model_dump()
+    if not cv:
+        return ""
+
+    def join(*parts, sep=" | "):
+        return sep.join(str(p).strip() for p in parts if p and str(p).strip())
+
+    def dates(entry):
+        span = join(entry.get("start_date"), entry.get("end_date"), sep="–")
+        return f"({span})" if span else ""
+
+    lines = [join(cv.get("name"), cv.get("email"), cv.get("phone"),
+                  cv.get("linkedin"), cv.get("website"), cv.get("github"))]
+    if cv.get("summary"):
+        lines += ["SUMMARY", cv["summary"].strip()]
+    for section, title_key in (("experience", "role"), ("projects", "project_title"), ("volunteering", "role")):
+        entries = cv.get(section) or []
+        if entries:
+            lines.append(section.upper())
+        for entry in entries:
+            title = entry.get(title_key) or entry.get("role")
+            org = entry.get("company") or entry.get("organization")
+            lines.append(join(join(title, org, sep=", "), dates(entry), entry.get("location"), sep=" "))
+            lines += [f"- {a.strip()}" for a in entry.get("achievements") or [] if a and a.strip()]
+    if cv.get("skills"):
+        lines += ["SKILLS", ", ".join(str(s) for s in cv["skills"])]
+    for entry in cv.get("education") or []:
+        lines.append("EDUCATION: " + join(entry.get("degree"), entry.get("major"), entry.get("institution"),
+                                          entry.get("graduation_year"), sep=", "))
+    for entry in cv.get("courses") or []:
+        lines.append("COURSE: " + join(entry.get("course"), entry.get("institution"),
+                                       entry.get("graduation_year"), sep=", "))
+    if cv.get("certifications"):
+        lines += ["CERTIFICATIONS", ", ".join(str(c) for c in cv["certifications"])]
+    return "\n".join(line for line in lines if line)
+
+
+def _message_tokens(message: dict) -> int:
+    return estimate_tokens(message.get("content", "")) + 4  # role and separators
+
+
+def extractive_summary(summary: str, messages: list, max_tokens: int) -> str:
+    """Fallback summarizer: the first sentence of each message, oldest dropped first."""
+    points = [f"{m['role']}: {m['content'].split('. ')[0].strip()[:200]}" for m in messages if m.get("content")]
+    lines = ([summary] if summary else []) + points
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    Builds the chat prompt for one conversation: a system message carrying the compact CV,
+    a rolling summary of turns that left the window, and the most recent turns verbatim,
+    together kept under `token_budget`. Prompt size therefore stays flat as the chat grows.
+
+    `summarize(summary, messages, max_tokens) -> str` folds evicted messages into the summary
+    (e.g. LLM_Chat.summarize_turns); extractive_summary is used when it is missing or fails.
+    """
+
+    def __init__(self, summarize=None, token_budget: int = 3000, window_messages: int = 10,
+                 summary_tokens: int = 300):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.window_messages = window_messages
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.summarized = 0  # history[:summarized] is already folded into the summary
+        self.last_prompt_tokens = 0
+
+    def build_messages(self, cv, history: list) -> list:
+        """Prompt messages for answering history[-1] (the user's newest message)."""
+        history = [m for m in history if m.get("role") in ("user", "assistant") and m.get("content")]
+        if self.summarized > len(history):
+            # History was replaced (e.g. another job loaded); start over
+            self.summary, self.summarized = "", 0
+
+        system = {"role": "system", "content": CHAT_SYSTEM_PROMPT}
+        cv_text = cv if isinstance(cv, str) else compact_cv(cv)
+        if cv_text:
+            system["content"] += "\n\nCURRENT CV:\n" + cv_text
+
+        # Newest turns first, until the window or the budget is full; the newest always fits
+        budget = self.token_budget - _message_tokens(system) - self.summary_tokens
+        start = len(history)
+        while start > self.summarized and len(history) - start < self.window_messages:
+            cost = _message_tokens(history[start - 1])
+            if start < len(history) and cost > budget:
+                break
+            budget -= cost
+            start -= 1
+
+        if start > self.summarized:
+            # Evict down to half a window so the summarizer runs every few turns, not every turn
+            start = max(start, len(history) - self.window_messages // 2)
+            self._fold(history[self.summarized:start])
+            self.summarized = start
+
+        messages = [system]
+        if self.summary:
+            messages.append({"role": "system", "content": "Earlier in this conversation:\n" + self.summary})
+        messages += [{"role": m["role"], "content": m["content"]} for m in history[start:]]
+        self.last_prompt_tokens = sum(_message_tokens(m) for m in messages)
+        return messages
+
+    def _fold(self, messages: list):
+        if self.summarize:
+            try:
+                summary = self.summarize(self.summary, messages, self.summary_tokens).strip()
+                # The model is asked to stay short; make sure it did
+                self.summary = summary[:self.summary_tokens * 4]
+                return
+            except Exception as e:
+                logging.warning(f"Chat summary failed, keeping an extractive one: {e}")
+        self.summary = extractive_summary(self.summary, messages, self.summary_tokens)
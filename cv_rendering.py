@@ -0,0 +1,342 @@
+"""
+Resume post-processing and rendering shared by the Streamlit app and headless runs:
+link discovery, text cleanup, certification handling and HTML/PDF output.
+"""
+import pathlib
+import re
+
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATES_DIR = pathlib.Path(__file__).resolve().parent / "templates"
+
+# -----------------------
+# Jinja environment
+# -----------------------
+env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    extensions=['jinja2.ext.do']   # <-- enable 'do' tag
+)
+template = env.get_template("cv_template.html")
+
+# -----------------------
+# Helpers
+# -----------------------
+URL_RE = re.compile(r'https?://[^\s)]+', re.IGNORECASE)
+
+def find_links(text: str):
+    return list(set(URL_RE.findall(text or "")))
+
+def pick_profile_links(resume_text: str, linkedin_text: str):
+    all_text = " ".join([resume_text or "", linkedin_text or ""])
+    urls = find_links(all_text)
+    linkedin_url = next((u for u in urls if "linkedin.com" in u.lower()), None)
+    github_url = next((u for u in urls if "github.com" in u.lower()), None)
+    
+    # Look for website URLs - prioritize personal domains
+    website_url = None
+    candidates = [u for u in urls if u not in [linkedin_url, github_url]]
+    
+    # Check for common personal website patterns
+    for url in candidates:
+        lower_url = url.lower()
+        if any(domain in lower_url for domain in ['.page', '.dev', '.io', '.com', '.net', '.org']):
+            # Skip common platforms that aren't personal websites
+            if not any(platform in lower_url for platform in ['facebook', 'twitter', 'instagram', 'youtube']):
+                website_url = url
+                break
+    
+    # If no good candidate found, use first non-social URL
+    if not website_url and candidates:
+        website_url = candidates[0]
+    
+    return {"linkedin": linkedin_url, "github": github_url, "website": website_url}
+
+def slim_skills(structured_result):
+    skills = structured_result.get("skills") or []
+    out = []
+    for s in skills:
+        if isinstance(s, dict) and "skill" in s:
+            out.append(s["skill"])
+        elif isinstance(s, str):
+            out.append(s)
+    seen = set()
+    deduped = []
+    for s in out:
+        if s and s not in seen:
+            seen.add(s)
+            deduped.append(s)
+    return deduped
+
+def ensure_summary_text(structured_result):
+    summary = structured_result.get("summary")
+    if isinstance(summary, dict) and "description" in summary:
+        return summary["description"]
+    if isinstance(summary, str):
+        return summary
+    return ""
+
+def filter_sections(structured_result, include_flags):
+    data = dict(structured_result)
+    if not include_flags.get("volunteer", True):
+        data["volunteering"] = []
+    if not include_flags.get("projects", True):
+        data["projects"] = []
+    return data
+
+def clean_text_fields(cv_dict):
+    """
+    Clean up project and volunteering entries:
+    - Collapse accidental internal spaces in titles and roles
+    - Remove redundant 'Independent Project'
+    - Normalize hyphens, dates, and locations
+    """
+    for proj in cv_dict.get("projects", []):
+        if "project_title" in proj and proj["project_title"]:
+            title = proj["project_title"]
+            # Normalize hyphens and dashes
+            title = re.sub(r'\s*[-–—]\s*', '-', title)
+            # Collapse multiple spaces
+            title = re.sub(r'\s+', ' ', title).strip()
+            # Remove spaces inside words but preserve spaces before numbers or capital letters starting a new word
+            title = re.sub(r'(?<=[a-z]) (?=[a-z])', '', title)
+            proj["project_title"] = title
+
+        # Clean role
+        if "role" in proj and proj["role"]:
+            proj["role"] = re.sub(r'\s+', ' ', proj["role"]).strip()
+        else:
+            proj["role"] = ""
+
+        # Clean organization
+        if "organization" not in proj or not proj["organization"]:
+            # Only fill if role is empty, avoid redundancy
+            proj["organization"] = "Independent Project" if not proj["role"] else ""
+        else:
+            proj["organization"] = re.sub(r'\s+', ' ', proj["organization"]).strip()
+
+        # Clean dates and location
+        for key in ["start_date", "end_date", "location"]:
+            if key in proj and proj[key]:
+                proj[key] = re.sub(r'\s+', ' ', proj[key]).strip()
+
+    for vol in cv_dict.get("volunteering", []):
+        if "role" in vol and vol["role"]:
+            vol["role"] = re.sub(r'\s+', ' ', vol["role"]).strip()
+        if "organization" not in vol or not vol["organization"]:
+            vol["organization"] = "Independent Project"
+        else:
+            vol["organization"] = re.sub(r'\s+', ' ', vol["organization"]).strip()
+
+        # Clean dates and location
+        for key in ["start_date", "end_date", "location"]:
+            if key in vol and vol[key]:
+                vol[key] = re.sub(r'\s+', ' ', vol[key]).strip()
+
+    return cv_dict
+
+def extract_titular_certifications(structured_dict):
+    """Extract certifications that should appear after the name"""
+    titular_certs = {
+        "PMP": ["pmp", "project management professional"],
+        "CSM": ["csm", "certified scrum master"],
+        "CPA": ["cpa", "certified public accountant"],
+        "MBA": ["mba", "master of business administration"],
+        "PHR": ["phr", "professional in human resources"],
+        "CFA": ["cfa", "chartered financial analyst"],
+        "PE": ["pe", "professional engineer"],
+        "PMI-ACP": ["pmi-acp", "agile certified practitioner"],
+        "CISSP": ["cissp", "certified information systems security professional"],
+        "Six Sigma": ["six sigma black belt", "six sigma green belt"]
+    }
+    
+    found_titular = []
+    certifications = structured_dict.get("certifications", [])
+    
+    for cert in certifications:
+        cert_text = ""
+        if isinstance(cert, dict):
+            cert_text = (cert.get("title", "") + " " + cert.get("issuer", "")).lower()
+        else:
+            cert_text = str(cert).lower()
+        
+        for abbrev, keywords in titular_certs.items():
+            if any(keyword in cert_text for keyword in keywords):
+                found_titular.append(abbrev)
+                break
+    
+    return list(set(found_titular))  # Remove duplicates
+
+def format_name_with_certifications(name, certifications):
+    """Add certifications after the name"""
+    if not certifications:
+        return name
+    cert_string = ", ".join(certifications)
+    return f"{name}, {cert_string}"
+
+def has_relevant_certifications(structured_dict):
+    """Check if there are any certifications to display"""
+    certifications = structured_dict.get("certifications", [])
+    if not certifications:
+        return False
+    
+    # Filter out empty certifications and avoid duplicates
+    valid_certs = []
+    seen_titles = set()
+    
+    for cert in certifications:
+        title = ""
+        if isinstance(cert, dict):
+            title = cert.get("title", "").strip()
+        elif isinstance(cert, str):
+            title = cert.strip()
+        
+        # Skip empty, summary text, or already seen certifications
+        if title and len(title) > 3 and title not in seen_titles:
+            # Skip if it looks like summary text (contains common summary words)
+            summary_indicators = ['with experience', 'certified project management professional with', 'experienced in']
+            if not any(indicator in title.lower() for indicator in summary_indicators):
+                valid_certs.append(cert)
+                seen_titles.add(title)
+    
+    return len(valid_certs) > 0
+
+def render_html(
+    structured_result,
+    header_location,
+    include_projects: bool = True,
+    include_volunteer: bool = True,
+    resume_text: str = "",
+    linkedin_text: str = ""
+) -> str:
+    data = dict(structured_result)
+    
+    # Extract titular certifications before processing
+    titular_certs = extract_titular_certifications(data)
+    
+    # Update name with certifications
+    original_name = data.get("name", "Unknown Name")
+    data["name"] = format_name_with_certifications(original_name, titular_certs)
+    
+    if not include_volunteer:
+        data["volunteering"] = []
+    if not include_projects:
+        data["projects"] = []
+    
+    data["linkedin"] = data.get("linkedin") or None
+    data["github"] = data.get("github") or None
+    data["website"] = data.get("website") or None
+    data["location"] = header_location or data.get("location")
+    
+    # Extract profile links from resume and linkedin text
+    profile_links = pick_profile_links(resume_text, linkedin_text)
+    if not data["linkedin"] and profile_links["linkedin"]:
+        data["linkedin"] = profile_links["linkedin"]
+    if not data["github"] and profile_links["github"]:
+        data["github"] = profile_links["github"]
+    if not data["website"] and profile_links["website"]:
+        data["website"] = profile_links["website"]
+    
+    # Ensure website has proper protocol for hyperlinks
+    if data.get("website") and not data["website"].startswith(("http://", "https://")):
+        data["website"] = f"https://{data['website']}"
+    
+    if "certifications" not in data or data["certifications"] is None:
+        data["certifications"] = []
+
+    # Existing certification extraction logic...
+    def extract_certifications(text):
+        found = []
+        if not text:
+            return found
+        txt = text.lower()
+        known = [
+            ("Project Management Professional (PMP)", "Project Management Institute", ["pmp", "project management professional"]),
+            ("Export Compliance Certification", "CITI Program", ["export compliance", "citi program", "citi"]),
+            ("Certified Scrum Master (CSM)", "Scrum Alliance", ["scrum master", "csm"]),
+            ("Lean Six Sigma", "Various", ["six sigma", "lean six sigma"]),
+            ("Certified Information Systems Security Professional (CISSP)", "(ISC)²", ["cissp"]),
+            ("Professional in Human Resources (PHR)", "HR Certification Institute", ["phr"]),
+            ("Chartered Financial Analyst (CFA)", "CFA Institute", ["cfa"])
+        ]
+        for title, issuer, keys in known:
+            for k in keys:
+                if k in txt and title not in [c.get("title") if isinstance(c,dict) else str(c) for c in found]:
+                    found.append({"title": title, "issuer": issuer})
+                    break
+        
+        # Look for certification patterns in text
+        lines = [l.strip(" -•*") for l in re.split(r'[\r\n]+', text) if l.strip()]
+        for line in lines:
+            low = line.lower()
+            if ("cert" in low or "certificate" in low or "certification" in low) and len(line) < 120:
+                if not any((isinstance(c,str) and c==line) or (isinstance(c,dict) and c.get("title")==line) for c in found):
+                    found.append({"title": line.strip(), "issuer": ""})
+        return found
+
+    auto = extract_certifications(resume_text) + extract_certifications(linkedin_text)
+    existing_titles = set()
+    cleaned = []
+    
+    # Process ALL certifications - both existing and auto-detected
+    all_certs = list(data.get("certifications", []) or []) + auto
+    
+    for cert in all_certs:
+        title = ""
+        issuer = ""
+        
+        if isinstance(cert, dict):
+            title = cert.get("title", "").strip()
+            issuer = cert.get("issuer", "").strip()
+        elif isinstance(cert, str):
+            title = cert.strip()
+            issuer = ""
+        
+        # Skip empty, very short, or problematic entries
+        if not title or len(title) < 4:
+            continue
+            
+        # Skip entries that look like summary text
+        skip_phrases = [
+            'with experience', 'certified project management professional with', 
+            'experienced in', 'certifications', 'summary', 'professional with'
+        ]
+        
+        if any(phrase in title.lower() for phrase in skip_phrases):
+            continue
+            
+        # Skip duplicates
+        if title in existing_titles:
+            continue
+            
+        # Add valid certification
+        existing_titles.add(title)
+        cleaned.append({"title": title, "issuer": issuer})
+    
+    data["certifications"] = cleaned
+    
+    # Add flag for template to know if certifications exist
+    data["has_certifications"] = has_relevant_certifications(data)
+
+    return template.render(structured_result=data)
+
+def render_and_write_pdf(
+    structured_result,
+    header_location,
+    out_dir: pathlib.Path,
+    filename_base: str,
+    include_projects: bool = True,
+    include_volunteer: bool = True,
+    resume_text: str = "",
+    linkedin_text: str = ""
+):
+    # WeasyPrint needs the Pango/Cairo system libraries; load it only when a PDF is written
+    import weasyprint
+
+    rendered_html = render_html(
+        structured_result, header_location, include_projects, include_volunteer, resume_text, linkedin_text
+    )
+    out_html = out_dir / f"{filename_base}.html"
+    out_pdf = out_dir / f"{filename_base}.pdf"
+    out_html.write_text(rendered_html, encoding="utf-8")
+    weasyprint.HTML(string=rendered_html).write_pdf(str(out_pdf))
+    return out_html, out_pdf
@@ -0,0 +1,162 @@
+"""
+Helpers for regenerating one part of a CV instead of the whole document: which parts can be
+targeted, the schema fragment for each, the source excerpts worth sending, and merging the
+answer back (see LLMAgent.regenerate_section).
+"""
+import copy
+import json
+import math
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+
+from prompt_compaction import WORD_RE
+from rate_limiting import estimate_tokens
+from structured_output import Course, Education, Experience, Project
+
+# Whole sections, and the model of a single entry for list sections
+SECTION_TYPES = {
+    "summary": Optional[str],
+    "skills": List[str],
+    "certifications": List[str],
+    "experience": List[Experience],
+    "projects": List[Project],
+    "volunteering": List[Project],
+    "education": List[Education],
+    "courses": List[Course],
+}
+ENTRY_TYPES = {
+    "experience": Experience,
+    "projects": Project,
+    "volunteering": Project,
+    "education": Education,
+    "courses": Course,
+}
+
+# Words too common in resumes to say which paragraph a section came from
+STOPWORDS = {
+    "and", "the", "for", "with", "from", "that", "this", "our", "you", "your", "are", "was", "were",
+    "will", "have", "has", "into", "over", "across", "within", "team", "teams", "work", "role",
+}
+
+
+def _words(text: str) -> set:
+    return {w for w in WORD_RE.findall(text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+
+def _type_for(section: str, index: int = None):
+    if section not in SECTION_TYPES:
+        raise ValueError(f"Unknown CV section '{section}', expected one of {list(SECTION_TYPES)}")
+    if index is None:
+        return SECTION_TYPES[section]
+    if section not in ENTRY_TYPES:
+        raise ValueError(f"Section '{section}' has no entries to address by index")
+    return ENTRY_TYPES[section]
+
+
+def section_label(cv: dict, section: str, index: int = None) -> str:
+    """Human-readable name of a target, e.g. "experience entry 'Engineer, Acme'"."""
+    if index is None:
+        return f"{section} section"
+    entry = current_value(cv, section, index) or {}
+    title = entry.get("role") or entry.get("project_title") or entry.get("degree") or entry.get("course") or ""
+    org = entry.get("company") or entry.get("organization") or entry.get("institution") or ""
+    name = ", ".join(part for part in (title, org) if part)
+    return f"{section} entry '{name}'" if name else f"{section} entry {index + 1}"
+
+
+def section_targets(cv: dict) -> list:
+    """(section, index) pairs that can be regenerated for this CV; index None = whole section."""
+    targets = [("summary", None), ("skills", None)]
+    for section in ("experience", "projects", "volunteering"):
+        targets += [(section, i) for i in range(len(cv.get(section) or []))]
+    return targets
+
+
+def section_schema(section: str, index: int = None) -> str:
+    """Compact JSON schema of just this section or entry, instead of the whole CV's."""
+    schema = TypeAdapter(_type_for(section, index)).json_schema()
+    return json.dumps(schema, separators=(",", ":"))
+
+
+def current_value(cv: dict, section: str, index: int = None):
+    value = (cv or {}).get(section)
+    if index is None:
+        return value
+    entries = value or []
+    if not 0 <= index < len(entries):
+        raise IndexError(f"{section} has no entry {index}")
+    return entries[index]
+
+
+def relevant_excerpts(text: str, query: str, max_tokens: int, min_share: float = 0.0) -> str:
+    """
+    The paragraphs of `text` that best match `query`, in their original order, up to
+    `max_tokens`. Shared words are weighted by rarity across the paragraphs, so a company name
+    or a year counts for more than a word every bullet uses. Paragraphs scoring below
+    `min_share` of the best one are left out even when the budget has room.
+    Long paragraphs are split into lines first so one block cannot fill the budget on its own.
+    """
+    blocks = []
+    for paragraph in text.split("\n\n"):
+        if estimate_tokens(paragraph) > max_tokens // 4:
+            blocks += [line for line in paragraph.splitlines() if line.strip()]
+        elif paragraph.strip():
+            blocks.append(paragraph)
+
+    block_words = [_words(block) for block in blocks]
+    frequency = {}
+    for words in block_words:
+        for word in words:
+            frequency[word] = frequency.get(word, 0) + 1
+    query_words = _words(query)
+    scored = []
+    for position, words in enumerate(block_words):
+        # Squared inverse document frequency: one shared year or name outweighs many common words
+        score = sum(math.log((1 + len(blocks)) / frequency[w]) ** 2 for w in query_words & words)
+        if score > 0:
+            scored.append((-score, position))
+    if not scored:
+        return ""
+
+    best = -min(scored)[0]
+    chosen, used = [], 0
+    for negative_score, position in sorted(scored):
+        if -negative_score < min_share * best:
+            break
+        cost = estimate_tokens(blocks[position]) + 1
+        if used + cost > max_tokens:
+            continue
+        chosen.append(position)
+        used += cost
+    return "\n\n".join(blocks[position] for position in sorted(chosen))
+
+
+def section_query(cv: dict, section: str, index: int, job_description: str) -> str:
+    """Text the excerpts are matched against: the current content, plus the job for summaries and skills."""
+    value = current_value(cv, section, index)
+    text = value if isinstance(value, str) else json.dumps(value or "", ensure_ascii=False)
+    if index is None:
+        # Section-wide rewrites draw on the whole career; steer them toward the posting
+        text += "\n" + job_description
+    return text
+
+
+def parse_section(answer, section: str, index: int = None):
+    """Validate the model's answer ({section: value} or the bare value) and return plain data."""
+    if isinstance(answer, dict) and section in answer:
+        answer = answer[section]
+    adapter = TypeAdapter(_type_for(section, index))
+    return adapter.dump_python(adapter.validate_python(answer))
+
+
+def merge_section(cv: dict, section: str, value, index: int = None) -> dict:
+    """A copy of `cv` with the section (or one entry of it) replaced; everything else is untouched."""
+    merged = copy.deepcopy(cv)
+    if index is None:
+        merged[section] = value
+    else:
+        entries = list(merged.get(section) or [])
+        entries[index] = value
+        merged[section] = entries
+    return merged
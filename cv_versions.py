@@ -0,0 +1,115 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import jsonpatch
+
+from caching import LRUCache
+
+# A full snapshot is stored whenever a patch chain would grow past this many links
+MAX_PATCH_CHAIN = 20
+
+
+def cv_hash(cv: dict) -> str:
+    """Content address of a CV: SHA-256 of its canonical JSON form."""
+    canonical = json.dumps(cv, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _normalize(cv) -> dict:
+    if hasattr(cv, "model_dump"):
+        cv = cv.model_dump()
+    elif hasattr(cv, "dict") and not isinstance(cv, dict):
+        cv = cv.dict()
+    # Round-trip so tuples, dates, etc. look exactly like what a reload returns
+    return json.loads(json.dumps(cv, default=str))
+
+
+class CVVersions:
+    """
+    Content-addressed version history of the CVs generated for a job.
+    Generated CVs are stored in full; edits are stored as RFC 6902 JSON patches against
+    their parent version, and identical content is never stored twice.
+
+    `store` provides append_cv_version(user_id, job_id, record) and
+    get_cv_versions(user_id, job_id) -> records in insertion order.
+    """
+
+    def __init__(self, store, cache_entries: int = 64):
+        self.store = store
+        self._docs = LRUCache(cache_entries)  # hash -> reconstructed CV
+
+    def save(self, user_id, job_id, cv, parent: str = None, kind: str = "generated") -> str:
+        cv = _normalize(cv)
+        digest = cv_hash(cv)
+        records = self.store.get_cv_versions(user_id, job_id)
+        by_hash = {r["hash"]: r for r in records if "ref" not in r}
+
+        if digest in by_hash:
+            # Same content again: nothing to store, but a revert must become the latest version
+            if records[-1]["hash"] != digest:
+                self.store.append_cv_version(user_id, job_id, {
+                    "hash": digest, "ref": digest, "kind": kind, "created": _now(),
+                })
+            self._docs.put(digest, cv)
+            return digest
+
+        record = {"hash": digest, "parent": None, "kind": kind, "created": _now(), "depth": 0}
+        if parent and parent in by_hash and by_hash[parent].get("depth", 0) < MAX_PATCH_CHAIN:
+            base = self._reconstruct(parent, by_hash)
+            record.update(parent=parent, depth=by_hash[parent].get("depth", 0) + 1,
+                          patch=jsonpatch.make_patch(base, cv).patch)
+        else:
+            record["full"] = cv
+        self.store.append_cv_version(user_id, job_id, record)
+        self._docs.put(digest, cv)
+        return digest
+
+    def latest(self, user_id, job_id):
+        """(hash, cv) of the most recent version, or (None, None) if the job has none."""
+        records = self.store.get_cv_versions(user_id, job_id)
+        if not records:
+            return None, None
+        digest = records[-1]["hash"]
+        by_hash = {r["hash"]: r for r in records if "ref" not in r}
+        return digest, self._reconstruct(digest, by_hash)
+
+    def load(self, user_id, job_id, digest: str) -> dict:
+        records = self.store.get_cv_versions(user_id, job_id)
+        by_hash = {r["hash"]: r for r in records if "ref" not in r}
+        if digest not in by_hash:
+            raise KeyError(f"Unknown CV version {digest} for job {job_id}")
+        return self._reconstruct(digest, by_hash)
+
+    def history(self, user_id, job_id) -> list:
+        """Version metadata (no payloads), oldest first."""
+        return [
+            {k: r.get(k) for k in ("hash", "parent", "kind", "created")}
+            for r in self.store.get_cv_versions(user_id, job_id)
+        ]
+
+    def _reconstruct(self, digest, by_hash) -> dict:
+        cached = self._docs.get(digest)
+        if cached is not None:
+            return json.loads(json.dumps(cached))
+
+        # Walk back to the nearest snapshot (or cached version), then replay patches forward
+        chain = []
+        node = by_hash[digest]
+        base = None
+        while "full" not in node:
+            chain.append(node)
+            cached = self._docs.get(node["parent"])
+            if cached is not None:
+                base = cached
+                break
+            node = by_hash[node["parent"]]
+        doc = json.loads(json.dumps(base if base is not None else node["full"]))
+        for step in reversed(chain):
+            doc = jsonpatch.apply_patch(doc, step["patch"])
+        self._docs.put(digest, doc)
+        return json.loads(json.dumps(doc))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -0,0 +1,314 @@
+"""
+Local stand-in for the Groq chat-completions endpoint, for exercising llm_agent without
+network access or an API key.
+
+    python fake_llm_server.py --port 8765 --latency 0.5
+
+then point an agent at it with LLMAgent(key_file, base_url="http://127.0.0.1:8765").
+CV and profile requests get a schema-valid resume built from the prompt, tailoring requests
+pick bullets by number, section rewrites get the section back, and anything else gets a short
+text answer. Requests with "stream": true are
+answered as server-sent events, one word per chunk. Job descriptions containing FAIL_MARKER are answered with HTTP 500.
+With --malformed-every, every Nth JSON answer has a defect models produce (see MALFORMATIONS);
+follow-ups asking for "ONLY these keys" get just those keys.
+With --rpm-limit (per --window seconds) or --throttle-every, requests are refused with
+HTTP 429 and a Retry-After header, like Groq's rate limiter.
+"""
+import argparse
+import collections
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAIL_MARKER = "[[fail]]"
+REPAIR_RE = re.compile(r"Return a JSON object with ONLY these keys: (.*)")
+MALFORMATIONS = ("fenced", "trailing_commas", "truncated", "wrong_type")
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+def _section(text: str, title: str) -> str:
+    match = re.search(rf"{title}:\s*(.*?)(?:\n\s*\n[A-Z ]+:|\n\s*(?:Generate a structured|Return JSON)|\Z)", text, re.S)
+    return match.group(1).strip() if match else ""
+
+
+# "Title, Company" / "Mon YYYY - Mon YYYY" / "• bullet" blocks, as in benchmarks.make_profile_texts
+ROLE_RE = re.compile(r"^(.+?), (.+)\n(\w{3} \d{4}) - (\w{3} \d{4})\n((?:• .+(?:\n|$))+)", re.M)
+
+
+def fake_cv(prompt: str) -> dict:
+    resume = _section(prompt, "RESUME TEXT")
+    job = _section(prompt, "JOB DESCRIPTION")
+    lines = [line.strip() for line in resume.splitlines() if line.strip()]
+    experience = [
+        {"role": role, "company": company, "start_date": start, "end_date": end,
+         "achievements": [b[2:].strip() for b in bullets.splitlines() if b.strip()]}
+        for role, company, start, end, bullets in ROLE_RE.findall(resume)
+    ] or [{"role": "Engineer", "company": "Example Corp", "achievements": lines[1:4]}]
+    return {
+        "name": lines[0] if lines else "Unknown Name",
+        "summary": f"Candidate tailored for: {' '.join(job.split())[:80]}" if job else "Candidate profile",
+        "experience": experience,
+        "skills": sorted({w.lower() for w in re.findall(r"[A-Za-z]{5,}", job)})[:8],
+        "education": [],
+        "projects": [],
+        "volunteering": [],
+        "certifications": [],
+    }
+
+
+def fake_section(prompt: str) -> dict:
+    """The current value sent back with the summary rewritten and bullets reordered."""
+    section = _section(prompt, "SECTION")
+    value = json.loads(_section(prompt, "CURRENT VALUE") or "null")
+    if section == "summary":
+        value = f"Candidate tailored for: {' '.join(_section(prompt, 'JOB DESCRIPTION').split())[:80]}"
+    elif isinstance(value, dict) and value.get("achievements"):
+        value["achievements"] = value["achievements"][1:] + value["achievements"][:1]
+    return {section: value}
+
+
+def fake_tailoring(prompt: str) -> dict:
+    """The first three bullets of every numbered role, skills that the job mentions."""
+    outline = _section(prompt, "PROFILE")
+    job = _section(prompt, "JOB DESCRIPTION").lower()
+    roles = {}
+    for line in outline.splitlines():
+        match = re.match(r"(\s*)\[(\d+)\]", line)
+        if match and not match.group(1):
+            current = roles.setdefault(int(match.group(2)), [])
+        elif match and roles:
+            current.append(int(match.group(2)))
+    skills = re.search(r"^SKILLS: (.*)$", outline, re.M)
+    return {
+        "summary": f"Candidate tailored for: {' '.join(job.split())[:80]}",
+        "skills": [s for s in (skills.group(1).split(", ") if skills else []) if s.lower() in job],
+        "experience": [{"index": i, "bullets": bullets[:3]} for i, bullets in roles.items()],
+        "projects": [],
+    }
+
+
+def malform(reply: str, kind: str) -> str:
+    """A JSON answer with one of the MALFORMATIONS applied."""
+    if kind == "fenced":
+        return f"Here is the JSON you asked for:\n```json\n{reply}\n```\nLet me know if you need changes."
+    if kind == "trailing_commas":
+        return re.sub(r"([\]}\"])(\s*[\]}])", r"\1,\2", reply)
+    if kind == "truncated":
+        return reply[:len(reply) * 2 // 3]
+    data = json.loads(reply)
+    key = next((k for k, v in data.items() if isinstance(v, list)), None)
+    if key:
+        data[key] = "See attached"  # a string where the schema wants a list
+    return json.dumps(data)
+
+
+def fake_reply(messages: list) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    wanted = REPAIR_RE.search(prompt)
+    if wanted and len(messages) > 1:
+        full = json.loads(fake_reply(messages[:-1]))
+        return json.dumps({k.strip(): full.get(k.strip()) for k in wanted.group(1).split(",")})
+    if "structured JSON resume" in prompt or "structured JSON profile" in prompt:
+        return json.dumps(fake_cv(prompt))
+    if "Tailor the candidate profile" in prompt:
+        return json.dumps(fake_tailoring(prompt))
+    if "Rewrite only the" in prompt:
+        return json.dumps(fake_section(prompt))
+    last = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Here is a suggestion based on your request: {' '.join(str(last).split())[:200]}"
+
+
+class FakeChatServer:
+    """Threaded HTTP server answering chat-completions requests after `latency` seconds."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 chunk_delay: float = 0.02, rpm_limit: int = 0, window: float = 60.0,
+                 throttle_every: int = 0, retry_after: float = 1.0, malformed_every: int = 0):
+        self.latency = latency  # before the first byte / first chunk
+        self.chunk_delay = chunk_delay  # per generated word, streamed or not
+        self.rpm_limit = rpm_limit  # requests admitted per `window` seconds (0 = unlimited)
+        self.window = window
+        self.throttle_every = throttle_every  # additionally refuse every Nth request
+        self.retry_after = retry_after
+        self.malformed_every = malformed_every  # damage every Nth JSON answer (0 = never)
+        self.json_answers = 0
+        self.malformed = collections.Counter()
+        self._admitted = collections.deque()
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _admit(self):
+        """None if the request may proceed, else the Retry-After seconds for a 429."""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            retry_after = None
+            if self.throttle_every and self.requests % self.throttle_every == 0:
+                retry_after = self.retry_after
+            elif self.rpm_limit:
+                while self._admitted and now - self._admitted[0] >= self.window:
+                    self._admitted.popleft()
+                if len(self._admitted) >= self.rpm_limit:
+                    retry_after = self.window - (now - self._admitted[0])
+            if retry_after is None:
+                self._admitted.append(now)
+            else:
+                self.throttled += 1
+            return retry_after
+
+    def _reply(self, messages: list) -> str:
+        reply = fake_reply(messages)
+        if not self.malformed_every or not reply.startswith("{") or REPAIR_RE.search(str(messages[-1].get("content", ""))):
+            return reply
+        with self._lock:
+            self.json_answers += 1
+            if self.json_answers % self.malformed_every:
+                return reply
+            kind = MALFORMATIONS[(self.json_answers // self.malformed_every - 1) % len(MALFORMATIONS)]
+            self.malformed[kind] += 1
+        return malform(reply, kind)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if self.path != COMPLETIONS_PATH:
+                    return self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                retry_after = server._admit()
+                if retry_after is not None:
+                    return self._send(429, {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                                      {"retry-after": f"{retry_after:.2f}"})
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.latency)
+                    messages = body.get("messages", [])
+                    if any(FAIL_MARKER in str(m.get("content", "")) for m in messages):
+                        return self._send(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+                    if body.get("stream"):
+                        return self._stream(body.get("model", "fake"), server._reply(messages))
+                    reply = server._reply(messages)
+                    # Same generation time as the streamed answer, delivered all at once
+                    time.sleep(server.chunk_delay * max(len(re.findall(r"\S+", reply)) - 1, 0))
+                    self._send(200, completion(body.get("model", "fake"), reply))
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, model, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")  # no length up front; the stream ends with the connection
+                self.close_connection = True
+                self.end_headers()
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                pieces = re.findall(r"\S+\s*", content) or [""]
+                for i, piece in enumerate(pieces):
+                    if i:
+                        time.sleep(server.chunk_delay)
+                    self._event(completion_chunk(chunk_id, model, {"content": piece}))
+                self._event(completion_chunk(chunk_id, model, {}, finish_reason="stop"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def _event(self, payload):
+                self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def completion(model: str, content: str) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())},
+    }
+
+
+def completion_chunk(chunk_id: str, model: str, delta: dict, finish_reason: str = None) -> dict:
+    return {
+        "id": chunk_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before each response")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds per generated word")
+    parser.add_argument("--rpm-limit", type=int, default=0, help="Requests admitted per window (0 = no limit)")
+    parser.add_argument("--window", type=float, default=60.0, help="Rate limit window in seconds")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--malformed-every", type=int, default=0, help="Damage every Nth JSON answer")
+    args = parser.parse_args()
+
+    server = FakeChatServer(args.host, args.port, args.latency, args.chunk_delay,
+                            args.rpm_limit, args.window, args.throttle_every,
+                            malformed_every=args.malformed_every)
+    print(f"Fake chat-completions server on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,27 @@
 import os
+import logging
 import pathlib
 import json
-import PyPDF2
+import hashlib
+import brotli
+
+from caching import LRUCache
+from cv_versions import CVVersions
+from file_utils import atomic_write, file_lock, parse_log_line
+from pdf_extraction import get_engine
 
 BASE_DIR = pathlib.Path(__file__).resolve().parent
-DB_DIR = BASE_DIR / "db"
-DB_DIR.mkdir(exist_ok=True)
+DB_DIR = pathlib.Path(os.environ.get("ATS_DB_DIR", BASE_DIR / "db"))
+DB_DIR.mkdir(parents=True, exist_ok=True)
 USERS_FILE = DB_DIR / "users.json"
 JOBS_FILE = DB_DIR / "jobs.json"
+JOBS_SEQ_FILE = DB_DIR / "jobs.seq"
+SQLITE_FILE = DB_DIR / "ats.sqlite3"
+
+# "json" (default) keeps the original flat files, "sqlite" uses the indexed embedded engine,
+# "postgres" talks to the shared database described in DB/db-init/initsql.sql
+STORAGE_BACKEND = os.environ.get("ATS_STORAGE_BACKEND", "json").strip().lower()
+PG_POOL_MAX = int(os.environ.get("ATS_PG_POOL_MAX", "10"))
 
 def _load_json(path, default=None):
     if path.exists():
@@ -16,83 +30,565 @@ def _load_json(path, default=None):
     return default if default is not None else {}
 
 def _save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    atomic_write(path, json.dumps(data, indent=2).encode("utf-8"))
+
+def _allocate_id(seq_path, initial):
+    """
+    Next value of a persistent monotonic counter. The caller must hold the lock of the
+    file the ids belong to; `initial()` seeds a missing counter once (e.g. from existing keys).
+    """
+    if seq_path.exists():
+        last = int(seq_path.read_text(encoding="utf-8").strip() or 0)
+    else:
+        last = initial()
+    new_id = last + 1
+    _save_json(seq_path, new_id)
+    return new_id
+
+# -----------------------
+# Append-only logs (chat history, CV versions)
+# -----------------------
+CHAT_RESET = {"_reset": True}
+CHAT_COMPACT_MIN_DEAD = 64  # superseded/torn records tolerated before the log is rewritten
+
+def _same_record(stored, message) -> bool:
+    """Whether a record read back from storage is `message`, compared as JSON."""
+    return stored == json.loads(json.dumps(message))
+
+class AppendLog:
+    """
+    Append-only JSON-lines log, e.g. one job's chat: one line per message, so a turn costs
+    O(new messages) and a crash can at worst tear the last line, which readers skip.
+    A history that shrinks is written as a reset marker plus the new history; compaction
+    rewrites the file without superseded generations once enough of them pile up.
+    """
+    _stats = {}  # path -> (size, live, dead) for logs this process has scanned or written
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+
+    def _scan(self):
+        live, dead = [], 0
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for line in data.split(b"\n"):
+            record = parse_log_line(line)
+            if record is None:
+                dead += bool(line.strip())
+            elif record.get("_reset"):
+                dead += len(live) + 1
+                live = []
+            else:
+                live.append(record)
+        AppendLog._stats[str(self.path)] = (len(data), len(live), dead)
+        return live
+
+    def _counts(self):
+        if not self.path.exists():
+            return 0, 0
+        cached = AppendLog._stats.get(str(self.path))
+        if cached is None or cached[0] != self.path.stat().st_size:
+            self._scan()
+            cached = AppendLog._stats[str(self.path)]
+        return cached[1], cached[2]
+
+    def read(self):
+        if not self.path.exists():
+            if self.legacy_path and self.legacy_path.exists():
+                return _load_json(self.legacy_path, [])
+            return []
+        return self._scan()
+
+    def tail(self, n):
+        """Last `n` messages, reading the file backwards only as far as needed."""
+        if n <= 0:
+            return []
+        if not self.path.exists():
+            return self.read()[-n:]
+        out = []
+        with open(self.path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            carry = b""
+            while pos > 0 and len(out) < n:
+                step = min(8192, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + carry).split(b"\n")
+                # The first piece may continue into the previous block unless we hit the start
+                carry = lines.pop(0) if pos > 0 else b""
+                for line in reversed(lines):
+                    record = parse_log_line(line)
+                    if record is None:
+                        continue
+                    if record.get("_reset"):
+                        return out[::-1]
+                    out.append(record)
+                    if len(out) == n:
+                        break
+        return out[::-1]
+
+    def _convert_legacy_locked(self):
+        # chat_*.json files written before the log existed become its first generation
+        if not self.path.exists() and self.legacy_path and self.legacy_path.exists():
+            history = _load_json(self.legacy_path, [])
+            payload = b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in history)
+            atomic_write(self.path, payload)
+            AppendLog._stats[str(self.path)] = (len(payload), len(history), 0)
+            self.legacy_path.unlink()
+
+    def _append_locked(self, records):
+        live, dead = self._counts()
+        payload = b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records)
+        with open(self.path, "ab") as f:
+            if f.tell() and not self._ends_with_newline():
+                payload = b"\n" + payload  # isolate a torn last line
+                dead += 1
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        for r in records:
+            if r.get("_reset"):
+                dead += live + 1
+                live = 0
+            else:
+                live += 1
+        AppendLog._stats[str(self.path)] = (size, live, dead)
+        return live, dead
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def append(self, messages):
+        with file_lock(self.path):
+            self._convert_legacy_locked()
+            self._append_locked(messages)
+
+    def save(self, history):
+        """
+        Persist `history`: only the messages past what the log already holds are appended when
+        the log is a prefix of it, otherwise (shorter history, or another session's messages
+        in the log) the log is replaced by it.
+        """
+        history = list(history or [])
+        with file_lock(self.path):
+            self._convert_legacy_locked()
+            live, _ = self._counts()
+            if len(history) >= live and (not live or _same_record(self.tail(1)[0], history[live - 1])):
+                records = history[live:]
+            else:
+                records = [CHAT_RESET] + history
+            if not records:
+                return
+            live, dead = self._append_locked(records)
+            if dead >= max(CHAT_COMPACT_MIN_DEAD, live):
+                self._compact_locked()
+
+    def compact(self):
+        with file_lock(self.path):
+            if self.path.exists():
+                self._compact_locked()
+
+    def _compact_locked(self):
+        live = self._scan()
+        payload = b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in live)
+        atomic_write(self.path, payload)
+        AppendLog._stats[str(self.path)] = (len(payload), len(live), 0)
+
+def _chat_log(user_id, job_id):
+    return AppendLog(DB_DIR / f"chat_{user_id}_{job_id}.jsonl", legacy_path=DB_DIR / f"chat_{user_id}_{job_id}.json")
+
+def _cv_log(user_id, job_id):
+    return AppendLog(DB_DIR / f"cv_{user_id}_{job_id}.jsonl")
+
+def iter_chat_files(db_dir):
+    """Yield (user_id, job_id, history) for every chat stored by the JSON store in `db_dir`."""
+    db_dir = pathlib.Path(db_dir)
+    seen = set()
+    for path in sorted(db_dir.glob("chat_*_*.jsonl")) + sorted(db_dir.glob("chat_*_*.json")):
+        _, uid, jid = path.stem.split("_", 2)
+        if (uid, jid) in seen:
+            continue
+        seen.add((uid, jid))
+        yield uid, jid, AppendLog(db_dir / f"{path.stem}.jsonl", legacy_path=db_dir / f"{path.stem}.json").read()
+
+def iter_user_blobs(db_dir, name):
+    """Yield (user_id, data) for every user blob called `name` (e.g. "profile") in `db_dir`."""
+    blobs_dir = pathlib.Path(db_dir) / "user_blobs"
+    for path in sorted(blobs_dir.glob(f"*.{name}.json.br")):
+        uid = path.name[:-len(f".{name}.json.br")]
+        yield uid, _read_user_blob(uid, name, blobs_dir)
+
+def iter_cv_version_files(db_dir):
+    """Yield (user_id, job_id, records) for every CV version log stored by the JSON store in `db_dir`."""
+    for path in sorted(pathlib.Path(db_dir).glob("cv_*_*.jsonl")):
+        _, uid, jid = path.stem.split("_", 2)
+        yield uid, jid, AppendLog(path).read()
+
+# -----------------------
+# Per-user blobs
+# -----------------------
+USER_BLOBS_DIR = DB_DIR / "user_blobs"
+BLOB_QUALITY = 5  # Brotli level: most of the ratio at a fraction of the max-level cost
+
+def _user_blob_path(user_id, name, blobs_dir=None):
+    return (blobs_dir or USER_BLOBS_DIR) / f"{user_id}.{name}.json.br"
+
+def _write_user_blob(user_id, name, data):
+    USER_BLOBS_DIR.mkdir(parents=True, exist_ok=True)
+    payload = brotli.compress(json.dumps(data).encode("utf-8"), quality=BLOB_QUALITY)
+    atomic_write(_user_blob_path(user_id, name), payload)
+
+def _read_user_blob(user_id, name, blobs_dir=None):
+    path = _user_blob_path(user_id, name, blobs_dir)
+    if not path.exists():
+        return None
+    return json.loads(brotli.decompress(path.read_bytes()))
+
+def _split_inline_texts(users) -> bool:
+    """Move texts still stored inline in users.json (older layout) out to blobs. Caller holds the lock."""
+    moved = False
+    for uid_str, user in users.items():
+        if "resume_text" in user or "linkedin_text" in user:
+            _write_user_blob(uid_str, "texts", {
+                "resume_text": user.pop("resume_text", ""),
+                "linkedin_text": user.pop("linkedin_text", ""),
+            })
+            moved = True
+    return moved
+
+def iter_user_records(db_dir):
+    """Yield full user dicts (metadata plus texts) from the JSON store in `db_dir`, whatever its layout."""
+    db_dir = pathlib.Path(db_dir)
+    for uid_str, user in _load_json(db_dir / "users.json", {}).items():
+        record = dict(user, user_id=uid_str)
+        if "resume_text" not in user:
+            record.update(_read_user_blob(uid_str, "texts", db_dir / "user_blobs") or {})
+        yield record
+
+# -----------------------
+# JSON store
+# -----------------------
+class JsonStore:
+    """
+    Original flat-file store: every call reads (and writes) the whole users/jobs file.
+    Writers hold a per-file lock and replace the file atomically, so concurrent sessions don't lose updates.
+    users.json only carries small metadata; resume/LinkedIn texts live in per-user compressed blobs.
+    """
+
+    def __init__(self):
+        self._users_cache = None
+
+    def _users_index(self):
+        """Parsed users.json, re-read only when the file changes on disk. Treat as read-only."""
+        try:
+            st = USERS_FILE.stat()
+        except FileNotFoundError:
+            return {}
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._users_cache is None or self._users_cache[0] != stamp:
+            self._users_cache = (stamp, _load_json(USERS_FILE, {}))
+        return self._users_cache[1]
+
+    def get_all_users(self):
+        data = self._users_index()
+        return [(int(uid), u.get("name", "")) for uid, u in data.items()]
+
+    def check_user_exists(self, user_id):
+        return str(user_id) in self._users_index()
+
+    def get_user_info(self, user_id):
+        user = self._users_index().get(str(user_id), {})
+        if "resume_text" in user:  # not yet split out of users.json
+            return user.get("resume_text", ""), user.get("linkedin_text", "")
+        texts = _read_user_blob(user_id, "texts") or {}
+        return texts.get("resume_text", ""), texts.get("linkedin_text", "")
+
+    def create_user(self, user_id, name, resume_text, linkedin_text, website="", github=""):
+        return self.create_users([{
+            "user_id": user_id, "name": name, "resume_text": resume_text,
+            "linkedin_text": linkedin_text, "website": website, "github": github,
+        }])[0]
+
+    def create_users(self, records):
+        """Insert many users with a single read-modify-write of users.json."""
+        created = []
+        with file_lock(USERS_FILE):
+            users = _load_json(USERS_FILE, {})
+            for r in records:
+                uid_str = str(r["user_id"])
+                if uid_str in users:
+                    created.append(False)
+                    continue
+                # Blob first: a crash before the index write leaves only an orphan blob
+                _write_user_blob(uid_str, "texts", {
+                    "resume_text": r.get("resume_text", ""),
+                    "linkedin_text": r.get("linkedin_text", ""),
+                })
+                users[uid_str] = {
+                    "name": r.get("name", ""),
+                    "website": r.get("website", ""),
+                    "github": r.get("github", "")
+                }
+                created.append(True)
+            if _split_inline_texts(users) or any(created):
+                _save_json(USERS_FILE, users)
+        return created
+
+    def get_user_profile(self, user_id):
+        return _read_user_blob(user_id, "profile")
+
+    def save_user_profile(self, user_id, record):
+        _write_user_blob(user_id, "profile", record)
+
+    def get_user_source_index(self, user_id):
+        return _read_user_blob(user_id, "source_index")
+
+    def save_user_source_index(self, user_id, record):
+        _write_user_blob(user_id, "source_index", record)
+
+    def get_user_jobs(self, user_id):
+        jobs = _load_json(JOBS_FILE, {})
+        return [(int(jid), j.get("description",""), j.get("generated_cv", None), j.get("created",""), j.get("updated",""))
+                for jid, j in jobs.items() if str(user_id) == str(j.get("user_id"))]
+
+    def create_new_job(self, user_id, description):
+        with file_lock(JOBS_FILE):
+            jobs = _load_json(JOBS_FILE, {})
+            # Keys are only scanned once, to seed a missing counter from pre-existing data
+            new_id = _allocate_id(JOBS_SEQ_FILE, lambda: max([int(j) for j in jobs.keys()] + [0]))
+            jobs[str(new_id)] = {
+                "user_id": user_id,
+                "description": description,
+                "generated_cv": None,
+                "created": "",
+                "updated": ""
+            }
+            _save_json(JOBS_FILE, jobs)
+        return new_id
+
+    def iter_job_descriptions(self):
+        for jid, j in _load_json(JOBS_FILE, {}).items():
+            yield jid, j.get("description", "")
+
+    def get_chat_history(self, user_id, job_id):
+        return _chat_log(user_id, job_id).read()
+
+    def get_chat_tail(self, user_id, job_id, n):
+        return _chat_log(user_id, job_id).tail(n)
+
+    def append_chat_messages(self, user_id, job_id, messages):
+        _chat_log(user_id, job_id).append(messages)
+
+    def save_chat_history(self, user_id, job_id, history):
+        _chat_log(user_id, job_id).save(history)
+
+    def get_cv_versions(self, user_id, job_id):
+        return _cv_log(user_id, job_id).read()
+
+    def append_cv_version(self, user_id, job_id, record):
+        _cv_log(user_id, job_id).append([record])
+
+
+_store = None
+
+def get_store():
+    """Return the process-wide store selected by ATS_STORAGE_BACKEND."""
+    global _store
+    if _store is None:
+        if STORAGE_BACKEND == "sqlite":
+            from sqlite_store import SQLiteStore
+            _store = SQLiteStore(SQLITE_FILE)
+        elif STORAGE_BACKEND == "postgres":
+            from pg_store import PostgresStore
+            _store = PostgresStore(maxconn=PG_POOL_MAX)
+        elif STORAGE_BACKEND == "json":
+            _store = JsonStore()
+        else:
+            raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return _store
 
 # -----------------------
 # User management
 # -----------------------
 def get_all_users():
-    data = _load_json(USERS_FILE, {})
-    return [(int(uid), u.get("name", "")) for uid, u in data.items()]
+    return get_store().get_all_users()
 
 def check_user_exists(user_id):
-    data = _load_json(USERS_FILE, {})
-    return str(user_id) in data
+    return get_store().check_user_exists(user_id)
 
 def get_user_info(user_id):
-    data = _load_json(USERS_FILE, {})
-    user = data.get(str(user_id), {})
-    return user.get("resume_text", ""), user.get("linkedin_text", "")
+    return get_store().get_user_info(user_id)
 
 def create_user(user_id, name, resume_pdf_file, linkedin_pdf_file, website="", github=""):
-    users = _load_json(USERS_FILE, {})
-    uid_str = str(user_id)
-    if uid_str in users:
+    store = get_store()
+    if store.check_user_exists(user_id):
         return False
     resume_text = extract_text_from_pdf(resume_pdf_file)
     linkedin_text = extract_text_from_pdf(linkedin_pdf_file)
-    users[uid_str] = {
-        "name": name,
-        "resume_text": resume_text,
-        "linkedin_text": linkedin_text,
-        "website": website,
-        "github": github
-    }
-    _save_json(USERS_FILE, users)
-    return True
+    return store.create_user(user_id, name, resume_text, linkedin_text, website, github)
+
+def create_users_batch(records):
+    """
+    Insert already-extracted users in one batched write. Each record is a dict with
+    user_id, name, resume_text, linkedin_text and optional website/github.
+    Returns one bool per record: False when the user_id already existed.
+    """
+    return get_store().create_users(list(records))
+
+def get_user_profile(user_id):
+    """The user's stored structured profile record (see candidate_profile.py), or None."""
+    return get_store().get_user_profile(user_id)
+
+def save_user_profile(user_id, record):
+    get_store().save_user_profile(user_id, record)
+
+def get_user_source_index(user_id):
+    """The user's stored sentence index of their source documents (see source_index.py), or None."""
+    return get_store().get_user_source_index(user_id)
+
+def save_user_source_index(user_id, record):
+    get_store().save_user_source_index(user_id, record)
 
 # -----------------------
 # Job management
 # -----------------------
 def get_user_jobs(user_id):
-    jobs = _load_json(JOBS_FILE, {})
-    return [(int(jid), j.get("description",""), j.get("generated_cv", None), j.get("created",""), j.get("updated",""))
-            for jid, j in jobs.items() if str(user_id) == str(j.get("user_id"))]
+    return get_store().get_user_jobs(user_id)
 
 def create_new_job(user_id, description):
-    jobs = _load_json(JOBS_FILE, {})
-    new_id = max([int(j) for j in jobs.keys()] + [0]) + 1
-    jobs[str(new_id)] = {
-        "user_id": user_id,
-        "description": description,
-        "generated_cv": None,
-        "created": "",
-        "updated": ""
-    }
-    _save_json(JOBS_FILE, jobs)
-    return new_id
+    job_id = get_store().create_new_job(user_id, description)
+    try:
+        # Keyword weights count every stored posting; the new one is appended to the index
+        from job_keywords import get_job_index
+        get_job_index().add(job_id, description)
+    except Exception as e:
+        logging.warning(f"Could not add job {job_id} to the keyword index: {e}")
+    return job_id
 
 def save_dict_in_db(file_path, data_dict):
-    _save_json(file_path, data_dict)
+    _save_json(pathlib.Path(file_path), data_dict)
 
 # -----------------------
 # Chat history
 # -----------------------
 def get_chat_history(user_id, job_id):
-    path = DB_DIR / f"chat_{user_id}_{job_id}.json"
-    return _load_json(path, [])
+    return get_store().get_chat_history(user_id, job_id)
 
 def save_chat_history(user_id, job_id, history):
-    path = DB_DIR / f"chat_{user_id}_{job_id}.json"
-    _save_json(path, history)
+    """Persist the session's history; only messages not yet stored are written."""
+    get_store().save_chat_history(user_id, job_id, history)
+
+def append_chat_message(user_id, job_id, message):
+    get_store().append_chat_messages(user_id, job_id, [message])
+
+def append_chat_messages(user_id, job_id, messages):
+    """Add one turn's messages to the stored chat, one record each."""
+    get_store().append_chat_messages(user_id, job_id, list(messages))
+
+def get_chat_tail(user_id, job_id, n):
+    """Last `n` messages of a chat without loading the whole conversation."""
+    return get_store().get_chat_tail(user_id, job_id, n)
+
+# -----------------------
+# Generated CV versions
+# -----------------------
+_cv_versions = None
+
+def _versions():
+    global _cv_versions
+    if _cv_versions is None:
+        _cv_versions = CVVersions(get_store())
+    return _cv_versions
+
+def save_cv_version(user_id, job_id, cv, parent=None, kind="generated"):
+    """
+    Store `cv` as the job's newest version and return its content hash. Identical content
+    is not stored again; with `parent`, only a JSON patch against that version is kept.
+    """
+    return _versions().save(user_id, job_id, cv, parent=parent, kind=kind)
+
+def get_latest_cv(user_id, job_id):
+    """(hash, cv dict) of the job's newest CV version, or (None, None)."""
+    return _versions().latest(user_id, job_id)
+
+def list_cv_versions(user_id, job_id):
+    return _versions().history(user_id, job_id)
 
 # -----------------------
 # PDF text extraction
 # -----------------------
-def extract_text_from_pdf(pdf_file):
-    reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
\ No newline at end of file
+PDF_TEXT_CACHE_DIR = DB_DIR / "pdf_text"
+PDF_TEXT_CACHE_ENTRIES = int(os.environ.get("ATS_PDF_CACHE_ENTRIES", "64"))
+PDF_ENGINE = os.environ.get("ATS_PDF_ENGINE", "pymupdf")  # see pdf_extraction.ENGINES
+PDF_LAYOUT = os.environ.get("ATS_PDF_LAYOUT", "0") == "1"  # reading-order block sorting
+
+class PdfTextCache:
+    """
+    Extracted text keyed by the SHA-256 of the PDF bytes: an in-memory LRU in front of one
+    file per digest on disk, so re-uploading a document (or extracting it twice) only costs a hash.
+    """
+
+    def __init__(self, cache_dir, max_entries=64):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.memory = LRUCache(max_entries)
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_or_extract(self, data: bytes, extract, variant="default"):
+        """`variant` names the extractor settings, so different engines never share an entry."""
+        digest = hashlib.sha256(data).hexdigest()
+        key = f"{digest}.{variant}"
+        text = self.memory.get(key)
+        if text is not None:
+            return text
+        path = self.cache_dir / f"{key}.txt"
+        if path.exists():
+            text = path.read_bytes().decode("utf-8")
+            self.disk_hits += 1
+        else:
+            text = extract(data)
+            self.misses += 1
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, text.encode("utf-8"))
+        self.memory.put(key, text)
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+        }
+
+PDF_TEXT_CACHE = PdfTextCache(PDF_TEXT_CACHE_DIR, PDF_TEXT_CACHE_ENTRIES)
+
+def _read_pdf_bytes(pdf_file) -> bytes:
+    """Raw bytes of a path, a Streamlit UploadedFile or any binary file object."""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return pathlib.Path(pdf_file).read_bytes()
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    pdf_file.seek(0)
+    data = pdf_file.read()
+    pdf_file.seek(0)
+    return data
+
+def extract_text_from_pdf(pdf_file, engine=None, layout=None):
+    engine = engine or PDF_ENGINE
+    layout = PDF_LAYOUT if layout is None else layout
+    extractor = get_engine(engine)
+    return PDF_TEXT_CACHE.get_or_extract(
+        _read_pdf_bytes(pdf_file),
+        lambda data: extractor.extract(data, layout=layout),
+        variant=f"{engine}{'-layout' if layout else ''}",
+    )
+
+def pdf_cache_stats():
+    return PDF_TEXT_CACHE.stats()
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Job-description keywords weighted by BM25 against every stored posting.
+
+JobKeywordIndex keeps the document frequency of each term (single words and two-word phrases)
+over all job descriptions, so a posting's keywords are the terms it uses often that other
+postings rarely do, instead of a fixed vocabulary. The index lives in DB_DIR/job_index as a
+JSON snapshot plus an append-only log with one line per added job: create_new_job appends a
+line, and every COMPACT_EVERY lines the log is folded into a new snapshot. Other processes
+pick up new lines by reading the log from where they left off.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from file_management import DB_DIR
+from file_utils import atomic_write, file_lock, parse_log_line
+
+JOB_INDEX_DIR = DB_DIR / "job_index"
+COMPACT_EVERY = int(os.environ.get("ATS_JOB_INDEX_COMPACT_EVERY", "2000"))  # log lines per snapshot
+MAX_KEYWORDS = 20
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, including tool names such as "c++", "c#", "node.js" and "ci/cd"
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+SHORT_TERMS = {"c", "r"}  # single letters that are languages
+STOPWORDS = set("""
+a about above after all also an and any are as at be been being both but by can could do does
+each either etc for from had has have he her his how i if in into is it its just may more most
+must no not of on one or other our out over per should so such than that the their them then
+there these they this those through to too under up us very via was we well were what when where
+which while who will with within would you your
+ability able across based best candidate candidates company duties excellent experience good
+great highly ideal including job join key knowledge looking new opportunity plus position
+preferred proven qualifications related required requirements responsibilities responsible role
+skills strong team's understanding using work working year years
+""".split())
+
+
+def job_terms(text: str) -> tuple:
+    """
+    (term frequencies, length) of a job description. Terms are non-stopword words and pairs of
+    them written next to each other with nothing but whitespace between.
+    """
+    text = (text or "").lower()
+    terms = Counter()
+    length, previous, previous_end = 0, None, -1
+    for match in TOKEN_RE.finditer(text):
+        word = match.group()
+        if word in STOPWORDS or word.isdigit() or (len(word) < 2 and word not in SHORT_TERMS):
+            previous = None
+            continue
+        length += 1
+        terms[word] += 1
+        if previous and not text[previous_end:match.start()].strip():
+            terms[f"{previous} {word}"] += 1
+        previous, previous_end = word, match.end()
+    return terms, length
+
+
+class JobKeywordIndex:
+    def __init__(self, directory=JOB_INDEX_DIR):
+        self.directory = directory
+        self.snapshot_path = directory / "snapshot.json"
+        self._lock = threading.Lock()
+        self._snapshot_key = None  # (mtime, size) of the snapshot loaded
+        self._reset()
+
+    def _reset(self):
+        self.generation = 0
+        self.docs = 0
+        self.total_length = 0
+        self.df = Counter()
+        self.job_ids = set()
+        self._log_offset = 0
+        self._log_records = 0
+
+    def _log_path(self):
+        return self.directory / f"updates.{self.generation}.jsonl"
+
+    def exists(self) -> bool:
+        return self.snapshot_path.exists() or any(self.directory.glob("updates.*.jsonl"))
+
+    def _refresh_locked(self):
+        """Pick up a new snapshot, or log lines appended by other processes, since the last call."""
+        try:
+            stat = self.snapshot_path.stat()
+            key = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            key = None
+        if key != self._snapshot_key:
+            self._reset()
+            if key is not None:
+                with open(self.snapshot_path, "rb") as f:
+                    snapshot = json.load(f)
+                self.generation = snapshot["generation"]
+                self.docs = snapshot["docs"]
+                self.total_length = snapshot["total_length"]
+                self.df = Counter(snapshot["df"])
+                self.job_ids = set(snapshot["job_ids"])
+            self._snapshot_key = key
+
+        log_path = self._log_path()
+        if not log_path.exists() or log_path.stat().st_size <= self._log_offset:
+            return
+        with open(log_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # a line still being written is read next time
+        for line in data[:complete].split(b"\n"):
+            record = parse_log_line(line)
+            if record is not None:
+                self._apply(record)
+                self._log_records += 1
+        self._log_offset += complete
+
+    def _apply(self, record: dict) -> bool:
+        if record["job_id"] in self.job_ids:
+            return False
+        self.job_ids.add(record["job_id"])
+        self.docs += 1
+        self.total_length += record["length"]
+        self.df.update(record["terms"])
+        return True
+
+    def add(self, job_id, description: str) -> bool:
+        """Count one posting; False if this job_id is already indexed."""
+        return self.add_many([(job_id, description)]) == 1
+
+    def add_many(self, jobs) -> int:
+        """Count (job_id, description) pairs not indexed yet, in one locked append. Returns how many."""
+        records = []
+        for job_id, description in jobs:
+            terms, length = job_terms(description)
+            records.append({"job_id": str(job_id), "length": length, "terms": sorted(terms)})
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, file_lock(self.snapshot_path):
+            self._refresh_locked()
+            records = [r for r in records if r["job_id"] not in self.job_ids]
+            if not records:
+                return 0
+            log_path = self._log_path()
+            size = log_path.stat().st_size if log_path.exists() else 0
+            payload = b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records)
+            if size != self._log_offset:
+                payload = b"\n" + payload  # isolate a torn last line
+            with open(log_path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            added = sum(self._apply(r) for r in records)
+            self._log_offset = size + len(payload)
+            self._log_records += len(records)
+            if self._log_records >= COMPACT_EVERY:
+                self._compact_locked()
+        return added
+
+    def _compact_locked(self):
+        old_log = self._log_path()
+        self.generation += 1
+        snapshot = {
+            "generation": self.generation,
+            "docs": self.docs,
+            "total_length": self.total_length,
+            "df": self.df,
+            "job_ids": sorted(self.job_ids),
+        }
+        atomic_write(self.snapshot_path, json.dumps(snapshot, separators=(",", ":")).encode("utf-8"))
+        stat = self.snapshot_path.stat()
+        self._snapshot_key = (stat.st_mtime_ns, stat.st_size)
+        self._log_offset = self._log_records = 0
+        old_log.unlink(missing_ok=True)
+
+    def compact(self):
+        with self._lock, file_lock(self.snapshot_path):
+            self._refresh_locked()
+            self._compact_locked()
+
+    def keywords(self, description: str, limit: int = MAX_KEYWORDS) -> list:
+        """
+        The posting's `limit` best (term, weight) pairs by BM25, highest first. A word pair
+        counts as a phrase only if the posting repeats it or another posting uses it too.
+        """
+        with self._lock:
+            if self.snapshot_path.parent.exists():
+                self._refresh_locked()
+            docs, df = self.docs, self.df
+            average_length = self.total_length / docs if docs else 0
+        terms, length = job_terms(description)
+        average_length = average_length or length or 1
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        weights = {}
+        for term, tf in terms.items():
+            freq = df.get(term, 0)
+            if " " in term and tf < 2 and freq < 2:
+                continue
+            idf = math.log(1 + (docs - freq + 0.5) / (freq + 0.5))
+            weights[term] = idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+
+
+_job_index = None
+
+def get_job_index() -> JobKeywordIndex:
+    """The process-wide index, seeded from the store's existing postings the first time it is built."""
+    global _job_index
+    if _job_index is None:
+        index = JobKeywordIndex()
+        if not index.exists():
+            from file_management import get_store
+            try:
+                added = index.add_many(get_store().iter_job_descriptions())
+                if added:
+                    index.compact()
+                logging.info(f"Job keyword index seeded with {added} stored postings")
+            except Exception as e:
+                logging.warning(f"Could not seed the job keyword index from the store: {e}")
+        _job_index = index
+    return _job_index
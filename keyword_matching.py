@@ -0,0 +1,152 @@
+"""
+Whole-word keyword matching for ResumeOptimizer.
+
+A KeywordMatcher compiles its keywords into a regex shaped like a trie, so each text is
+scanned once however many keywords there are, instead of once per keyword. Matches respect
+word boundaries ("c" does not match "experience", "git" does not match "github"), treat "+"
+and "#" as part of a word so "c++" and "c#" stay distinct from "c", let a space in a keyword
+match any whitespace, and accept a plural "s"/"es" on keywords of three letters or more.
+A keyword implies the keywords it contains: a bullet mentioning "project management" also
+counts for "project" and "management".
+"""
+import functools
+import re
+
+WORD_CHARS = r"\w+#"  # characters that continue a word, for the boundary checks
+WORD_CHAR_RE = re.compile(rf"[{WORD_CHARS}]")
+PLURAL_SUFFIXES = ("es", "s")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(str(keyword).lower().split())
+
+
+def _trie_pattern(words) -> str:
+    """Regex alternation of `words` factored into a trie: shared prefixes are matched once."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end of a keyword
+
+    def build(node) -> str:
+        branches = [(r"\s+" if ch == " " else re.escape(ch)) + build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Greedy: the longest keyword is tried first, shorter ones on backtracking
+            pattern = f"(?:{pattern})?"
+        return pattern
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """The keywords of one job description, compiled once and matched against many texts."""
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(k for k in map(normalize_keyword, keywords) if k))
+        self._known = set(self.keywords)
+        self._implied = {}
+        self._matched = {}  # matched text as written -> (keywords it stands for, whether it straddles)
+        self._regex = self._overlapping = None
+        if self.keywords:
+            trie = f"{_trie_pattern(self.keywords)}(?:e?s)?"
+            # Texts are lowercased before matching: much cheaper than re.IGNORECASE
+            # Longest keyword at each word, consuming it: the fast scan
+            self._regex = re.compile(rf"(?<![{WORD_CHARS}])({trie})(?![{WORD_CHARS}])")
+            # Lookahead capture: a match at every word start, even inside a longer match
+            self._overlapping = re.compile(rf"(?<![{WORD_CHARS}])(?=({trie})(?![{WORD_CHARS}]))")
+        self._straddling = self._find_straddling()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _canonical(self, matched: str):
+        matched = normalize_keyword(matched)
+        if matched in self._known:
+            return matched
+        for suffix in PLURAL_SUFFIXES:
+            stem = matched[:-len(suffix)]
+            if matched.endswith(suffix) and stem in self._known and len(stem) >= 3 and stem[-1].isalpha():
+                return stem
+        return None
+
+    def _find_straddling(self) -> set:
+        """
+        Keywords whose tail can start another keyword ("ms project" + "project management").
+        The fast scan consumes the first and misses the second, so texts where one of these
+        matched are scanned again with the overlapping pattern.
+        """
+        prefixes = {k[:end] for k in self.keywords for end in range(1, len(k))
+                    if not WORD_CHAR_RE.match(k[end])}
+        return {k for k in self.keywords for start in range(1, len(k))
+                if not WORD_CHAR_RE.match(k[start - 1]) and WORD_CHAR_RE.match(k[start]) and k[start:] in prefixes}
+
+    def _scan(self, text: str):
+        """The longest keyword starting at each word of `text`, overlapping ones included."""
+        for matched in self._overlapping.findall(text.lower()):
+            keyword = self._canonical(matched)
+            if keyword:
+                yield keyword
+
+    def _closure(self, keyword: str) -> frozenset:
+        """`keyword` and every keyword occurring in it as whole words."""
+        if keyword not in self._implied:
+            found = {keyword}
+            # Shorter keywords starting at the same word are hidden by the longest match
+            for end, ch in enumerate(keyword):
+                if end and not WORD_CHAR_RE.match(ch) and keyword[:end] in self._known:
+                    found |= self._closure(keyword[:end])
+            for inner in self._scan(keyword):
+                if inner != keyword:
+                    found |= self._closure(inner)
+            self._implied[keyword] = frozenset(found)
+        return self._implied[keyword]
+
+    def find(self, text: str) -> set:
+        """All keywords occurring in `text` as whole words."""
+        if not text or self._regex is None:
+            return set()
+        text = text.lower()
+        found, straddles = self._lookup(self._regex.findall(text))
+        if straddles:
+            found, _ = self._lookup(self._overlapping.findall(text))
+        return found
+
+    def _lookup(self, matches) -> tuple:
+        found, straddles = set(), False
+        for matched in set(matches):
+            entry = self._matched.get(matched)
+            if entry is None:
+                keyword = self._canonical(matched)
+                entry = self._matched[matched] = (
+                    (self._closure(keyword), keyword in self._straddling) if keyword else (frozenset(), False)
+                )
+            found |= entry[0]
+            straddles = straddles or entry[1]
+        return found, straddles
+
+    def contains_any(self, text: str) -> bool:
+        if not text or self._regex is None:
+            return False
+        return any(self._canonical(matched) for matched in self._regex.findall(text.lower()))
+
+    def score(self, text: str) -> float:
+        """Share of the keywords found in `text`, as ResumeOptimizer.score_relevance reports it."""
+        return len(self.find(text)) / len(self.keywords) if self.keywords else 0.0
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_matcher(keywords: tuple) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def keyword_matcher(keywords) -> KeywordMatcher:
+    """A matcher for `keywords`; keyword sets seen before, in any order, reuse their compiled matcher."""
+    if isinstance(keywords, KeywordMatcher):
+        return keywords
+    return _cached_matcher(tuple(sorted(set(keywords))))
@@ -1,13 +1,200 @@
+import asyncio
+import atexit
+import hashlib
+import json
 import logging
+import os
+import threading
+import time
 from pathlib import Path
-from structured_output import StructuredOutput  # Your Pydantic model
+
+import httpx
+from caching import DiskCache, TieredCache
+from candidate_profile import apply_tailoring, profile_outline
+from cv_sections import (current_value, merge_section, parse_section, relevant_excerpts, section_label,
+                         section_query, section_schema)
+from llm_cassette import CassetteChatModel
+from prompt_compaction import compact_sources, normalize_whitespace, trim_to_budget
+from rate_limiting import RateLimiter, RetryPolicy, estimate_tokens
+from structured_output import StructuredOutput, TailoringOutput  # Your Pydantic model
+from structured_stream import SectionStreamParser, schema_fragment
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
+# -----------------------
+# RESPONSE CACHE
+# -----------------------
+
+DB_DIR = Path(os.environ.get("ATS_DB_DIR", Path(__file__).resolve().parent / "db"))
+LLM_CACHE_FILE = DB_DIR / "llm_cache.sqlite3"
+LLM_CACHE_TTL = float(os.environ.get("ATS_LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_MB = float(os.environ.get("ATS_LLM_CACHE_MAX_MB", "64"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("ATS_LLM_CONCURRENCY", "4"))  # in-flight requests per batch
+PROMPT_TOKEN_BUDGET = int(os.environ.get("ATS_PROMPT_TOKEN_BUDGET", "6000"))  # resume + LinkedIn, estimated
+SECTION_EXCERPT_TOKENS = int(os.environ.get("ATS_SECTION_EXCERPT_TOKENS", "800"))  # sources per section rewrite
+SECTION_JOB_TOKENS = 600  # job description per section rewrite
+
+_response_cache = None
+
+
+def get_response_cache() -> TieredCache:
+    """Process-wide generate_cv cache: memory LRU in front of a SQLite file."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = TieredCache(
+            DiskCache(LLM_CACHE_FILE, ttl_seconds=LLM_CACHE_TTL, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024))
+        )
+    return _response_cache
+
+
+# -----------------------
+# RATE LIMITING
+# -----------------------
+
+# Groq account limits; every agent and chat in the process draws from the same budget
+GROQ_RPM = float(os.environ.get("ATS_GROQ_RPM", "30"))
+GROQ_TPM = float(os.environ.get("ATS_GROQ_TPM", "12000"))
+LLM_MAX_ATTEMPTS = int(os.environ.get("ATS_LLM_MAX_ATTEMPTS", "5"))
+CV_COMPLETION_TOKENS = 1500  # budgeted output of one generate_cv call
+CHAT_COMPLETION_TOKENS = 500
+SECTION_COMPLETION_TOKENS = 400
+PROFILE_COMPLETION_TOKENS = 3000  # the whole career, untrimmed
+TAILORING_COMPLETION_TOKENS = 400
+
+# Follow-up message when a structured answer is cut off or has sections that cannot be repaired
+REPAIR_PROMPT = """
+        Your previous answer was cut off or had invalid sections.
+        Already received, do NOT repeat: {received_sections}
+
+        Return a JSON object with ONLY these keys: {pending_sections}
+        Their JSON schema: {pending_schema}
+        """
+
+_retry_policy = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Process-wide limiter + retry scheduler used by default by LLMAgent and LLM_Chat."""
+    global _retry_policy
+    if _retry_policy is None:
+        # Replayed answers never reach Groq, so they do not spend its budget
+        limiter = None if LLM_BACKEND == "replay" else RateLimiter(GROQ_RPM, GROQ_TPM)
+        _retry_policy = RetryPolicy(limiter, max_attempts=LLM_MAX_ATTEMPTS)
+    return _retry_policy
+
+
+def rate_limit_stats() -> dict:
+    policy = get_retry_policy()
+    limiter_stats = policy.limiter.stats() if policy.limiter else RateLimiter(0, 0).stats()
+    return {**limiter_stats, **policy.stats()}
+
+
+# -----------------------
+# CHAT MODEL BACKENDS
+# -----------------------
+
+# groq: live API. record / replay / auto: through a cassette (see llm_cassette.py)
+LLM_BACKEND = os.environ.get("ATS_LLM_BACKEND", "groq").strip().lower()
+LLM_CASSETTE = os.environ.get("ATS_LLM_CASSETTE", str(DB_DIR / "llm_cassette.jsonl"))
+_replay_latency = os.environ.get("ATS_CASSETTE_LATENCY", "recorded")
+CASSETTE_LATENCY = None if _replay_latency == "recorded" else float(_replay_latency)
+CASSETTE_TOKEN_DELAY = float(os.environ.get("ATS_CASSETTE_TOKEN_DELAY", "0"))
+
+
+def make_chat_model(model_name: str, temperature: float, api_key: str, base_url: str = None,
+                    http_client: httpx.Client = None, backend: str = None, cassette: str = None):
+    """ChatGroq, optionally wrapped in a record/replay cassette."""
+    backend = backend or LLM_BACKEND
+    groq = None
+    if backend != "replay":
+        groq = ChatGroq(
+            model=model_name,
+            temperature=temperature,
+            api_key=api_key,
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=0  # retries and throttling are handled by RetryPolicy
+        )
+    if backend == "groq":
+        return groq
+    return CassetteChatModel(
+        inner=groq, path=cassette or LLM_CASSETTE, mode=backend, model_name=model_name,
+        temperature=temperature, latency=CASSETTE_LATENCY, token_delay=CASSETTE_TOKEN_DELAY,
+    )
+
+
+def _messages_tokens(messages: list) -> int:
+    contents = [m.get("content", "") if isinstance(m, dict) else m[1] for m in messages]
+    return sum(estimate_tokens(str(c)) for c in contents)
+
+
+# -----------------------
+# CLIENT REGISTRY
+# -----------------------
+
+_http_client = None
+_registry = {}  # (kind, model, key path, base_url) -> (key file mtime, instance)
+_registry_lock = threading.RLock()
+
+
+def shared_http_client() -> httpx.Client:
+    """One keep-alive connection pool shared by every ChatGroq built in this process."""
+    global _http_client
+    with _registry_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120)
+            )
+        return _http_client
+
+
+def _registered(registry_key, api_key_path, factory):
+    path = Path(api_key_path)
+    version = path.stat().st_mtime_ns if path.exists() else None
+    with _registry_lock:
+        entry = _registry.get(registry_key)
+        if entry is None or entry[0] != version:
+            # First use, or the key file changed: build once and replace the stale instance
+            entry = _registry[registry_key] = (version, factory())
+        return entry[1]
+
+
+def get_agent(api_key_path: str, model_name: str = "llama-3.3-70b-versatile", base_url: str = None) -> "LLMAgent":
+    """
+    Process-wide LLMAgent per (model, API key file, endpoint). Streamlit reruns and sessions
+    share it, so the key, chain and HTTP connections are set up once instead of per click.
+    """
+    return _registered(
+        ("agent", model_name, str(Path(api_key_path).resolve()), base_url), api_key_path,
+        lambda: LLMAgent(api_key_path, model_name=model_name, base_url=base_url),
+    )
+
+
+def get_chat(api_key_path: str, base_url: str = None) -> "LLM_Chat":
+    """Process-wide LLM_Chat per (API key file, endpoint); see get_agent."""
+    return _registered(
+        ("chat", None, str(Path(api_key_path).resolve()), base_url), api_key_path,
+        lambda: LLM_Chat(api_key_path, base_url=base_url),
+    )
+
+
+@atexit.register
+def shutdown_clients():
+    """Forget registered agents and close the shared connection pool."""
+    global _http_client
+    with _registry_lock:
+        _registry.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
 
 class LLMAgent:
-    def __init__(self, api_key_path: str, model_name: str = "llama-3.3-70b-versatile"):
+    def __init__(self, api_key_path: str, model_name: str = "llama-3.3-70b-versatile",
+                 temperature: float = 0.25, cache: TieredCache = None, base_url: str = None,
+                 http_client: httpx.Client = None, retry: RetryPolicy = None,
+                 token_budget: int = PROMPT_TOKEN_BUDGET, backend: str = None):
         try:
             api_key_file = Path(api_key_path)
             if not api_key_file.exists():
@@ -18,28 +205,53 @@ class LLMAgent:
                 raise ValueError("API key file is empty")
                 
             self.model_name = model_name
+            self.temperature = temperature
+            self.base_url = base_url  # None = Groq; e.g. a fake_llm_server.py address for tests
+            self.http_client = http_client or shared_http_client()
+            self.retry = retry or get_retry_policy()
+            self.token_budget = token_budget
+            self.backend = backend  # None = ATS_LLM_BACKEND
+            self._local = threading.local()
+            self.cache = cache if cache is not None else get_response_cache()
             self.llm = self._initialize_llm()
             self.parser = JsonOutputParser(pydantic_object=StructuredOutput)
-            self.chain = self._build_chain()
+            self.format_instructions = self.parser.get_format_instructions()  # schema text, built once
+            # Bare schema: the parser's own instructions are several times longer than the answer
+            self.tailoring_instructions = json.dumps(TailoringOutput.model_json_schema(), separators=(",", ":"))
+            # CV, profile and tailoring answers stay raw text: SectionStreamParser validates them
+            # section by section as they stream, and the repair chains re-request what failed
+            self.chain = self._build_chain(parser=StrOutputParser())
+            self.repair_chain = self._build_chain(parser=StrOutputParser(), repair=True)
+            self.section_chain = self._build_chain(self._get_section_prompt(), JsonOutputParser())
+            self.profile_chain = self._build_chain(self._get_profile_prompt(), StrOutputParser())
+            self.profile_repair_chain = self._build_chain(self._get_profile_prompt(), StrOutputParser(), repair=True)
+            self.tailoring_chain = self._build_chain(self._get_tailoring_prompt(), StrOutputParser())
+            self.tailoring_repair_chain = self._build_chain(self._get_tailoring_prompt(), StrOutputParser(), repair=True)
         except Exception as e:
             logging.error(f"Failed to initialize LLMAgent: {e}")
             raise
 
     def _initialize_llm(self):
-        return ChatGroq(
-            model=self.model_name,
-            temperature=0.25,  # concise, factual output
-            api_key=self.API_KEY
+        return make_chat_model(
+            self.model_name,
+            self.temperature,  # 0.25 default: concise, factual output
+            self.API_KEY,
+            base_url=self.base_url,
+            http_client=self.http_client,
+            backend=self.backend
         )
 
-    def _build_chain(self):
-        prompt_template = ChatPromptTemplate.from_messages([
+    def _build_chain(self, user_prompt: str = None, parser=None, repair: bool = False):
+        messages = [
             ("system", self._get_system_prompt()),
-            ("user", self._get_user_prompt())
-        ])
-        return prompt_template.partial(
-            format_instructions=self.parser.get_format_instructions()
-        ) | self.llm | self.parser
+            ("user", user_prompt or self._get_user_prompt())
+        ]
+        if repair:
+            messages.append(("user", REPAIR_PROMPT))
+        prompt_template = ChatPromptTemplate.from_messages(messages)
+        if "format_instructions" in prompt_template.input_variables:
+            prompt_template = prompt_template.partial(format_instructions=self.format_instructions)
+        return prompt_template | self.llm | (parser or self.parser)
 
     def _get_system_prompt(self) -> str:
         return """
@@ -71,40 +283,413 @@ class LLMAgent:
         - Include all contact links present in the source (LinkedIn, website, GitHub)
         - Keep the resume concise, one-page style
         - Do NOT invent names, dates, companies, or bullets not present in the source
+        - Prioritize the experience and skills most relevant to the job description
+        - Always include the projects and volunteering keys, even if empty
         """
 
-    def generate_cv(self, resume_text: str, linkedin_text: str, job_description: str) -> StructuredOutput:
-        """Returns a structured CV object based on PDF resume and LinkedIn exports."""
+    def _get_profile_prompt(self) -> str:
+        return """
+        Here are the verified documents:
+
+        RESUME TEXT:
+        {resume_text}
+
+        LINKEDIN TEXT:
+        {linkedin_text}
+
+        Build a complete structured JSON profile of the candidate matching this schema: {format_instructions}
+
+        Requirements:
+        - This profile is reused for every job application: do NOT tailor, rank or shorten it
+        - Include every role, project, volunteering entry, degree, course and certification in the sources
+        - Keep every accomplishment bullet, merging bullets that both documents state
+        - Include all contact links present in the source (LinkedIn, website, GitHub)
+        - Do NOT invent names, dates, companies, or bullets not present in the source
+        - Always include the projects and volunteering keys, even if empty
+        """
+
+    def _get_tailoring_prompt(self) -> str:
+        return """
+        Tailor the candidate profile below to the job description.
+        Roles, bullets and projects are numbered; answer with those [numbers].
+
+        PROFILE:
+        {profile}
+
+        JOB DESCRIPTION:
+        {job_description}
+
+        Return JSON matching this schema: {tailoring_instructions}
+
+        Requirements:
+        - summary: 2-3 sentences on the candidate's fit for this job, using only facts from the profile
+        - skills: up to 15 profile skills most relevant to the job, most relevant first, spelled as in the profile
+        - experience: each role worth showing, with 1-5 of its bullet numbers, most relevant first
+        - projects: numbers of the projects worth showing for this job, most relevant first
+        - Never add skills, roles or bullets that are not in the profile
+        """
+
+    def _get_section_prompt(self) -> str:
+        return """
+        Rewrite only the {section_label} of an existing resume.
+
+        SECTION: {section}
+
+        CURRENT VALUE:
+        {current_value}
+
+        SOURCE EXCERPTS:
+        {source_excerpts}
+
+        JOB DESCRIPTION:
+        {job_description}
+
+        EXTRA INSTRUCTIONS:
+        {instructions}
+
+        Return a JSON object with the single key "{section}", whose value matches this JSON schema: {section_schema}
+
+        Requirements:
+        - Use only facts from the source excerpts and the current value
+        - Do NOT invent names, dates, companies, or bullets not present in the source
+        - Keep role, company, organization and dates unchanged when rewriting a single entry
+        - Produce 1-5 concise bullets per entry emphasizing outcomes relevant to the job description
+        """
+
+    def cache_key(self, llm_input: dict, user_prompt: str = None) -> str:
+        """Stable hash of everything that determines the model's answer."""
+        material = {
+            "model": self.model_name,
+            "base_url": self.base_url,
+            "temperature": self.temperature,
+            "system": self._get_system_prompt(),
+            "user": user_prompt or self._get_user_prompt(),
+            "inputs": llm_input,
+        }
+        canonical = json.dumps(material, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    @property
+    def last_profile_report(self):
+        """Size and latency of the last build_profile call on this thread."""
+        return getattr(self._local, "profile_report", None)
+
+    @property
+    def last_tailoring_report(self):
+        """Size and latency of the last tailor_cv call on this thread."""
+        return getattr(self._local, "tailoring_report", None)
+
+    @property
+    def last_section_report(self):
+        """Size and latency of the last regenerate_section call on this thread."""
+        return getattr(self._local, "section_report", None)
+
+    @property
+    def last_parse_report(self):
+        """Sections repaired locally or requested again by the last structured answer on this thread."""
+        return getattr(self._local, "parse_report", None)
+
+    @property
+    def last_compaction(self):
+        """Token report of the last prompt this thread built (see prompt_compaction.compact_sources)."""
+        return getattr(self._local, "compaction", None)
+
+    def generate_cv(self, resume_text: str, linkedin_text: str, job_description: str,
+                    bypass_cache: bool = False, on_section=None) -> StructuredOutput:
+        """
+        Returns a structured CV object based on PDF resume and LinkedIn exports.
+        Identical inputs are answered from the response cache; bypass_cache forces a new call.
+        `on_section(key, value)` is called with each CV section as soon as it has streamed in.
+        """
+        try:
+            llm_input = self._build_input(resume_text, linkedin_text, job_description)
+            key = self.cache_key(llm_input)
+            if not bypass_cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+
+            # The LLM produces all structured fields directly
+            started = time.perf_counter()
+            final_cv = self._structured_call(self.chain, self.repair_chain, StructuredOutput, llm_input,
+                                             self._input_tokens(llm_input), on_section)
+            return self._accept(key, final_cv, time.perf_counter() - started)
+        except Exception as e:
+            return self._error_output(e)
+
+    async def agenerate_cv(self, resume_text: str, linkedin_text: str, job_description: str,
+                           bypass_cache: bool = False) -> StructuredOutput:
+        """Async generate_cv: same cache and error handling, non-blocking network call."""
+        try:
+            llm_input = self._build_input(resume_text, linkedin_text, job_description)
+            key = self.cache_key(llm_input)
+            if not bypass_cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+
+            started = time.perf_counter()
+            final_cv = await self._astructured_call(self.chain, self.repair_chain, StructuredOutput, llm_input,
+                                                    self._input_tokens(llm_input))
+            return self._accept(key, final_cv, time.perf_counter() - started)
+        except Exception as e:
+            return self._error_output(e)
+
+    async def agenerate_cv_batch(self, resume_text: str, linkedin_text: str, job_descriptions: list,
+                                 max_concurrency: int = None, bypass_cache: bool = False) -> list:
+        """One CV per job description, at most max_concurrency requests in flight, in input order."""
+        semaphore = asyncio.Semaphore(max_concurrency or LLM_MAX_CONCURRENCY)
+
+        async def generate_one(job_description):
+            async with semaphore:
+                return await self.agenerate_cv(resume_text, linkedin_text, job_description, bypass_cache)
+
+        # agenerate_cv turns failures into error CVs, so one bad posting never cancels the rest
+        return await asyncio.gather(*(generate_one(jd) for jd in job_descriptions))
+
+    def generate_cv_batch(self, resume_text: str, linkedin_text: str, job_descriptions: list,
+                          max_concurrency: int = None, bypass_cache: bool = False) -> list:
+        """Blocking wrapper around agenerate_cv_batch for callers without an event loop."""
+        return asyncio.run(self.agenerate_cv_batch(
+            resume_text, linkedin_text, job_descriptions, max_concurrency, bypass_cache
+        ))
+
+    def regenerate_section(self, cv: dict, section: str, resume_text: str, linkedin_text: str,
+                           job_description: str, index: int = None, instructions: str = "",
+                           bypass_cache: bool = False) -> dict:
+        """
+        Rewrite one section of an existing CV ("summary", "skills", ...) or, with `index`, one
+        entry of a list section (e.g. a single experience). The prompt carries only the source
+        paragraphs related to that part and its schema fragment, and the answer is merged into a
+        copy of `cv`. Unlike generate_cv, failures raise so the caller keeps the CV it has.
+        """
+        if hasattr(cv, "model_dump"):
+            cv = cv.model_dump()
+        llm_input = self._build_section_input(cv, section, index, resume_text, linkedin_text,
+                                              job_description, instructions)
+        key = self.cache_key(llm_input, self._get_section_prompt())
+        started = time.perf_counter()
+        answer = None if bypass_cache else self.cache.get(key)
+        cached = answer is not None
+        if not cached:
+            answer = self.retry.call(
+                lambda: self.section_chain.invoke(llm_input),
+                estimate_tokens(self._get_section_prompt() + "".join(llm_input.values())) + SECTION_COMPLETION_TOKENS
+            )
+        value = parse_section(answer, section, index)
+        if not cached:
+            self.cache.put(key, {section: value}, latency=time.perf_counter() - started)
+
+        self._local.section_report = self._call_report(
+            llm_input["section_label"], self._get_section_prompt(), llm_input, {section: value}, started, cached
+        )
+        return merge_section(cv, section, value, index)
+
+    def build_profile(self, resume_text: str, linkedin_text: str, bypass_cache: bool = False,
+                      on_section=None) -> dict:
+        """
+        Parse resume + LinkedIn text into one complete, untailored StructuredOutput dict.
+        Meant to run once per candidate (see candidate_profile.ensure_user_profile); failures raise.
+        `on_section` works as in generate_cv.
+        """
+        llm_input = self._build_profile_input(resume_text, linkedin_text)
+        key = self.cache_key(llm_input, self._get_profile_prompt())
+        started = time.perf_counter()
+        profile = None if bypass_cache else self.cache.get(key)
+        cached = profile is not None
+        if not cached:
+            tokens = estimate_tokens(self._get_profile_prompt() + "".join(llm_input.values())) + PROFILE_COMPLETION_TOKENS
+            profile = self._structured_call(self.profile_chain, self.profile_repair_chain, StructuredOutput,
+                                            llm_input, tokens, on_section)
+            self.cache.put(key, profile, latency=time.perf_counter() - started)
+        self._local.profile_report = self._call_report(
+            "profile", self._get_profile_prompt(), llm_input, profile, started, cached
+        )
+        return profile
+
+    def tailor_cv(self, profile: dict, job_description: str, bypass_cache: bool = False) -> dict:
+        """
+        The CV for one job from a stored profile (build_profile). The model only picks roles,
+        bullets, skills and projects by number and writes the summary, so the prompt carries no
+        source documents and the answer is a fraction of a full CV. Errors return an error CV,
+        like generate_cv.
+        """
         try:
-            # Validate inputs
-            if not resume_text or not resume_text.strip():
-                raise ValueError("Resume text is empty or missing")
             if not job_description or not job_description.strip():
                 raise ValueError("Job description is empty or missing")
-            
             llm_input = {
-                "resume_text": resume_text,
-                "linkedin_text": linkedin_text or "",  # Allow empty LinkedIn
-                "job_description": job_description,
-                "format_instructions": self.parser.get_format_instructions()
+                "profile": profile_outline(profile),
+                "job_description": normalize_whitespace(job_description),
+                "tailoring_instructions": self.tailoring_instructions,
             }
+            key = self.cache_key(llm_input, self._get_tailoring_prompt())
+            started = time.perf_counter()
+            tailoring = None if bypass_cache else self.cache.get(key)
+            cached = tailoring is not None
+            if not cached:
+                tokens = estimate_tokens(self._get_tailoring_prompt() + "".join(llm_input.values())) + TAILORING_COMPLETION_TOKENS
+                tailoring = self._structured_call(self.tailoring_chain, self.tailoring_repair_chain, TailoringOutput,
+                                                  llm_input, tokens)
+                # The small answer is cached, not the CV: a rebuilt profile reuses it by position
+                self.cache.put(key, tailoring, latency=time.perf_counter() - started)
+            self._local.tailoring_report = self._call_report(
+                "tailoring", self._get_tailoring_prompt(), llm_input, tailoring, started, cached
+            )
+            return apply_tailoring(profile, tailoring)
+        except Exception as e:
+            return self._error_output(e)
 
-            # The LLM produces all structured fields directly
-            final_cv = self.chain.invoke(llm_input)
-            
-            # Validate the output
-            if not isinstance(final_cv, (dict, StructuredOutput)):
-                raise ValueError("LLM returned invalid response format")
-                
-            return final_cv
-            
+    def _structured_call(self, chain, repair_chain, model, llm_input: dict, tokens: int, on_section=None) -> dict:
+        """
+        Stream `chain`'s JSON answer through a SectionStreamParser, then ask `repair_chain` for
+        only the sections that were cut off or could not be repaired locally. Returns the
+        validated dict; raises when not a single section could be read.
+        """
+        started = time.perf_counter()
+        parser = SectionStreamParser(model, on_section)
+        try:
+            for chunk in self.retry.stream(lambda: chain.stream(llm_input), tokens):
+                parser.feed(chunk)
         except Exception as e:
-            logging.error(f"Error generating CV: {e}")
-            # Return a minimal valid structure instead of crashing
-            return StructuredOutput(
-                name="Error - Please Try Again",
-                summary=f"Error occurred during generation: {str(e)[:100]}..."
-            )
+            if not parser.sections:
+                raise
+            # Keep what arrived; the rest is re-requested below
+            logging.warning(f"Answer stream broke off after {list(parser.sections)}: {e}")
+        parser.finish()
+        pending, unresolved = parser.pending(), []
+        if pending:
+            answer = self.retry.call(lambda: repair_chain.invoke(self._repair_input(parser, llm_input, pending)), tokens)
+            unresolved = parser.merge(answer, pending)
+        return self._parsed(parser, pending, unresolved, started)
+
+    async def _astructured_call(self, chain, repair_chain, model, llm_input: dict, tokens: int) -> dict:
+        """Async _structured_call; the answer is parsed once complete, with no per-section callback."""
+        started = time.perf_counter()
+        parser = SectionStreamParser(model)
+        parser.feed(await self.retry.acall(lambda: chain.ainvoke(llm_input), tokens))
+        parser.finish()
+        pending, unresolved = parser.pending(), []
+        if pending:
+            repair_input = self._repair_input(parser, llm_input, pending)
+            unresolved = parser.merge(await self.retry.acall(lambda: repair_chain.ainvoke(repair_input), tokens), pending)
+        return self._parsed(parser, pending, unresolved, started)
+
+    @staticmethod
+    def _repair_input(parser: SectionStreamParser, llm_input: dict, pending: list) -> dict:
+        logging.info(f"Re-requesting sections {pending}; invalid: {parser.invalid}")
+        return dict(
+            llm_input,
+            received_sections=", ".join(parser.sections) or "nothing",
+            pending_sections=", ".join(pending),
+            pending_schema=schema_fragment(parser.model, pending),
+        )
+
+    def _parsed(self, parser: SectionStreamParser, requested: list, unresolved: list, started: float) -> dict:
+        if not parser.sections:
+            raise ValueError(f"LLM answer could not be parsed: {parser.invalid or 'no JSON object'}")
+        self._local.parse_report = {
+            "sections": len(parser.sections),
+            "repaired": sorted(set(parser.repaired)),
+            "re_requested": requested,
+            "unresolved": unresolved,
+            "latency_s": round(time.perf_counter() - started, 3),
+        }
+        return parser.result()
+
+    def _call_report(self, target: str, user_prompt: str, llm_input: dict, answer, started: float,
+                     cached: bool) -> dict:
+        return {
+            "target": target,
+            "input_tokens": estimate_tokens(self._get_system_prompt() + user_prompt + "".join(llm_input.values())),
+            "output_tokens": estimate_tokens(json.dumps(answer, ensure_ascii=False)),
+            "latency_s": round(time.perf_counter() - started, 3),
+            "cached": cached,
+        }
+
+    def _build_profile_input(self, resume_text: str, linkedin_text: str) -> dict:
+        if not resume_text or not resume_text.strip():
+            raise ValueError("Resume text is empty or missing")
+        resume_text, linkedin_text, report = compact_sources(resume_text, linkedin_text or "", self.token_budget)
+        self._local.compaction = report
+        logging.info(f"Profile sources compacted: {report}")
+        return {
+            "resume_text": resume_text,
+            "linkedin_text": linkedin_text,
+            "format_instructions": self.format_instructions
+        }
+
+    def _build_section_input(self, cv: dict, section: str, index: int, resume_text: str,
+                             linkedin_text: str, job_description: str, instructions: str) -> dict:
+        if not resume_text or not resume_text.strip():
+            raise ValueError("Resume text is empty or missing")
+        schema = section_schema(section, index)  # also rejects unknown sections and indexes
+        job_description = trim_to_budget(normalize_whitespace(job_description), SECTION_JOB_TOKENS)
+        value = current_value(cv, section, index)
+
+        # Deduplicated sources, then only the paragraphs that talk about this part of the CV
+        resume_text, linkedin_text, _ = compact_sources(resume_text, linkedin_text or "")
+        excerpts = relevant_excerpts(
+            f"{resume_text}\n\n{linkedin_text}", section_query(cv, section, index, job_description),
+            SECTION_EXCERPT_TOKENS,
+            min_share=0.0 if index is None else 0.5  # one entry comes from one or two places
+        )
+        return {
+            "section": section,
+            "section_label": section_label(cv, section, index),
+            "current_value": json.dumps(value, ensure_ascii=False),
+            "source_excerpts": excerpts or "(none found; rely on the current value)",
+            "job_description": job_description,
+            "instructions": normalize_whitespace(instructions) or "None",
+            "section_schema": schema,
+        }
+
+    def _build_input(self, resume_text: str, linkedin_text: str, job_description: str) -> dict:
+        # Validate inputs
+        if not resume_text or not resume_text.strip():
+            raise ValueError("Resume text is empty or missing")
+        if not job_description or not job_description.strip():
+            raise ValueError("Job description is empty or missing")
+
+        # LinkedIn repeats most of the resume; send each fact once and stay within budget
+        resume_text, linkedin_text, report = compact_sources(
+            resume_text, linkedin_text or "", self.token_budget  # Allow empty LinkedIn
+        )
+        self._local.compaction = report
+        logging.info(f"Prompt sources compacted: {report}")
+
+        return {
+            "resume_text": resume_text,
+            "linkedin_text": linkedin_text,
+            "job_description": normalize_whitespace(job_description),
+            "format_instructions": self.format_instructions
+        }
+
+    def _input_tokens(self, llm_input: dict) -> int:
+        prompt = self._get_system_prompt() + self._get_user_prompt() + "".join(llm_input.values())
+        return estimate_tokens(prompt) + CV_COMPLETION_TOKENS
+
+    def _accept(self, key: str, final_cv, latency: float):
+        # Validate the output
+        if not isinstance(final_cv, (dict, StructuredOutput)):
+            raise ValueError("LLM returned invalid response format")
+
+        # Only successful generations are cached; errors are never stored
+        if isinstance(final_cv, StructuredOutput):
+            final_cv = final_cv.model_dump()
+        self.cache.put(key, final_cv, latency=latency)
+        return final_cv
+
+    @staticmethod
+    def _error_output(e: Exception) -> StructuredOutput:
+        logging.error(f"Error generating CV: {e}")
+        # Return a minimal valid structure instead of crashing
+        return StructuredOutput(
+            name="Error - Please Try Again",
+            summary=f"Error occurred during generation: {str(e)[:100]}..."
+        )
 
 
 # -----------------------
@@ -112,15 +697,29 @@ class LLMAgent:
 # -----------------------
 
 class LLM_Chat:
-    def __init__(self, api_key_path: str):
-        self.API_KEY = Path(api_key_path).read_text()
+    def __init__(self, api_key_path: str, base_url: str = None, http_client: httpx.Client = None,
+                 retry: RetryPolicy = None, backend: str = None):
+        self.API_KEY = Path(api_key_path).read_text().strip()
+        self.base_url = base_url
+        self.backend = backend
+        self.http_client = http_client or shared_http_client()
+        self.retry = retry or get_retry_policy()
         self.llm = self._initialize_llm()
+        self._local = threading.local()  # one shared instance serves many Streamlit sessions
+
+    @property
+    def last_timing(self):
+        """{"ttft", "total", "chunks"} of the last stream this thread finished, or None."""
+        return getattr(self._local, "timing", None)
 
     def _initialize_llm(self):
-        return ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            api_key=self.API_KEY
+        return make_chat_model(
+            "llama-3.3-70b-versatile",
+            0.3,
+            self.API_KEY,
+            base_url=self.base_url,
+            http_client=self.http_client,
+            backend=self.backend
         )
 
     def get_chat_answer(self, final_text_prompt: list) -> list:
@@ -129,5 +728,37 @@ class LLM_Chat:
         """
         prompt = ChatPromptTemplate.from_messages(final_text_prompt)
         chain = prompt | self.llm | StrOutputParser()
-        response = chain.invoke({})
+        tokens = _messages_tokens(final_text_prompt) + CHAT_COMPLETION_TOKENS
+        response = self.retry.call(lambda: chain.invoke({}), tokens)
         return [{"content": response}]
+
+    def summarize_turns(self, summary: str, messages: list, max_tokens: int = 300) -> str:
+        """Fold chat messages into a running summary (the summarizer for ConversationMemory)."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = [
+            ("system", "You keep a running summary of a resume-coaching chat. Keep requested changes, "
+                       "decisions, facts about the candidate and open questions; drop pleasantries. "
+                       f"Reply with the updated summary only, at most {max_tokens * 3 // 4} words."),
+            ("user", f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"),
+        ]
+        tokens = _messages_tokens(prompt) + max_tokens
+        return self.retry.call(lambda: self.llm.invoke(prompt), tokens).content
+
+    def stream_chat_answer(self, final_text_prompt: list):
+        """
+        Accepts a list of messages [{role, content}] and yields the answer text as it arrives.
+        Once the stream is exhausted, last_timing holds time-to-first-token and total seconds.
+        """
+        started = time.perf_counter()
+        ttft = None
+        chunks = 0
+        tokens = _messages_tokens(final_text_prompt) + CHAT_COMPLETION_TOKENS
+        # Messages go to the model as-is: CV text full of braces must not be read as a template
+        for chunk in self.retry.stream(lambda: self.llm.stream(final_text_prompt), tokens):
+            if not chunk.content:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            chunks += 1
+            yield chunk.content
+        self._local.timing = {"ttft": ttft, "total": time.perf_counter() - started, "chunks": chunks}
@@ -0,0 +1,116 @@
+"""
+Record/replay chat model for running llm_agent without the network.
+
+In "record" mode every call goes to the wrapped model (normally ChatGroq) and the answer is
+appended to a JSONL cassette keyed by a hash of the messages, model and temperature.
+In "replay" mode answers come only from the cassette, after a synthetic latency, and a
+missing entry raises CassetteMiss. "auto" replays what it has and records the rest.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+MODES = ("record", "replay", "auto")
+
+
+class CassetteMiss(LookupError):
+    """Replay mode was asked for a prompt that was never recorded."""
+
+
+def cassette_key(messages: List[BaseMessage], model_name: str, temperature: float) -> str:
+    canonical = json.dumps(
+        {"model": model_name, "temperature": temperature,
+         "messages": [[m.type, m.content] for m in messages]},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CassetteChatModel(BaseChatModel):
+    inner: Optional[BaseChatModel] = None  # not needed for pure replay
+    path: str
+    mode: str = "replay"
+    model_name: str = ""
+    temperature: float = 0.0
+    latency: Optional[float] = None  # replay delay in seconds; None = as recorded
+    token_delay: float = 0.0  # replay: seconds between streamed chunks
+
+    _entries: dict = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{self.mode}', expected one of {MODES}")
+        if self.mode != "replay" and self.inner is None:
+            raise ValueError(f"Cassette mode '{self.mode}' needs an inner model to record from")
+        path = Path(self.path)
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry  # later recordings win
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, messages):
+        key = cassette_key(messages, self.model_name, self.temperature)
+        entry = None if self.mode == "record" else self._entries.get(key)
+        if entry is None and self.mode == "replay":
+            raise CassetteMiss(f"No recorded response for prompt {key[:12]} in {self.path}")
+        return key, entry
+
+    def _record(self, key: str, content: str, latency: float, ttft: float = None):
+        entry = {"key": key, "model": self.model_name, "response": content,
+                 "latency": round(latency, 4), "ttft": round(ttft if ttft is not None else latency, 4)}
+        with self._lock:
+            self._entries[key] = entry
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        key, entry = self._lookup(messages)
+        if entry is not None:
+            time.sleep(self.latency if self.latency is not None else entry["latency"])
+            content = entry["response"]
+        else:
+            started = time.perf_counter()
+            content = self.inner.invoke(messages, stop=stop, **kwargs).content
+            self._record(key, content, time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        key, entry = self._lookup(messages)
+        if entry is not None:
+            time.sleep(self.latency if self.latency is not None else entry["ttft"])
+            for i, piece in enumerate(re.findall(r"\S+\s*", entry["response"])):
+                if i and self.token_delay:
+                    time.sleep(self.token_delay)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            return
+
+        started = time.perf_counter()
+        ttft, parts = None, []
+        for chunk in self.inner.stream(messages, stop=stop, **kwargs):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(chunk.content)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+        self._record(key, "".join(parts), time.perf_counter() - started, ttft)
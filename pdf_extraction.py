@@ -0,0 +1,107 @@
+import atexit
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import threading
+
+import pymupdf
+import PyPDF2
+
+# Documents with at least this many pages are split across worker processes
+PARALLEL_MIN_PAGES = int(os.environ.get("ATS_PDF_PARALLEL_MIN_PAGES", "24"))
+MAX_WORKERS = int(os.environ.get("ATS_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+ENGINES = {}
+
+
+def register_engine(cls):
+    ENGINES[cls.name] = cls
+    return cls
+
+
+def get_engine(name: str = "pymupdf", **kwargs):
+    try:
+        return ENGINES[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown PDF engine '{name}', expected one of {sorted(ENGINES)}") from None
+
+
+# -----------------------
+# PyPDF2 (pure Python)
+# -----------------------
+@register_engine
+class PyPDF2Engine:
+    name = "pypdf2"
+
+    def extract(self, data: bytes, layout: bool = False) -> str:
+        # PyPDF2 has no block model; `layout` is accepted for interface parity
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        return "".join([page.extract_text() or "" for page in reader.pages])
+
+
+# -----------------------
+# PyMuPDF (MuPDF, C)
+# -----------------------
+def _page_text(page, layout: bool) -> str:
+    if not layout:
+        return page.get_text("text")
+    # Text blocks in reading order (top-to-bottom, left-to-right) instead of content-stream order
+    blocks = page.get_text("blocks", sort=True)
+    return "".join(block[4] if block[4].endswith("\n") else block[4] + "\n"
+                   for block in blocks if block[6] == 0)
+
+
+def _extract_page_range(data: bytes, start: int, stop: int, layout: bool) -> str:
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        return "".join([_page_text(doc[i], layout) for i in range(start, stop)])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool(max_workers):
+    # One pool per process, reused across documents; spawn is safe under Streamlit's threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+@register_engine
+class PyMuPDFEngine:
+    name = "pymupdf"
+
+    def __init__(self, parallel_min_pages: int = PARALLEL_MIN_PAGES, max_workers: int = None):
+        self.parallel_min_pages = parallel_min_pages
+        # Read at construction, so a process can lower MAX_WORKERS after import (bulk_ingest workers)
+        self.max_workers = MAX_WORKERS if max_workers is None else max_workers
+
+    def extract(self, data: bytes, layout: bool = False) -> str:
+        with pymupdf.open(stream=data, filetype="pdf") as doc:
+            page_count = doc.page_count
+            if self.max_workers <= 1 or page_count < max(self.parallel_min_pages, 2):
+                return "".join([_page_text(page, layout) for page in doc])
+
+        # Contiguous page ranges, one per worker, joined back in page order
+        workers = min(self.max_workers, page_count)
+        bounds = [page_count * w // workers for w in range(workers + 1)]
+        pool = _process_pool(self.max_workers)
+        futures = [
+            pool.submit(_extract_page_range, data, bounds[w], bounds[w + 1], layout)
+            for w in range(workers)
+        ]
+        return "".join([f.result() for f in futures])
@@ -0,0 +1,113 @@
+import re
+import unicodedata
+
+from rate_limiting import estimate_tokens
+
+# LinkedIn "Save to PDF" footers and page furniture
+BOILERPLATE_RES = [
+    re.compile(r"^page\s+\d+\s+of\s+\d+$", re.IGNORECASE),
+    re.compile(r"^-\s*\d+\s*-$"),
+]
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Lines shorter than this (dates, headings, locations) are only dropped with their whole paragraph
+MIN_DEDUPE_WORDS = 4
+# A line or paragraph is a near-duplicate when this share of its word trigrams occurs in the other source
+DUPLICATE_CONTAINMENT = 0.8
+
+
+def normalize_whitespace(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").replace("\f", "\n")
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    # At most one blank line between paragraphs
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def strip_boilerplate(text: str) -> str:
+    return "\n".join(
+        line for line in text.splitlines()
+        if not any(pattern.match(line.strip()) for pattern in BOILERPLATE_RES)
+    )
+
+
+def _words(text: str) -> list:
+    return WORD_RE.findall(text.lower())
+
+
+def _shingles(words: list) -> set:
+    if len(words) < 3:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _contained(words: list, reference: set) -> bool:
+    shingles = _shingles(words)
+    return bool(shingles) and len(shingles & reference) / len(shingles) >= DUPLICATE_CONTAINMENT
+
+
+def drop_near_duplicates(text: str, reference: set) -> tuple:
+    """
+    Remove paragraphs and lines of `text` whose word trigrams are (mostly) already in
+    `reference`, plus repeats within `text` itself. Returns (text, dropped line count).
+    Paragraphs are compared whole first, so wrapping differences between PDFs do not matter.
+    """
+    seen = set(reference)
+    kept_paragraphs, dropped = [], 0
+    for paragraph in text.split("\n\n"):
+        lines = paragraph.splitlines()
+        words = _words(paragraph)
+        if len(lines) > 1 and len(words) >= 3 * MIN_DEDUPE_WORDS and _contained(words, seen):
+            dropped += len(lines)
+            continue
+        kept = []
+        for line in lines:
+            line_words = _words(line)
+            if len(line_words) >= MIN_DEDUPE_WORDS and _contained(line_words, seen):
+                dropped += 1
+                continue
+            kept.append(line)
+            if len(line_words) >= MIN_DEDUPE_WORDS:
+                seen |= _shingles(line_words)
+        if kept:
+            kept_paragraphs.append("\n".join(kept))
+    return "\n\n".join(kept_paragraphs), dropped
+
+
+def trim_to_budget(text: str, max_tokens: int) -> str:
+    """Drop trailing lines until the estimate fits; the top of a resume matters most."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    total = estimate_tokens(text)
+    while lines and total > max_tokens:
+        total -= estimate_tokens(lines.pop() + "\n")
+    return "\n".join(lines).rstrip()
+
+
+def compact_sources(resume_text: str, linkedin_text: str, token_budget: int = None) -> tuple:
+    """
+    Shrink resume + LinkedIn text before it is sent to the model.
+    The resume is authoritative: LinkedIn loses its boilerplate and anything the resume already
+    says, and is trimmed first when the pair exceeds `token_budget`.
+    Returns (resume_text, linkedin_text, report).
+    """
+    before = estimate_tokens(resume_text) + estimate_tokens(linkedin_text)
+
+    resume = normalize_whitespace(resume_text)
+    resume, resume_dropped = drop_near_duplicates(resume, set())
+    reference = _shingles(_words(resume))
+    linkedin = strip_boilerplate(normalize_whitespace(linkedin_text))
+    linkedin, linkedin_dropped = drop_near_duplicates(linkedin, reference)
+
+    if token_budget:
+        resume = trim_to_budget(resume, token_budget)
+        linkedin = trim_to_budget(linkedin, max(token_budget - estimate_tokens(resume), 0))
+
+    after = estimate_tokens(resume) + estimate_tokens(linkedin)
+    report = {
+        "tokens_before": before,
+        "tokens_after": after,
+        "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0,
+        "duplicate_lines_dropped": resume_dropped + linkedin_dropped,
+    }
+    return resume, linkedin, report
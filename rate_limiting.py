@@ -0,0 +1,245 @@
+import asyncio
+import email.utils
+import itertools
+import random
+import threading
+import time
+
+import groq
+import httpx
+
+# Status codes worth another attempt; anything else (400, 401, 404, ...) fails immediately
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (~4 characters per token for English text)."""
+    return (len(text or "") + 3) // 4
+
+
+class TokenBucket:
+    """
+    `per_window` units refilled evenly over `window` seconds, at most `burst` of them saved up.
+    Not thread-safe on its own.
+    """
+
+    def __init__(self, per_window: float, window: float = 60.0, burst: float = None):
+        self.per_window = float(per_window)
+        self.capacity = float(burst if burst is not None else per_window)
+        self.rate = self.per_window / window
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Debit `amount` now and return how many seconds until the debt is covered."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A call larger than a whole window could never be covered; charge one window
+        self.level -= min(amount, self.per_window)
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+
+class RateLimiter:
+    """
+    Requests-per-window and tokens-per-window limits shared by every caller in the process.
+    Callers reserve capacity up front and sleep until it is theirs, so waiting is first come,
+    first served. pause() holds everyone back, e.g. after the server answered 429.
+
+    `burst` is the fraction of a window's budget that may go out at once. The default 1.0 lets
+    an idle process send immediately; small values pace calls evenly, which also satisfies
+    servers that count over a sliding window.
+    """
+
+    def __init__(self, requests_per_window: float = 30, tokens_per_window: float = 12000,
+                 window: float = 60.0, burst: float = 1.0):
+        self.requests = (TokenBucket(requests_per_window, window, max(requests_per_window * burst, 1))
+                         if requests_per_window else None)
+        self.tokens = (TokenBucket(tokens_per_window, window, max(tokens_per_window * burst, 1))
+                       if tokens_per_window else None)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, 0.0)
+            if self.requests:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            self.acquired += 1
+            if wait > 0:
+                self.throttled += 1
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def _release_waiter(self):
+        with self._lock:
+            self.queue_depth -= 1
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request of `tokens` tokens may be sent; returns the seconds waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._release_waiter()
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._release_waiter()
+        return wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "total_wait_s": round(self.total_wait, 2),
+                "avg_wait_s": round(self.total_wait / self.throttled, 3) if self.throttled else 0.0,
+                "max_wait_s": round(self.max_wait, 2),
+            }
+
+
+def retry_after_seconds(exc: Exception):
+    """Server-requested delay from a Retry-After / retry-after-ms header, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)  # HTTP-date form
+        return max(parsed.timestamp() - time.time(), 0.0) if parsed else None
+
+
+def is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(exc, (groq.APIConnectionError, groq.APITimeoutError, httpx.TransportError))
+
+
+class RetryPolicy:
+    """
+    Runs a call through the limiter and retries throttled or transient failures with full-jitter
+    exponential backoff. A Retry-After header sets the minimum delay and pauses the shared
+    limiter, so other callers do not hit the same 429.
+    """
+
+    def __init__(self, limiter: RateLimiter = None, max_attempts: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.rate_limited = 0
+        self.gave_up = 0
+        self.backoff_s = 0.0
+
+    def _should_retry(self, exc: Exception, attempt: int) -> bool:
+        if not is_retryable(exc):
+            return False
+        if attempt + 1 >= self.max_attempts:
+            with self._lock:
+                self.gave_up += 1
+            return False
+        return True
+
+    def _backoff(self, exc: Exception, attempt: int) -> float:
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            # Never sooner than asked; the jitter spreads out callers that got the same header
+            delay = retry_after + random.uniform(0, self.base_delay)
+        else:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if getattr(exc, "status_code", None) == 429:
+            if self.limiter and retry_after is not None:
+                self.limiter.pause(retry_after)
+            with self._lock:
+                self.rate_limited += 1
+        with self._lock:
+            self.retries += 1
+            self.backoff_s += delay
+        return delay
+
+    def call(self, fn, tokens: int = 0):
+        for attempt in itertools.count():
+            if self.limiter:
+                self.limiter.acquire(tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(e, attempt)
+            time.sleep(delay)
+
+    async def acall(self, fn, tokens: int = 0):
+        """call() for coroutine functions."""
+        for attempt in itertools.count():
+            if self.limiter:
+                await self.limiter.aacquire(tokens)
+            try:
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(e, attempt)
+            await asyncio.sleep(delay)
+
+    def stream(self, make_iter, tokens: int = 0):
+        """call() for iterators: retried only until the first item has been yielded."""
+        for attempt in itertools.count():
+            if self.limiter:
+                self.limiter.acquire(tokens)
+            started = False
+            try:
+                for item in make_iter():
+                    started = True
+                    yield item
+                return
+            except Exception as e:
+                if started or not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(e, attempt)
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "gave_up": self.gave_up,
+                "backoff_s": round(self.backoff_s, 2),
+            }
@@ -1,44 +1,59 @@
-import re
 from typing import Dict, List, Tuple
 from collections import Counter
 
+import numpy as np
+
+from bullet_scoring import BulletMatrix, bullet_matrix, top_k
+from job_keywords import JobKeywordIndex, get_job_index
+from keyword_matching import KeywordMatcher, keyword_matcher
+from skill_taxonomy import RoleFamily, SkillTaxonomy, get_taxonomy
+from source_index import SourceSentenceIndex, source_sentence_index
+
+# Word lists are compiled into matchers once, at import, instead of looped over per text
+PRIORITY_TOOLS = KeywordMatcher([
+    'smartsheet', 'ms project', 'microsoft project', 'project',
+    'atlassian', 'jira', 'confluence', 'bitbucket',
+    'python', 'c++', 'javascript', 'java', 'c#',
+    'agile', 'scrum', 'kanban',
+    'project management', 'management',
+    'git', 'github', 'gitlab',
+    'software development', 'software', 'development', 'programming',
+    'collaboration', 'cross-functional', 'team',
+    'leadership', 'lead', 'manage',
+    'communication', 'excel', 'office',
+    'google workspace', 'google', 'slack', 'teams'
+])
+ACHIEVEMENT_INDICATORS = KeywordMatcher([
+    'led', 'managed', 'created', 'developed', 'improved', 'increased', 'delivered', 'coordinated', 'built', 'designed'
+])
+IMPACT_WORDS = KeywordMatcher([
+    'led', 'managed', 'increased', 'decreased', 'improved', 'streamlined', 'optimized', 'delivered', 'launched',
+    'coordinated', 'built', 'created', 'developed', 'directed'
+])
+
 class ResumeOptimizer:
-    def __init__(self):
+    def __init__(self, compat_ranking: bool = False, job_index: JobKeywordIndex = None,
+                 taxonomy: SkillTaxonomy = None):
         self.max_content_length = 4200  # More realistic estimate for one page
         self.max_bullets_per_role = 5  # Increased from 4
         self.min_bullets_per_role = 2
+        # True: rank bullets with a full stable sort, the reference ordering of the old
+        # per-bullet loop. False: argpartition top-k, which gives the same bullets in linear time
+        self.compat_ranking = compat_ranking
+        # Corpus the description's own terms are weighted against; the shared on-disk index by default
+        self.job_index = job_index
+        # Canonical skills, synonyms and per-role-family keep/drop rules (skill_taxonomy.yaml)
+        self.taxonomy = taxonomy or get_taxonomy()
         
     def extract_job_keywords(self, job_description: str) -> List[str]:
         """Extract key skills and technologies from job description"""
-        keywords = set()
-        job_lower = job_description.lower()
-        
-        # Direct string matching for specific tools mentioned in the job requirements
-        priority_tools = [
-            'smartsheet', 'ms project', 'microsoft project', 'project',
-            'atlassian', 'jira', 'confluence', 'bitbucket',
-            'python', 'c++', 'javascript', 'java', 'c#',
-            'agile', 'scrum', 'kanban',
-            'project management', 'management',
-            'git', 'github', 'gitlab',
-            'software development', 'software', 'development', 'programming',
-            'collaboration', 'cross-functional', 'team',
-            'leadership', 'lead', 'manage',
-            'communication', 'excel', 'office',
-            'google workspace', 'google', 'slack', 'teams'
-        ]
-        
-        # Check for each tool in the job description
-        for tool in priority_tools:
-            if tool in job_lower:
-                keywords.add(tool)
-        
-        # Add the specific job requirements you mentioned
-        job_specific_keywords = [
-            'smartsheet', 'ms project', 'atlassian', 'python', 'c++', 'c',
-            'project management', 'software', 'development', 'team'
-        ]
-        keywords.update(job_specific_keywords)
+        # Specific tools mentioned in the job requirements, in one pass over the description
+        keywords = sorted(PRIORITY_TOOLS.find(job_description))
+        
+        # Terms this posting stresses that other stored postings rarely use, by BM25 weight
+        job_index = self.job_index or get_job_index()
+        keywords += [term for term, _ in job_index.keywords(job_description)]
+        keywords = list(dict.fromkeys(keywords))
         
         # Remove any long phrases (keep only single words or short phrases)
         filtered_keywords = []
@@ -49,23 +64,22 @@ class ResumeOptimizer:
         return filtered_keywords
     
     def score_relevance(self, text: str, keywords: List[str]) -> float:
-        """Score text relevance based on keyword matching"""
+        """Score text relevance based on whole-word keyword matching (keywords may be a KeywordMatcher)"""
         if not text or not keywords:
             return 0.0
         
-        text_lower = text.lower()
-        matches = sum(1 for keyword in keywords if keyword.lower() in text_lower)
-        score = matches / len(keywords)
-        
-        return score
+        return keyword_matcher(keywords).score(text)
     
-    def enhance_achievements_from_source(self, experience: List[Dict], resume_text: str, linkedin_text: str) -> List[Dict]:
-        """Extract additional achievements from source documents if roles have too few bullets"""
+    def enhance_achievements_from_source(self, experience: List[Dict], resume_text: str, linkedin_text: str,
+                                         source_index: SourceSentenceIndex = None) -> List[Dict]:
+        """
+        Extract additional achievements from source documents if roles have too few bullets.
+        `source_index` is the user's stored sentence index; without one it is built here, once per process.
+        """
         if not resume_text and not linkedin_text:
             return experience
         
         enhanced_experience = []
-        source_text = f"{resume_text} {linkedin_text}".lower()
         
         for exp in experience:
             enhanced_exp = exp.copy()
@@ -73,26 +87,16 @@ class ResumeOptimizer:
             
             # If role has fewer than 3 bullets, try to extract more from source
             if len(achievements) < 3:
-                role = exp.get('role', '').lower()
-                company = exp.get('company', '').lower()
+                if source_index is None:
+                    source_index = source_sentence_index(resume_text, linkedin_text, ACHIEVEMENT_INDICATORS)
                 
-                # Look for additional bullet points in source text
+                # Achievement-like sentences of bullet length that mention this role/company
                 additional_bullets = []
-                
-                # Simple patterns to find achievement-like sentences
-                sentences = re.split(r'[.!?]', source_text)
-                for sentence in sentences:
-                    sentence = sentence.strip()
-                    if len(sentence) > 20 and len(sentence) < 150:  # Reasonable bullet length
-                        # Check if sentence relates to this role/company
-                        if (role and role in sentence) or (company and company in sentence):
-                            # Check if it looks like an achievement
-                            achievement_indicators = ['led', 'managed', 'created', 'developed', 'improved', 'increased', 'delivered', 'coordinated', 'built', 'designed']
-                            if any(indicator in sentence for indicator in achievement_indicators):
-                                # Clean up the sentence
-                                clean_sentence = sentence.strip(' -•*')
-                                if clean_sentence and clean_sentence not in achievements:
-                                    additional_bullets.append(clean_sentence.capitalize())
+                for sentence in source_index.achievements_about(exp.get('role', ''), exp.get('company', '')):
+                    # Clean up the sentence
+                    clean_sentence = sentence.strip(' -•*')
+                    if clean_sentence and clean_sentence not in achievements:
+                        additional_bullets.append(clean_sentence.capitalize())
                 
                 # Add up to 2 additional bullets
                 for bullet in additional_bullets[:2]:
@@ -105,61 +109,75 @@ class ResumeOptimizer:
         
         return enhanced_experience
     
-    def optimize_experience(self, experience: List[Dict], job_keywords: List[str]) -> List[Dict]:
+    @staticmethod
+    def _achievements(*sections) -> List[str]:
+        return [a for entries in sections for entry in entries or [] for a in entry.get('achievements') or []]
+
+    def _highly_relevant(self, exp: Dict, job_keywords, bullet_hits) -> bool:
+        """
+        Whether the role's overall relevance (role, company and bullets as one text) is above 0.3.
+        Keywords in the bullets and the title bound it from below; only keywords with a space can
+        add to that, by spanning two bullets, so the joined text is scanned only when they decide.
+        """
+        matcher = keyword_matcher(job_keywords)
+        if not len(matcher):
+            return False
+        found = {matcher.keywords[j] for j in np.flatnonzero(bullet_hits.any(axis=0))}
+        found |= matcher.find(f"{exp.get('role', '')} {exp.get('company', '')}")
+        spanning = sum(1 for k in matcher.keywords if ' ' in k and k not in found)
+        if len(found) / len(matcher) > 0.3:
+            return True
+        if (len(found) + spanning) / len(matcher) <= 0.3:
+            return False
+        role_text = f"{exp.get('role', '')} {exp.get('company', '')} {' '.join(exp.get('achievements', []))}"
+        return self.score_relevance(role_text, job_keywords) > 0.3
+
+    def optimize_experience(self, experience: List[Dict], job_keywords: List[str],
+                            matrix: BulletMatrix = None) -> List[Dict]:
         """Optimize professional experience for relevance and length"""
         if not experience:
             return experience
         
+        # Every bullet is scored at once; roles then only pick their rows
+        if matrix is None:
+            matrix = bullet_matrix(self._achievements(experience), IMPACT_WORDS)
+        scores = matrix.scores(job_keywords)
+        hits = matrix.hits(job_keywords)
         optimized_experience = []
         
         for i, exp in enumerate(experience):
-            # Score the role's overall relevance
-            role_text = f"{exp.get('role', '')} {exp.get('company', '')} {' '.join(exp.get('achievements', []))}"
-            relevance_score = self.score_relevance(role_text, job_keywords)
-            
             # Keep all roles but optimize achievements
             optimized_exp = exp.copy()
             achievements = exp.get('achievements', [])
             
             if achievements:
-                # Score each achievement
-                scored_achievements = []
-                for achievement in achievements:
-                    score = self.score_relevance(achievement, job_keywords)
-                    # Boost score for quantifiable achievements
-                    if any(char.isdigit() for char in achievement):
-                        score += 0.3
-                    # Boost score for impact words
-                    impact_words = ['led', 'managed', 'increased', 'decreased', 'improved', 'streamlined', 'optimized', 'delivered', 'launched', 'coordinated', 'built', 'created', 'developed', 'directed']
-                    if any(word in achievement.lower() for word in impact_words):
-                        score += 0.2
-                    scored_achievements.append((achievement, score))
-                
-                # Sort by relevance and keep top achievements
-                scored_achievements.sort(key=lambda x: x[1], reverse=True)
+                # Relevance, boosted for quantifiable achievements and impact words
+                rows = matrix.row_indexes(achievements)
+                role_scores = scores[rows]
                 
                 # Be more generous with bullet allocation
                 # Most recent roles (first 2) get more bullets
                 if i < 2:  # Top 2 most recent roles
                     max_achievements = 5
-                elif relevance_score > 0.3:  # Highly relevant roles
+                elif len(achievements) > 3 and self._highly_relevant(exp, job_keywords, hits[rows]):  # Highly relevant roles
                     max_achievements = 4
                 else:  # Other roles
                     max_achievements = 3
                 
                 # Always keep at least 2 bullets if available
-                min_achievements = min(2, len(scored_achievements))
-                num_to_keep = min(max_achievements, max(min_achievements, len(scored_achievements)))
+                min_achievements = min(2, len(achievements))
+                num_to_keep = min(max_achievements, max(min_achievements, len(achievements)))
                 
+                # Keep the top achievements, most relevant first
                 optimized_exp['achievements'] = [
-                    achievement for achievement, _ in scored_achievements[:num_to_keep]
+                    achievements[j] for j in top_k(role_scores, num_to_keep, self.compat_ranking)
                 ]
             
             optimized_experience.append(optimized_exp)
         
         return optimized_experience
     
-    def optimize_skills(self, skills: List, job_keywords: List[str]) -> List[str]:
+    def optimize_skills(self, skills: List, job_keywords: List[str], role_family: RoleFamily = None) -> List[str]:
         """Filter skills to match job requirements and remove irrelevant ones"""
         if not skills:
             return []
@@ -168,72 +186,46 @@ class ResumeOptimizer:
         skill_strings = [str(skill.get('skill', skill) if isinstance(skill, dict) else skill).strip() 
                         for skill in skills if skill]
         
-        # Define high-priority skills for software/PM roles
-        always_include = [
-            'agile project management', 'jira', 'airtable', 'google workspace', 'microsoft office'
-        ]
-        
-        # Define skills to completely remove for software development roles
-        skills_to_remove = [
-            'adobe creative cloud', 'unity', 'unreal engine', 'miro',
-            'photoshop', 'illustrator', 'after effects'
-        ]
-        
-        # Priority software and PM tools
-        priority_skills = [
-            'smartsheet', 'ms project', 'microsoft project', 'atlassian', 'jira', 'confluence',
-            'python', 'c++', 'javascript', 'git', 'github', 'agile', 'scrum',
-            'project management', 'google workspace', 'microsoft office', 'excel', 'airtable'
-        ]
-        
+        taxonomy = self.taxonomy
+        family = role_family or taxonomy.families[taxonomy.default_family]
+        job_matcher = keyword_matcher(job_keywords)
+        # Known skills the job asks for, under whichever of their names it uses
+        job_skill_ids = frozenset().union(*(taxonomy.mentions(k) for k in job_matcher.keywords))
         filtered_skills = []
+        seen = set()
         
         for skill in skill_strings:
-            skill_lower = skill.lower()
-            
             # Skip empty skills
-            if not skill_lower:
-                continue
-            
-            # Remove creative tools completely
-            if any(remove_skill in skill_lower for remove_skill in skills_to_remove):
+            if not skill:
                 continue
             
-            # Always include certain skills
-            if any(include_skill in skill_lower for include_skill in always_include):
-                filtered_skills.append(skill)
-                continue
-            
-            # Include priority skills
-            if any(priority_skill in skill_lower for priority_skill in priority_skills):
-                filtered_skills.append(skill)
-                continue
+            # Canonical ids of the skill, or of the known skills it mentions
+            skill_ids = taxonomy.mentions(skill)
             
-            # Include if it matches job keywords
-            if any(keyword in skill_lower for keyword in job_keywords):
-                filtered_skills.append(skill)
+            # Remove skills the role family excludes (e.g. creative tools for software roles)
+            if skill_ids & family.excluded:
                 continue
             
-            # Include general office/collaboration tools
-            office_collab = ['slack', 'teams', 'office', 'workspace', 'excel']
-            if any(tool in skill_lower for tool in office_collab):
-                filtered_skills.append(skill)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_skills = []
-        for skill in filtered_skills:
-            if skill.lower() not in seen:
-                seen.add(skill.lower())
-                unique_skills.append(skill)
-        
-        return unique_skills[:12]  # Limit to top 12 skills
+            # Keep skills the role family includes and those the job asks for
+            if skill_ids & family.included or skill_ids & job_skill_ids or job_matcher.contains_any(skill):
+                # One entry per canonical skill, under its display name: "MSProject" is "MS Project"
+                skill_id = taxonomy.resolve(skill)
+                key = skill_id or skill.lower()
+                if key not in seen:
+                    seen.add(key)
+                    filtered_skills.append(taxonomy.display_name(skill_id) if skill_id else skill)
+        
+        return filtered_skills[:12]  # Limit to top 12 skills
     
-    def optimize_projects(self, projects: List[Dict], job_keywords: List[str], max_projects: int = 3) -> List[Dict]:
+    def optimize_projects(self, projects: List[Dict], job_keywords: List[str], max_projects: int = 3,
+                          matrix: BulletMatrix = None) -> List[Dict]:
         """Keep most relevant projects"""
         if not projects:
             return projects
         
+        if matrix is None:
+            matrix = bullet_matrix(self._achievements(projects), IMPACT_WORDS)
+        bullet_relevance = matrix.scores(job_keywords, bonuses=False)
         scored_projects = []
         for project in projects:
             project_text = f"{project.get('project_title', '')} {project.get('role', '')} {' '.join(project.get('achievements', []))}"
@@ -250,15 +242,10 @@ class ResumeOptimizer:
             achievements = project.get('achievements', [])
             
             if achievements:
-                scored_achievements = [
-                    (achievement, self.score_relevance(achievement, job_keywords))
-                    for achievement in achievements
-                ]
-                scored_achievements.sort(key=lambda x: x[1], reverse=True)
-                
                 # Keep top 2-3 achievements per project
+                project_scores = bullet_relevance[matrix.row_indexes(achievements)]
                 optimized_proj['achievements'] = [
-                    achievement for achievement, _ in scored_achievements[:3]
+                    achievements[j] for j in top_k(project_scores, 3, self.compat_ranking)
                 ]
             
             optimized_projects.append(optimized_proj)
@@ -291,10 +278,11 @@ class ResumeOptimizer:
         
         return total_chars
     
-    def optimize_resume(self, structured_result: Dict, job_description: str, resume_text: str = "", linkedin_text: str = "") -> Dict:
-        """Main optimization function"""
-        # Extract keywords from job description
-        job_keywords = self.extract_job_keywords(job_description)
+    def optimize_resume(self, structured_result: Dict, job_description: str, resume_text: str = "", linkedin_text: str = "",
+                        source_index: SourceSentenceIndex = None) -> Dict:
+        """Main optimization function; `source_index` is passed to enhance_achievements_from_source"""
+        # Extract keywords from job description, compiled once for every section below
+        job_keywords = keyword_matcher(self.extract_job_keywords(job_description))
         
         # Create optimized copy
         optimized = structured_result.copy()
@@ -302,26 +290,31 @@ class ResumeOptimizer:
         # First, try to enhance achievements from source documents
         if resume_text or linkedin_text:
             optimized['experience'] = self.enhance_achievements_from_source(
-                optimized.get('experience', []), resume_text, linkedin_text
+                optimized.get('experience', []), resume_text, linkedin_text, source_index
             )
         
+        # One matrix for every bullet in the resume, reused when it is optimized for another job
+        matrix = bullet_matrix(self._achievements(
+            optimized.get('experience'), structured_result.get('projects'), structured_result.get('volunteering')
+        ), IMPACT_WORDS)
+        
         # Then optimize each section
         optimized['experience'] = self.optimize_experience(
-            optimized.get('experience', []), job_keywords
+            optimized.get('experience', []), job_keywords, matrix
         )
         
         optimized['skills'] = self.optimize_skills(
-            structured_result.get('skills', []), job_keywords
+            structured_result.get('skills', []), job_keywords, self.taxonomy.role_family(job_description)
         )
         
         optimized['projects'] = self.optimize_projects(
-            structured_result.get('projects', []), job_keywords
+            structured_result.get('projects', []), job_keywords, matrix=matrix
         )
         
         # Optimize volunteering (keep only most relevant)
         if structured_result.get('volunteering'):
             optimized['volunteering'] = self.optimize_projects(
-                structured_result.get('volunteering', []), job_keywords, max_projects=2
+                structured_result.get('volunteering', []), job_keywords, max_projects=2, matrix=matrix
             )
         
         # Check if we need length optimization (be less aggressive initially)
@@ -0,0 +1,174 @@
+"""
+Skill taxonomy for ResumeOptimizer.optimize_skills, defined in skill_taxonomy.yaml.
+
+Every skill has a canonical id, a display name, a category and synonyms; role families say
+which ids and categories a resume keeps or drops for a kind of job. The YAML is compiled into
+a hash index from each name's compact form (lowercase, letters, digits, "+" and "#" only) to
+its id, so a skill written exactly as one of its names resolves with one dict lookup. Skills
+that only mention a known one ("Jira administration") are found with a KeywordMatcher over
+all names. The compiled form is cached in DB_DIR/skill_taxonomy, keyed by the SHA-256 of the
+YAML, so later starts load JSON instead of parsing and validating the YAML again.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sys
+
+from file_management import BASE_DIR, DB_DIR
+from file_utils import atomic_write
+from keyword_matching import KeywordMatcher, normalize_keyword
+
+TAXONOMY_FILE = pathlib.Path(os.environ.get("ATS_SKILL_TAXONOMY", BASE_DIR / "skill_taxonomy.yaml"))
+TAXONOMY_CACHE_DIR = DB_DIR / "skill_taxonomy"
+COMPILED_VERSION = 1  # bump when the compiled layout changes, to ignore older cache files
+
+NON_SKILL_CHARS_RE = re.compile(r"[^a-z0-9+#]+")
+
+
+def compact(name: str) -> str:
+    """The form names are compared in: "MS-Project", "ms project" and "MSProject" are all "msproject"."""
+    return NON_SKILL_CHARS_RE.sub("", str(name).lower())
+
+
+def compile_taxonomy(source: str) -> dict:
+    """
+    The YAML text as a JSON-serializable index. Raises ValueError for unknown categories or
+    ids, and for a name claimed by two skills.
+    """
+    import yaml
+
+    data = yaml.safe_load(source) or {}
+    categories = data.get("categories") or {}
+    ids, names, skill_categories, lookup, phrases = [], [], [], {}, {}
+    for skill_id, spec in (data.get("skills") or {}).items():
+        skill_id = str(skill_id)
+        spec = spec or {}
+        category = spec.get("category")
+        if category not in categories:
+            raise ValueError(f"Skill {skill_id!r} has unknown category {category!r}")
+        name = str(spec.get("name") or skill_id)
+        ids.append(skill_id)
+        names.append(name)
+        skill_categories.append(category)
+        for synonym in [name] + [str(s) for s in spec.get("synonyms") or []]:
+            key = compact(synonym)
+            if not key:
+                continue
+            if lookup.setdefault(key, skill_id) != skill_id:
+                raise ValueError(f"{synonym!r} names both {lookup[key]!r} and {skill_id!r}")
+            phrases[normalize_keyword(synonym)] = skill_id
+            if len(key) >= 4:
+                phrases.setdefault(key, skill_id)  # also written without spaces: "msproject"
+
+    families, default = {}, None
+    for family, rules in (data.get("role_families") or {}).items():
+        rules = rules or {}
+        for field in ("include", "exclude"):
+            unknown = [i for i in rules.get(field) or [] if i not in ids]
+            if unknown:
+                raise ValueError(f"Role family {family!r} {field}s unknown skills {unknown}")
+        for field in ("include_categories", "exclude_categories"):
+            unknown = [c for c in rules.get(field) or [] if c not in categories]
+            if unknown:
+                raise ValueError(f"Role family {family!r} {field} unknown categories {unknown}")
+        families[family] = {
+            "signals": [str(s) for s in rules.get("signals") or []],
+            "include": list(rules.get("include") or []),
+            "include_categories": list(rules.get("include_categories") or []),
+            "exclude": list(rules.get("exclude") or []),
+            "exclude_categories": list(rules.get("exclude_categories") or []),
+        }
+        if rules.get("default"):
+            default = family
+    return {
+        "version": COMPILED_VERSION,
+        "ids": ids,
+        "names": names,
+        "categories": skill_categories,
+        "lookup": lookup,
+        "phrases": phrases,
+        "families": families,
+        "default_family": default or next(iter(families), None),
+    }
+
+
+class RoleFamily:
+    """Keep/drop rules of one role family, over canonical skill ids."""
+
+    def __init__(self, name: str, rules: dict, category_of: dict):
+        self.name = name
+        self.signals = KeywordMatcher(rules["signals"])
+        excluded_categories = set(rules["exclude_categories"])
+        included_categories = set(rules["include_categories"])
+        self.excluded = frozenset(
+            set(rules["exclude"]) | {i for i, c in category_of.items() if c in excluded_categories}
+        )
+        self.included = frozenset(
+            set(rules["include"]) | {i for i, c in category_of.items() if c in included_categories}
+        ) - self.excluded
+
+
+class SkillTaxonomy:
+    def __init__(self, compiled: dict):
+        self.ids = [sys.intern(i) for i in compiled["ids"]]
+        self.names = dict(zip(self.ids, compiled["names"]))
+        self.category_of = dict(zip(self.ids, compiled["categories"]))
+        self.lookup = {key: sys.intern(i) for key, i in compiled["lookup"].items()}
+        self._phrases = {phrase: sys.intern(i) for phrase, i in compiled["phrases"].items()}
+        self._matcher = None
+        self.families = {
+            name: RoleFamily(name, rules, self.category_of) for name, rules in compiled["families"].items()
+        }
+        self.default_family = compiled["default_family"]
+
+    def resolve(self, skill: str):
+        """The canonical id of a skill written as one of its names, or None."""
+        return self.lookup.get(compact(skill))
+
+    def mentions(self, text: str) -> frozenset:
+        """Ids of the skill `text` is, or else of every known skill it mentions as whole words."""
+        skill_id = self.resolve(text)
+        if skill_id is not None:
+            return frozenset((skill_id,))
+        if self._matcher is None:
+            self._matcher = KeywordMatcher(self._phrases)
+        return frozenset(self._phrases[p] for p in self._matcher.find(text))
+
+    def display_name(self, skill_id: str) -> str:
+        return self.names[skill_id]
+
+    def role_family(self, job_description: str) -> RoleFamily:
+        """The family whose signals the description uses most; the default one on a tie or none."""
+        best = self.families.get(self.default_family)
+        best_hits = len(best.signals.find(job_description)) if best else 0
+        for family in self.families.values():
+            hits = len(family.signals.find(job_description))
+            if hits > best_hits:
+                best, best_hits = family, hits
+        return best
+
+
+def load_taxonomy(path=TAXONOMY_FILE, cache_dir=TAXONOMY_CACHE_DIR) -> SkillTaxonomy:
+    """The taxonomy in `path`, compiled once per version of the file and then loaded from `cache_dir`."""
+    source = pathlib.Path(path).read_bytes()
+    digest = hashlib.sha256(source + f"\0{COMPILED_VERSION}".encode("ascii")).hexdigest()
+    cache_path = pathlib.Path(cache_dir) / f"{digest}.json"
+    if cache_path.exists():
+        compiled = json.loads(cache_path.read_bytes())
+    else:
+        compiled = compile_taxonomy(source.decode("utf-8"))
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(cache_path, json.dumps(compiled).encode("utf-8"))
+    return SkillTaxonomy(compiled)
+
+
+_taxonomy = None
+
+def get_taxonomy() -> SkillTaxonomy:
+    """The process-wide taxonomy loaded from TAXONOMY_FILE."""
+    global _taxonomy
+    if _taxonomy is None:
+        _taxonomy = load_taxonomy()
+    return _taxonomy
@@ -0,0 +1,106 @@
+"""
+Sentence index over a candidate's resume and LinkedIn text, for
+ResumeOptimizer.enhance_achievements_from_source.
+
+The documents are split into sentences once per user. Words map to the sentences they occur
+in, and achievement indicators ("led", "increased", ...) to the sentences that use them, so
+finding extra bullets for a role is a few lookups instead of a pass over the whole text per
+role. The index is stored with the user record (file_management.save_user_source_index) and
+rebuilt only when the documents or the indicator list change.
+"""
+import functools
+import hashlib
+import re
+
+from candidate_profile import profile_source_hash
+
+SENTENCE_SPLIT_RE = re.compile(r"[.!?]")
+WORD_RE = re.compile(r"\w+")
+MIN_SENTENCE_LENGTH = 20  # exclusive bounds of a usable bullet, in characters
+MAX_SENTENCE_LENGTH = 150
+
+
+def index_key(resume_text: str, linkedin_text: str, indicators) -> str:
+    """Identifies the documents and indicator list a stored index was built from."""
+    digest = hashlib.sha256(profile_source_hash(resume_text, linkedin_text).encode("ascii"))
+    digest.update("\0".join(sorted(indicators.keywords)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SourceSentenceIndex:
+    def __init__(self, sentences: list, words: dict, indicators: dict):
+        self.sentences = sentences  # bullet-length sentences, lowercased, in document order
+        self.words = words  # word -> ids of the sentences containing it
+        self.indicators = indicators  # achievement indicator -> ids of the sentences using it
+        self._achievements = set().union(*indicators.values())
+        self._containing = {}  # role/company word -> ids of sentences with a word containing it
+
+    @classmethod
+    def build(cls, resume_text: str, linkedin_text: str, indicators) -> "SourceSentenceIndex":
+        """`indicators` is the KeywordMatcher deciding which sentences read like achievements."""
+        source_text = f"{resume_text} {linkedin_text}".lower()
+        sentences, words, found = [], {}, {}
+        for sentence in SENTENCE_SPLIT_RE.split(source_text):
+            sentence = sentence.strip()
+            if not MIN_SENTENCE_LENGTH < len(sentence) < MAX_SENTENCE_LENGTH:
+                continue
+            sid = len(sentences)
+            sentences.append(sentence)
+            for word in set(WORD_RE.findall(sentence)):
+                words.setdefault(word, []).append(sid)
+            for indicator in indicators.find(sentence):
+                found.setdefault(indicator, []).append(sid)
+        return cls(sentences, words, found)
+
+    def to_dict(self) -> dict:
+        return {"sentences": self.sentences, "words": self.words, "indicators": self.indicators}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SourceSentenceIndex":
+        return cls(data["sentences"], data["words"], data["indicators"])
+
+    def _mentioning(self, phrase: str) -> set:
+        """Ids of the sentences containing `phrase` as a substring, as `phrase in sentence` decides."""
+        tokens = WORD_RE.findall(phrase)
+        if not tokens:
+            candidates = range(len(self.sentences))
+        else:
+            # Every word of the phrase lies inside one word of any sentence containing it,
+            # possibly a longer one ("manager" in "managers"), so the longest narrows the most
+            token = max(tokens, key=len)
+            if token not in self._containing:
+                self._containing[token] = set().union(
+                    *(ids for word, ids in self.words.items() if token in word)
+                )
+            candidates = self._containing[token]
+        return {sid for sid in candidates if phrase in self.sentences[sid]}
+
+    def achievements_about(self, role: str, company: str) -> list:
+        """Achievement-like sentences mentioning the role or the company, in document order."""
+        found = set()
+        for phrase in (role.lower(), company.lower()):
+            if phrase:
+                found |= self._mentioning(phrase) & self._achievements
+        return [self.sentences[sid] for sid in sorted(found)]
+
+
+@functools.lru_cache(maxsize=32)
+def source_sentence_index(resume_text: str, linkedin_text: str, indicators) -> SourceSentenceIndex:
+    """The index of these documents, built once per process."""
+    return SourceSentenceIndex.build(resume_text, linkedin_text, indicators)
+
+
+def ensure_user_source_index(user_id, resume_text: str, linkedin_text: str, indicators) -> SourceSentenceIndex:
+    """
+    The user's stored sentence index, built and saved first if it is missing or was built from
+    different documents or indicators.
+    """
+    from file_management import get_user_source_index, save_user_source_index
+
+    key = index_key(resume_text, linkedin_text, indicators)
+    record = get_user_source_index(user_id)
+    if record and record.get("key") == key:
+        return SourceSentenceIndex.from_dict(record["index"])
+    index = source_sentence_index(resume_text, linkedin_text, indicators)
+    save_user_source_index(user_id, {"key": key, "index": index.to_dict()})
+    return index
@@ -0,0 +1,357 @@
+import contextlib
+import json
+import pathlib
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    resume_text TEXT,
+    linkedin_text TEXT,
+    website TEXT,
+    github TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_source_indexes (
+    user_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    description TEXT,
+    generated_cv TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    last_modified TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS jobs_user_id_idx ON jobs (user_id);
+
+CREATE TRIGGER IF NOT EXISTS update_jobs_last_modified
+AFTER UPDATE ON jobs
+FOR EACH ROW WHEN NEW.last_modified = OLD.last_modified
+BEGIN
+    UPDATE jobs SET last_modified = CURRENT_TIMESTAMP WHERE job_id = NEW.job_id;
+END;
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    user_id TEXT NOT NULL,
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (user_id, job_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS cv_versions (
+    user_id TEXT NOT NULL,
+    job_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (user_id, job_id, seq)
+);
+"""
+
+
+class SQLiteStore:
+    """
+    Embedded storage engine with the same operations as the JSON store.
+    Users are keyed by primary key and jobs carry an index on user_id, so
+    lookups and inserts touch only the rows involved instead of whole files.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Streamlit reruns the script on different threads; one connection per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _write(self):
+        # Take the write lock up front so read-then-insert sequences can't interleave
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -----------------------
+    # User management
+    # -----------------------
+    def get_all_users(self):
+        rows = self._connect().execute("SELECT user_id, name FROM users ORDER BY rowid").fetchall()
+        return [(int(uid), name or "") for uid, name in rows]
+
+    def check_user_exists(self, user_id):
+        row = self._connect().execute(
+            "SELECT 1 FROM users WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return row is not None
+
+    def get_user_info(self, user_id):
+        row = self._connect().execute(
+            "SELECT resume_text, linkedin_text FROM users WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        if row is None:
+            return "", ""
+        return row[0] or "", row[1] or ""
+
+    def create_user(self, user_id, name, resume_text, linkedin_text, website="", github=""):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO users (user_id, name, resume_text, linkedin_text, website, github) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(user_id), name, resume_text, linkedin_text, website, github),
+            )
+        return cur.rowcount == 1
+
+    def create_users(self, records):
+        """Insert many users in one transaction; returns one bool per record."""
+        created = []
+        with self._write() as conn:
+            for r in records:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO users (user_id, name, resume_text, linkedin_text, website, github) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (str(r["user_id"]), r.get("name", ""), r.get("resume_text", ""), r.get("linkedin_text", ""),
+                     r.get("website", ""), r.get("github", "")),
+                )
+                created.append(cur.rowcount == 1)
+        return created
+
+    def get_user_profile(self, user_id):
+        row = self._connect().execute(
+            "SELECT record FROM user_profiles WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_user_profile(self, user_id, record):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO user_profiles (user_id, record) VALUES (?, ?)",
+                (str(user_id), json.dumps(record)),
+            )
+
+    def get_user_source_index(self, user_id):
+        row = self._connect().execute(
+            "SELECT record FROM user_source_indexes WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_user_source_index(self, user_id, record):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO user_source_indexes (user_id, record) VALUES (?, ?)",
+                (str(user_id), json.dumps(record)),
+            )
+
+    # -----------------------
+    # Job management
+    # -----------------------
+    def get_user_jobs(self, user_id):
+        rows = self._connect().execute(
+            "SELECT job_id, description, generated_cv, created_at, last_modified "
+            "FROM jobs WHERE user_id = ? ORDER BY job_id",
+            (str(user_id),),
+        ).fetchall()
+        return [
+            (jid, desc or "", json.loads(cv) if cv else None, created or "", updated or "")
+            for jid, desc, cv, created, updated in rows
+        ]
+
+    def create_new_job(self, user_id, description):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (user_id, description) VALUES (?, ?)",
+                (str(user_id), description),
+            )
+        return cur.lastrowid
+
+    def iter_job_descriptions(self):
+        yield from self._connect().execute("SELECT job_id, description FROM jobs ORDER BY job_id")
+
+    # -----------------------
+    # Chat history
+    # -----------------------
+    def get_chat_history(self, user_id, job_id):
+        rows = self._connect().execute(
+            "SELECT message FROM chat_messages WHERE user_id = ? AND job_id = ? ORDER BY seq",
+            (str(user_id), int(job_id)),
+        ).fetchall()
+        return [json.loads(m) for (m,) in rows]
+
+    def get_chat_tail(self, user_id, job_id, n):
+        rows = self._connect().execute(
+            "SELECT message FROM chat_messages WHERE user_id = ? AND job_id = ? ORDER BY seq DESC LIMIT ?",
+            (str(user_id), int(job_id), int(n)),
+        ).fetchall()
+        return [json.loads(m) for (m,) in reversed(rows)]
+
+    def _next_seq(self, conn, key):
+        return conn.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM chat_messages WHERE user_id = ? AND job_id = ?", key
+        ).fetchone()[0]
+
+    def _insert_messages(self, conn, key, start, messages):
+        conn.executemany(
+            "INSERT INTO chat_messages (user_id, job_id, seq, message) VALUES (?, ?, ?, ?)",
+            [key + (seq, json.dumps(msg)) for seq, msg in enumerate(messages, start=start)],
+        )
+
+    def append_chat_messages(self, user_id, job_id, messages):
+        key = (str(user_id), int(job_id))
+        with self._write() as conn:
+            self._insert_messages(conn, key, self._next_seq(conn, key), messages)
+
+    def save_chat_history(self, user_id, job_id, history):
+        """Appends the messages past the stored ones if those are a prefix of `history`, else replaces them."""
+        history = list(history or [])
+        key = (str(user_id), int(job_id))
+        with self._write() as conn:
+            stored = self._next_seq(conn, key)
+            if stored and len(history) >= stored:
+                (last,) = conn.execute(
+                    "SELECT message FROM chat_messages WHERE user_id = ? AND job_id = ? AND seq = ?",
+                    key + (stored - 1,),
+                ).fetchone()
+                matches = json.loads(last) == json.loads(json.dumps(history[stored - 1]))
+            else:
+                matches = not stored
+            if not matches:
+                conn.execute("DELETE FROM chat_messages WHERE user_id = ? AND job_id = ?", key)
+                stored = 0
+            self._insert_messages(conn, key, stored, history[stored:])
+
+    # -----------------------
+    # CV versions
+    # -----------------------
+    def get_cv_versions(self, user_id, job_id):
+        rows = self._connect().execute(
+            "SELECT record FROM cv_versions WHERE user_id = ? AND job_id = ? ORDER BY seq",
+            (str(user_id), int(job_id)),
+        ).fetchall()
+        return [json.loads(r) for (r,) in rows]
+
+    def append_cv_version(self, user_id, job_id, record):
+        key = (str(user_id), int(job_id))
+        with self._write() as conn:
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM cv_versions WHERE user_id = ? AND job_id = ?", key
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO cv_versions (user_id, job_id, seq, record) VALUES (?, ?, ?, ?)",
+                key + (seq, json.dumps(record)),
+            )
+
+
+# -----------------------
+# Migration from the JSON files
+# -----------------------
+def migrate_json_to_sqlite(db_dir, db_path) -> dict:
+    """
+    One-shot import of users.json, jobs.json, the chat and CV version logs and the stored
+    profiles and source indexes into SQLite. Safe to re-run.
+    """
+    db_dir = pathlib.Path(db_dir)
+    store = SQLiteStore(db_path)
+    conn = store._connect()
+
+    def load(path, default):
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return default
+
+    from file_management import iter_chat_files, iter_cv_version_files, iter_user_blobs, iter_user_records
+
+    jobs = load(db_dir / "jobs.json", {})
+    counts = {"users": 0, "jobs": 0, "chats": 0, "cv_versions": 0, "profiles": 0, "source_indexes": 0}
+
+    with conn:
+        for u in iter_user_records(db_dir):
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO users (user_id, name, resume_text, linkedin_text, website, github) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (u["user_id"], u.get("name", ""), u.get("resume_text", ""), u.get("linkedin_text", ""),
+                 u.get("website", ""), u.get("github", "")),
+            )
+            counts["users"] += cur.rowcount
+        for jid, j in jobs.items():
+            cv = j.get("generated_cv")
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_id, user_id, description, generated_cv, created_at, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (int(jid), str(j.get("user_id")), j.get("description", ""),
+                 json.dumps(cv) if cv is not None else None, j.get("created", ""), j.get("updated", "")),
+            )
+            counts["jobs"] += cur.rowcount
+        for uid, record in iter_user_blobs(db_dir, "profile"):
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO user_profiles (user_id, record) VALUES (?, ?)", (uid, json.dumps(record))
+            )
+            counts["profiles"] += cur.rowcount
+        for uid, record in iter_user_blobs(db_dir, "source_index"):
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO user_source_indexes (user_id, record) VALUES (?, ?)", (uid, json.dumps(record))
+            )
+            counts["source_indexes"] += cur.rowcount
+
+    for uid, jid, history in iter_chat_files(db_dir):
+        if store.get_chat_tail(uid, jid, 1):
+            continue
+        store.save_chat_history(uid, jid, history)
+        counts["chats"] += 1
+
+    with conn:
+        for uid, jid, records in iter_cv_version_files(db_dir):
+            if not records:
+                continue
+            # (user, job, seq) is the key, so versions already imported are ignored
+            cur = conn.executemany(
+                "INSERT OR IGNORE INTO cv_versions (user_id, job_id, seq, record) VALUES (?, ?, ?, ?)",
+                [(str(uid), int(jid), seq, json.dumps(r)) for seq, r in enumerate(records)],
+            )
+            counts["cv_versions"] += cur.rowcount
+
+    store.close()
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from file_management import DB_DIR, SQLITE_FILE
+
+    parser = argparse.ArgumentParser(description="Migrate the JSON store into SQLite.")
+    parser.add_argument("--db-dir", default=str(DB_DIR), help="Directory holding users.json / jobs.json")
+    parser.add_argument("--out", default=str(SQLITE_FILE), help="SQLite database to create or update")
+    args = parser.parse_args()
+    print(migrate_json_to_sqlite(args.db_dir, args.out))
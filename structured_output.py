@@ -54,6 +54,18 @@ class StructuredOutput(BaseModel):
     certifications: List = Field(default_factory=list)
 
 
+class TailoredRole(BaseModel):
+    index: int  # position of the role in the candidate profile
+    bullets: List[int] = Field(default_factory=list)  # positions of the role's bullets, most relevant first
+
+
+class TailoringOutput(BaseModel):
+    summary: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    experience: List[TailoredRole] = Field(default_factory=list)
+    projects: List[int] = Field(default_factory=list)
+
+
 def map_input_to_structured_output(parsed_data: dict) -> StructuredOutput:
     """
     Map a generic parsed dict into StructuredOutput.
@@ -0,0 +1,244 @@
+"""
+Incremental parsing of a model's JSON answer, one top-level section at a time.
+
+SectionStreamParser is fed the answer as it streams in. Each top-level key is validated
+against the target model (e.g. StructuredOutput) as soon as its value is complete, so the
+caller can show it right away. Common defects are repaired locally: markdown fences, prose
+around the object, trailing commas, missing commas, comments, Python literals, and null for
+a field with a default. Sections that are still invalid, or that never arrived because the
+answer was cut off, are reported by pending(), so only they need to be requested again.
+"""
+import json
+import logging
+import re
+
+from pydantic import TypeAdapter, ValidationError
+
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+PYTHON_LITERAL_RE = re.compile(r"(True|False|None)\b")
+VALUE_START = set('"{[-0123456789tfn')
+
+
+def repair_json(text: str):
+    """
+    json.loads with the defects models commonly produce fixed first: fences and surrounding
+    prose, // and /* */ comments, Python True/False/None, trailing commas and missing commas
+    between values. Raises ValueError when the text is still not JSON.
+    """
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.S)
+    if fenced:
+        text = fenced.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if starts and not text[0] in '{["-0123456789tfn':
+        text = text[min(starts):]
+
+    # `last` is the previous significant character, `gap` whether whitespace followed it
+    out, i, in_string, last, gap = [], 0, False, "", False
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 1
+            elif ch == '"':
+                in_string = False
+                last, gap = '"', False
+            i += 1
+            continue
+        if text.startswith("//", i):
+            i = text.find("\n", i) if "\n" in text[i:] else len(text)
+            continue
+        if text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end < 0 else end + 2
+            continue
+        word = PYTHON_LITERAL_RE.match(text, i)
+        if word and (not out or not out[-1].isalnum()):
+            ch = PYTHON_LITERALS[word.group(1)]
+            i += len(word.group(1)) - 1
+        if ch.isspace():
+            gap = bool(last)
+            out.append(ch)
+            i += 1
+            continue
+        if ch in "}]" and last == ",":
+            # Trailing comma: drop it (and the whitespace after it)
+            while out and out[-1] != ",":
+                out.pop()
+            out.pop()
+        elif last and ch[0] in VALUE_START and (last in '"}]' or (gap and last.isalnum())):
+            out.append(",")  # two values in a row: the comma between them is missing
+        if ch == '"':
+            in_string = True
+        out.append(ch)
+        last, gap = ch[-1], False
+        i += 1
+    try:
+        # strict=False allows raw newlines inside strings; raw_decode ignores prose after the value
+        value, _ = json.JSONDecoder(strict=False).raw_decode("".join(out))
+        return value
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON: {e}") from e
+
+
+def schema_fragment(model, keys) -> str:
+    """JSON schema of only `keys` of a pydantic model, with the definitions they use."""
+    schema = model.model_json_schema()
+    fragment = {
+        "type": "object",
+        "properties": {k: schema["properties"][k] for k in keys if k in schema["properties"]},
+    }
+    if schema.get("$defs"):
+        fragment["$defs"] = schema["$defs"]
+    return json.dumps(fragment, separators=(",", ":"))
+
+
+class SectionStreamParser:
+    """
+    Consumes a JSON object answer in chunks and yields its top-level sections as they close.
+    `on_section(key, value)` is called once per valid section, in arrival order.
+    """
+
+    def __init__(self, model, on_section=None):
+        self.model = model
+        self.on_section = on_section
+        self.sections = {}
+        self.invalid = {}  # key -> reason
+        self.repaired = []  # keys that needed local repair
+        self.closed = False
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._adapters = {}
+
+    def feed(self, chunk: str):
+        if self.closed or not chunk:
+            return
+        self._buffer += chunk
+        buf = self._buffer
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None and self._key_start is not None:
+                        self._key = buf[self._key_start + 1:self._pos]
+                        self._key_start = None
+            elif self._depth == 0:
+                if ch == "{":  # fences and prose before the object are skipped
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None and self._key is None:
+                    self._key_start = self._pos
+            elif ch == ":" and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = self._pos + 1
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end_value(buf)
+                    self.closed = True
+                    return
+            elif ch == "," and self._depth == 1:
+                self._end_value(buf)
+            self._pos += 1
+
+    def _end_value(self, buf: str):
+        if self._key is not None and self._value_start is not None:
+            self._accept(self._key, buf[self._value_start:self._pos])
+        self._key = self._key_start = self._value_start = None
+
+    def _adapter(self, key):
+        if key not in self._adapters:
+            self._adapters[key] = TypeAdapter(self.model.model_fields[key].annotation)
+        return self._adapters[key]
+
+    def _accept(self, key: str, raw: str):
+        if key not in self.model.model_fields:
+            return  # keys outside the schema are ignored, as model_validate would
+        raw = raw.strip().rstrip(",").strip()
+        try:
+            try:
+                value = json.loads(raw, strict=False)
+            except json.JSONDecodeError:
+                value = repair_json(raw)
+                self.repaired.append(key)
+            field = self.model.model_fields[key]
+            if value is None and not field.is_required():
+                value = field.get_default(call_default_factory=True)  # null for an empty list
+            adapter = self._adapter(key)
+            value = adapter.dump_python(adapter.validate_python(value), mode="json")
+        except (ValueError, ValidationError) as e:
+            self.invalid[key] = str(e).splitlines()[0][:200]
+            return
+        self.sections[key] = value
+        self.invalid.pop(key, None)
+        if self.on_section:
+            self.on_section(key, value)
+
+    def finish(self):
+        """
+        End of the answer. If no section could be read, the whole text gets one local repair
+        attempt; if it was cut off, the unfinished section is dropped rather than guessed.
+        """
+        if not self.sections and not self.invalid:
+            try:
+                whole = repair_json(self._buffer)
+            except ValueError:
+                return
+            if isinstance(whole, dict):
+                self.closed = True
+                for key, value in whole.items():
+                    self.repaired.append(key)
+                    self._accept(key, json.dumps(value))
+
+    def pending(self) -> list:
+        """
+        Sections to request again: the invalid ones and, if the answer was cut off, the one in
+        progress and those the schema lists after it. Optional sections the model skipped
+        earlier are assumed to be empty, not lost.
+        """
+        fields = list(self.model.model_fields)
+        if not self.sections:
+            return fields
+        missing = []
+        if not self.closed:
+            last_seen = max(fields.index(k) for k in list(self.sections) + list(self.invalid))
+            missing = [k for k in fields[last_seen + 1:] if k not in self.sections]
+            if self._key in self.model.model_fields:
+                missing.insert(0, self._key)
+        return list(dict.fromkeys(list(self.invalid) + missing))
+
+    def merge(self, answer: str, keys) -> list:
+        """Take `keys` from a follow-up answer; returns the keys that are still unusable."""
+        follow_up = SectionStreamParser(self.model)
+        follow_up.feed(answer)
+        follow_up.finish()
+        for key in keys:
+            if key in follow_up.sections:
+                self.sections[key] = follow_up.sections[key]
+                self.invalid.pop(key, None)
+                if self.on_section:
+                    self.on_section(key, self.sections[key])
+        self.repaired += [k for k in follow_up.repaired if k in keys]
+        self.closed = True
+        return [k for k in keys if k not in follow_up.sections]
+
+    def result(self) -> dict:
+        """The validated object; sections that never became valid take their defaults."""
+        if self.invalid:
+            logging.warning(f"Dropping invalid sections: {self.invalid}")
+        return self.model.model_validate(self.sections).model_dump()